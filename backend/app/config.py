@@ -40,7 +40,112 @@ class Settings(BaseSettings):
     # RPA Safety Settings
     RPA_MODE: str = "DEMO"  # DEMO, STAGING, PRODUCTION
     DEMO_BASE_URL: str = "http://localhost:8000/demo-govt"
-    
+
+    # Services Catalogue
+    SERVICES_DATA_PATH: Optional[str] = None  # Override services_data.json location
+    CATALOGUE_CHECK_INTERVAL: float = 2.0  # Seconds between checks for a changed file
+
+    # Browser Execution Mode
+    BROWSER_MODE: str = "headless"  # headless, headful or xvfb
+    BROWSER_ALLOW_VISIBLE: bool = True  # Honour per-request "visible" when a human is watching
+    CHROME_BINARY: Optional[str] = None  # Explicit Chrome/Chromium path (default: platform search)
+    XVFB_DISPLAY: str = ":99"  # Virtual display used in xvfb mode
+    XVFB_SCREEN: str = "1920x1080x24"
+
+    # Chrome WebDriver Pool
+    DRIVER_POOL_MIN_SIZE: int = 1  # Warm browsers kept ready
+    DRIVER_POOL_MAX_SIZE: int = 4  # Hard cap on live browsers per process
+    DRIVER_POOL_MAX_USES: int = 50  # Recycle a browser after this many leases
+    DRIVER_POOL_MAX_MEMORY_MB: int = 1024  # Recycle when browser RSS exceeds this
+    DRIVER_POOL_ACQUIRE_TIMEOUT: int = 60  # Seconds to wait for a free browser
+    DRIVER_POOL_PREWARM: bool = True  # Launch MIN_SIZE browsers on startup
+
+    # Browser Job Executor (keeps Selenium work off the event loop)
+    BROWSER_JOB_WORKERS: int = 4  # Concurrent browser jobs per process
+    BROWSER_JOB_QUEUE_DEPTH: int = 8  # Jobs allowed to wait for a worker
+    BROWSER_JOB_RETRY_AFTER: int = 30  # Retry-After seconds when saturated
+
+    # Multi-tab browser (several jobs share one Chrome, one browser context each)
+    TAB_SCHEDULER_ENABLED: bool = False  # Run form fills as tabs of a shared browser
+    TAB_SCHEDULER_MAX_TABS: int = 4  # Concurrent jobs per shared browser
+
+    # Screenshots (encoded and written off the automation thread)
+    SCREENSHOT_DIR: str = "screenshots"
+    SCREENSHOT_FORMAT: str = "webp"  # webp, jpeg or png
+    SCREENSHOT_QUALITY: int = 70  # WebP/JPEG quality
+    SCREENSHOT_MAX_WIDTH: int = 1280  # Downscale wider captures; 0 keeps full resolution
+    SCREENSHOT_QUEUE_SIZE: int = 64  # Captures waiting for the writer before new ones are dropped
+    SCREENSHOT_RETENTION_DAYS: float = 7  # Delete screenshots older than this; 0 keeps them
+    SCREENSHOT_MAX_TOTAL_MB: int = 500  # Trim oldest screenshots above this; 0 disables
+    SCREENSHOT_SWEEP_INTERVAL: int = 3600  # Seconds between retention sweeps; 0 disables
+
+    # Resource Blocking
+    RESOURCE_BLOCKING_ENABLED: bool = True  # Block images/fonts/media/trackers per portal profile (CDP)
+    RESOURCE_BLOCKING_DEFAULT_PROFILE: str = "default"  # Profile for portals without their own
+
+    # Stored User Data (form data remembered between automation runs)
+    USER_DATA_BACKEND: str = "sql"  # sql (user_form_data table) or json (legacy file per user)
+    USER_DATA_DIR: str = "user_data"  # Directory of the json backend
+    USER_DATA_SWEEP_INTERVAL: int = 600  # Seconds between expired-data sweeps; 0 disables
+    USER_DATA_ACCESS_FLUSH_INTERVAL: float = 5.0  # Seconds last_used/usage_count updates are buffered
+    USER_DATA_ACCESS_MAX_PENDING: int = 1000  # Flush early once this many keys are waiting
+
+    # OCR (runs in worker processes, off the upload request)
+    OCR_WORKERS: int = 2  # Tesseract processes
+    OCR_QUEUE_DEPTH: int = 16  # Documents allowed to wait for a worker
+    OCR_RETRY_AFTER: int = 10  # Retry-After seconds when saturated
+    OCR_PREPROCESS_ENABLED: bool = True  # Crop/downscale/deskew/binarise before Tesseract (ocr_preprocess)
+    OCR_CACHE_ENABLED: bool = True  # Reuse results for identical image + document type
+    OCR_CACHE_MAX_ENTRIES: int = 10000  # Least recently used entries beyond this are evicted
+
+    # Document Uploads (streamed to disk; per-type limits in services/uploads.py)
+    UPLOAD_MAX_MB: int = 25  # Hard cap for any upload, checked against Content-Length
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read/written/hashed at a time
+    UPLOAD_TMP_DIR: str = "uploads/tmp"  # Uploads land here before going into object storage
+
+    # Outbound HTTP (shared pooled clients for the proxy and WhatsApp; services/http_clients.py)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100  # Per client, across all hosts
+    HTTP_CLIENT_MAX_PER_HOST: int = 10  # Concurrent requests to one host
+    HTTP_CLIENT_KEEPALIVE: int = 20  # Idle connections kept open
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection is kept
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_TIMEOUT: float = 30.0  # Read/write/pool timeout
+    HTTP_CLIENT_HTTP2: bool = True  # Negotiate HTTP/2 when the h2 package is installed
+    HTTP_CLIENT_RETRIES: int = 2  # Extra attempts for retryable failures
+    HTTP_CLIENT_RETRY_BACKOFF: float = 0.3  # Base seconds; doubled per attempt, full jitter
+
+    # Iframe Proxy Cache (rewritten pages, following upstream Cache-Control/ETag)
+    PROXY_CACHE_ENABLED: bool = True
+    PROXY_CACHE_MAX_ENTRIES: int = 200  # Pages kept; least recently used evicted
+    PROXY_CACHE_DEFAULT_TTL: int = 300  # Seconds fresh when the upstream sends no freshness headers
+    PROXY_CACHE_MAX_PAGE_KB: int = 2048  # Larger pages are not cached
+    PROXY_SCRIPT_MAX_AGE: int = 86400  # Browser cache lifetime of the injected automation script
+
+    # Object Storage (uploaded documents and screenshots)
+    STORAGE_BACKEND: str = "local"  # local (files under STORAGE_LOCAL_ROOT) or s3 (S3/MinIO, needs boto3)
+    STORAGE_LOCAL_ROOT: str = "."  # Keys are paths relative to this directory
+    STORAGE_S3_BUCKET: str = "unified-portal"
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://minio:9000; None for AWS S3
+    STORAGE_S3_ACCESS_KEY: Optional[str] = None  # None uses the AWS credential chain
+    STORAGE_S3_SECRET_KEY: Optional[str] = None
+    STORAGE_S3_REGION: str = "us-east-1"
+    STORAGE_S3_PREFIX: str = ""  # Key prefix when sharing a bucket
+    STORAGE_PRESIGN_SECONDS: int = 900  # Lifetime of presigned download URLs
+
+    # Form Filling
+    RPA_HUMAN_TYPING: bool = False  # Presentation mode: type one character at a time
+    RPA_HUMAN_TYPING_DELAY: float = 0.05  # Seconds between characters in presentation mode
+    SELECTOR_PLANS_PATH: str = "data/selector_plans.json"  # Learned per-portal field selectors
+
+    # RPA Job Queue (rpa_submissions table, worked by `python -m app.worker`)
+    RPA_QUEUE_VISIBILITY_TIMEOUT: int = 300  # Seconds a lease lasts without a heartbeat
+    RPA_QUEUE_POLL_INTERVAL: float = 2.0  # Seconds between claims when the queue is empty
+    RPA_QUEUE_MAX_RETRIES: int = 3  # Retries after the first attempt
+    RPA_QUEUE_BACKOFF_BASE: int = 30  # First retry delay in seconds, doubled per attempt
+    RPA_QUEUE_BACKOFF_MAX: int = 900  # Cap on retry delay
+    RPA_WORKER_CONCURRENCY: int = 1  # Jobs run in parallel by one worker process
+    RPA_QUEUE_INLINE_WORKER: bool = True  # Also work the queue inside the API process
+
     # Blocked URLs for safety
     BLOCKED_URLS: list = [
         "https://connect.torrentpower.com",
@@ -1,3 +1,4 @@
+from .catalogue import get_catalogue, ServicesCatalogue
 from .service_loader import get_service_loader, ServiceLoader
 
-__all__ = ['get_service_loader', 'ServiceLoader']
+__all__ = ['get_catalogue', 'ServicesCatalogue', 'get_service_loader', 'ServiceLoader']
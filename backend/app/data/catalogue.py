@@ -0,0 +1,243 @@
+"""
+Services Catalogue
+The suppliers/services JSON, loaded once and shared by every router.
+The file is re-checked at most every CATALOGUE_CHECK_INTERVAL seconds and
+only re-parsed when its mtime/size changed and the content hash differs.
+Each load is an immutable snapshot carrying the serialized body and its ETag,
+so the data endpoint can answer from memory (or with a 304), plus secondary
+indexes, precomputed stats and a search index so lookups never scan the
+categories.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from .search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Where services_data.json lives in dev, in the Docker image and from the repo root
+DEFAULT_PATHS = [
+    os.path.join(os.path.dirname(__file__), "services_data.json"),
+    "/app/app/data/services_data.json",
+    "/app/data/services_data.json",
+    "backend/app/data/services_data.json",
+]
+
+AUTOMATED_TYPES = ("direct_form", "login_assisted")
+
+
+def compute_stats(data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Statistics about services and automation capabilities"""
+    stats = {
+        "total_suppliers": 0,
+        "by_category": {},
+        "automation_stats": {
+            "direct_form": 0,
+            "login_assisted": 0,
+            "manual_only": 0,
+            "total_automated": 0
+        },
+        "online_availability": {
+            "online_available": 0,
+            "offline_only": 0
+        },
+        "portal_types": {
+            "government": 0,
+            "private": 0
+        }
+    }
+
+    for category, suppliers in data.items():
+        stats["by_category"][category] = len(suppliers)
+        stats["total_suppliers"] += len(suppliers)
+
+        for supplier in suppliers:
+            automation_type = supplier.get('automation_type', 'manual_only')
+            if automation_type in stats["automation_stats"]:
+                stats["automation_stats"][automation_type] += 1
+            if automation_type in AUTOMATED_TYPES:
+                stats["automation_stats"]["total_automated"] += 1
+
+            if supplier.get('online_available'):
+                stats["online_availability"]["online_available"] += 1
+            else:
+                stats["online_availability"]["offline_only"] += 1
+
+            portal_type = supplier.get('type', 'government')
+            if portal_type in stats["portal_types"]:
+                stats["portal_types"][portal_type] += 1
+
+    return stats
+
+
+class CatalogueSnapshot:
+    """One parsed version of the catalogue and its indexes; never mutated after load"""
+
+    def __init__(self, data: Dict[str, List[Dict[str, Any]]], digest: str, path: Optional[str]):
+        self.data = data
+        self.digest = digest
+        self.path = path
+        self.loaded_at = time.time()
+        self.etag = f'"{digest[:16]}"'
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self.by_id: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self.by_category_id: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.by_category_name: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.by_automation_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.by_online: Dict[bool, List[Dict[str, Any]]] = {True: [], False: []}
+        self.by_category_online: Dict[Tuple[str, bool], List[Dict[str, Any]]] = defaultdict(list)
+        self.by_category_rpa: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.automation_capable: List[Dict[str, Any]] = []
+        summaries: List[Dict[str, Any]] = []
+
+        for category, suppliers in self.data.items():
+            for supplier in suppliers:
+                supplier_id = supplier.get('id')
+                with_category = {**supplier, "category": category}
+                if supplier_id is not None:
+                    if supplier_id in self.by_id:
+                        logger.warning(f"Duplicate supplier id '{supplier_id}' in {category}; keeping the first")
+                    else:
+                        self.by_id[supplier_id] = (category, supplier)
+                    self.by_category_id.setdefault((category, supplier_id), supplier)
+                if supplier.get('name'):
+                    self.by_category_name.setdefault((category, supplier['name'].lower()), supplier)
+
+                online = bool(supplier.get('online_available', False))
+                self.by_automation_type[supplier.get('automation_type', 'manual_only')].append(with_category)
+                self.by_online[online].append(with_category)
+                self.by_category_online[(category, online)].append(supplier)
+                if supplier.get('rpa_enabled', False):
+                    self.by_category_rpa[category].append(supplier)
+                if supplier.get('rpa_enabled') or supplier.get('automation_type') in AUTOMATED_TYPES:
+                    self.automation_capable.append(with_category)
+                summaries.append({
+                    "id": supplier_id,
+                    "name": supplier.get('name'),
+                    "category": category,
+                    "type": supplier.get('type'),
+                    "portal_url": supplier.get('portal_url'),
+                    "online_available": supplier.get('online_available', False),
+                    "automation_type": supplier.get('automation_type', 'manual_only')
+                })
+
+        # Plain dicts from here on, so lookups of missing keys can't add entries
+        self.by_automation_type = dict(self.by_automation_type)
+        self.by_category_online = dict(self.by_category_online)
+        self.by_category_rpa = dict(self.by_category_rpa)
+
+        self.stats = compute_stats(self.data)
+        self.automation_summary = {
+            "automation_capable_suppliers": self.automation_capable,
+            "count": len(self.automation_capable),
+            "categories": {
+                "direct_form": sum(1 for s in self.automation_capable if s.get('automation_type') == 'direct_form'),
+                "login_assisted": sum(1 for s in self.automation_capable if s.get('automation_type') == 'login_assisted'),
+                "total": len(self.automation_capable)
+            }
+        }
+        self.portal_summary = {
+            "suppliers": summaries,
+            "total_count": len(summaries),
+            "categories": list(self.data.keys())
+        }
+        self.search = SearchIndex(self.data)
+
+    def find(self, supplier_id: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """(category, supplier) for an id, or (None, None)"""
+        return self.by_id.get(supplier_id, (None, None))
+
+
+EMPTY_SNAPSHOT = CatalogueSnapshot({}, hashlib.sha256(b"{}").hexdigest(), None)
+
+
+class ServicesCatalogue:
+    """Shared, hot-reloading view of services_data.json"""
+
+    def __init__(self, paths: Optional[List[str]] = None, check_interval: float = 2.0):
+        self.paths = paths or DEFAULT_PATHS
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+        self._file_key = None  # (path, mtime_ns, size) of the last file read
+        self._checked_at = 0.0
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def snapshot(self) -> CatalogueSnapshot:
+        """Current snapshot (re-checks the file if the check interval has passed)"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    @property
+    def data(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.snapshot().data
+
+    def _locate(self) -> Optional[str]:
+        for path in self.paths:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the file changed; returns True when a new snapshot was installed"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            path = self._locate()
+            if path is None:
+                if force:
+                    logger.error("Services data file not found in any expected location")
+                return False
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.error(f"Error checking services data: {e}")
+                return False
+            file_key = (path, stat.st_mtime_ns, stat.st_size)
+            if file_key == self._file_key and not force:
+                return False
+
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                self._file_key = file_key
+                if digest == self._snapshot.digest:
+                    return False  # touched, not changed
+                snapshot = CatalogueSnapshot(json.loads(raw.decode("utf-8")), digest, path)
+            except Exception as e:
+                # Keep serving the last good snapshot
+                logger.error(f"Error loading services data: {e}")
+                return False
+
+            self._snapshot = snapshot
+            self.reloads += 1
+            logger.info(f"Services data loaded from: {path} (etag {snapshot.etag})")
+            return True
+
+
+_catalogue: Optional[ServicesCatalogue] = None
+_catalogue_lock = threading.Lock()
+
+
+def get_catalogue() -> ServicesCatalogue:
+    """Process-wide services catalogue"""
+    global _catalogue
+    if _catalogue is None:
+        with _catalogue_lock:
+            if _catalogue is None:
+                settings = get_settings()
+                paths = [settings.SERVICES_DATA_PATH] if settings.SERVICES_DATA_PATH else None
+                _catalogue = ServicesCatalogue(paths, check_interval=settings.CATALOGUE_CHECK_INTERVAL)
+    return _catalogue
@@ -0,0 +1,337 @@
+"""
+Supplier Search Index
+In-memory index over supplier names, ids, categories, offered services and
+aliases, built once per catalogue snapshot.
+
+- Devanagari and Gujarati text is transliterated to Latin, and every token
+  (indexed or queried) is folded to a loose phonetic key, so "bijli",
+  "बिजली" and "વીજળી" meet.
+- A trie answers prefix queries (type-ahead); a trigram index plus bounded
+  edit distance catches typos.
+- Results are ranked by match quality (exact > prefix > fuzzy) weighted by
+  the field that matched.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# ---- transliteration ---------------------------------------------------------
+
+# Devanagari code points; Gujarati sits at the same offsets + 0x180
+_DEVANAGARI_VOWELS = {
+    0x0905: "a", 0x0906: "aa", 0x0907: "i", 0x0908: "ee", 0x0909: "u", 0x090A: "oo", 0x090B: "ri",
+    0x090D: "e", 0x090F: "e", 0x0910: "ai", 0x0911: "o", 0x0913: "o", 0x0914: "au",
+}
+_DEVANAGARI_CONSONANTS = {
+    0x0915: "k", 0x0916: "kh", 0x0917: "g", 0x0918: "gh", 0x0919: "n",
+    0x091A: "ch", 0x091B: "chh", 0x091C: "j", 0x091D: "jh", 0x091E: "n",
+    0x091F: "t", 0x0920: "th", 0x0921: "d", 0x0922: "dh", 0x0923: "n",
+    0x0924: "t", 0x0925: "th", 0x0926: "d", 0x0927: "dh", 0x0928: "n", 0x0929: "n",
+    0x092A: "p", 0x092B: "ph", 0x092C: "b", 0x092D: "bh", 0x092E: "m",
+    0x092F: "y", 0x0930: "r", 0x0932: "l", 0x0933: "l", 0x0934: "l", 0x0935: "v",
+    0x0936: "sh", 0x0937: "sh", 0x0938: "s", 0x0939: "h",
+}
+_DEVANAGARI_MATRAS = {
+    0x093E: "aa", 0x093F: "i", 0x0940: "ee", 0x0941: "u", 0x0942: "oo", 0x0943: "ri",
+    0x0945: "e", 0x0947: "e", 0x0948: "ai", 0x0949: "o", 0x094B: "o", 0x094C: "au",
+}
+_VIRAMA, _NUKTA = 0x094D, 0x093C
+_NASALS = {0x0901: "n", 0x0902: "n"}
+_VISARGA = 0x0903
+_GUJARATI_OFFSET = 0x0180
+
+
+def _devanagari_point(char: str) -> Optional[int]:
+    """Code point in the Devanagari layout (Gujarati mapped onto it), or None"""
+    point = ord(char)
+    if 0x0900 <= point <= 0x097F:
+        return point
+    if 0x0A80 <= point <= 0x0AFF:
+        return point - _GUJARATI_OFFSET
+    return None
+
+
+def transliterate(text: str) -> str:
+    """Devanagari/Gujarati to a plain Latin spelling; other text passes through"""
+    out: List[str] = []
+    pending = False  # consonant waiting for its inherent 'a'
+    for index, char in enumerate(text):
+        point = _devanagari_point(char)
+        if point is None:
+            if pending and char.isalpha():
+                out.append("a")
+            pending = False
+            out.append(char)
+            continue
+        if point in _DEVANAGARI_CONSONANTS:
+            if pending:
+                out.append("a")
+            out.append(_DEVANAGARI_CONSONANTS[point])
+            pending = True
+        elif point in _DEVANAGARI_MATRAS:
+            out.append(_DEVANAGARI_MATRAS[point])
+            pending = False
+        elif point == _VIRAMA:
+            pending = False
+        elif point == _NUKTA:
+            continue
+        elif point in _NASALS or point == _VISARGA:
+            if pending:
+                out.append("a")
+                pending = False
+            out.append(_NASALS.get(point, "h"))
+        elif point in _DEVANAGARI_VOWELS:
+            if pending:
+                out.append("a")
+                pending = False
+            out.append(_DEVANAGARI_VOWELS[point])
+        elif 0x0966 <= point <= 0x096F:
+            pending = False
+            out.append(str(point - 0x0966))
+    # A word-final consonant keeps no inherent vowel (schwa deletion)
+    return "".join(out)
+
+
+# ---- normalisation -----------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PHONETIC_RULES = [
+    ("chh", "c"), ("ch", "c"), ("sh", "s"), ("ph", "f"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+    ("th", "t"), ("dh", "d"), ("bh", "b"), ("ck", "k"), ("w", "v"), ("z", "j"), ("q", "k"),
+    ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"), ("aa", "a"), ("ai", "e"), ("ei", "e"),
+]
+_REPEATS_RE = re.compile(r"(.)\1+")
+
+
+def fold(token: str) -> str:
+    """Loose phonetic key shared by Latin spellings and transliterations"""
+    for source, target in _PHONETIC_RULES:
+        token = token.replace(source, target)
+    token = _REPEATS_RE.sub(r"\1", token)
+    if len(token) > 3 and token.endswith("a"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded tokens of any text (Latin, Devanagari or Gujarati)"""
+    text = unicodedata.normalize("NFKD", transliterate(text or "")).lower()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [fold(token) for token in _TOKEN_RE.findall(text)]
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (limit + 1) once it can't be within limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+# ---- aliases -----------------------------------------------------------------
+
+# What people call each category (matches the WhatsApp bot's nameHindi entries)
+CATEGORY_ALIASES = {
+    "gas": ["गैस", "ગેસ", "lpg", "png"],
+    "electricity": ["बिजली", "વીજળી", "વીજ", "bijli", "light", "power", "vij"],
+    "water": ["पानी", "પાણી", "pani", "jal", "nal"],
+    "property": ["संपत्ति", "મિલકત", "जमीन", "જમીન", "milkat", "land", "zameen", "mutation"],
+}
+
+# Regional names for suppliers (services_data.json entries may add their own "aliases")
+SUPPLIER_ALIASES = {
+    "gujarat-gas": ["ગુજરાત ગેસ", "गुजरात गैस"],
+    "adani-gas": ["અદાણી ગેસ", "अदानी गैस"],
+    "torrent-gas": ["ટોરેન્ટ ગેસ"],
+    "torrent-power": ["ટોરેન્ટ પાવર", "टोरेंट पावर", "torrent bijli"],
+    "pgvcl": ["પશ્ચિમ ગુજરાત વીજ", "GUVNL"],
+    "ugvcl": ["ઉત્તર ગુજરાત વીજ", "GUVNL"],
+    "mgvcl": ["મધ્ય ગુજરાત વીજ", "GUVNL"],
+    "dgvcl": ["દક્ષિણ ગુજરાત વીજ", "GUVNL"],
+    "amc-water": ["અમદાવાદ", "अहमदाबाद", "amdavad"],
+    "smc-water": ["સુરત", "सूरत"],
+    "vmc-water": ["વડોદરા", "वडोदरा", "baroda"],
+    "rmc-water": ["રાજકોટ", "राजकोट"],
+    "anyror": ["7/12", "satbara", "સાતબાર", "ઉતારા", "8a"],
+    "talati": ["તલાટી", "तलाटी"],
+    "mamlatdar": ["મામલતદાર", "मामलतदार", "tehsildar"],
+    "edhara-centers": ["ઈ-ધરા", "edhara"],
+}
+
+# Offered services, by the catalogue field that says whether the supplier offers them
+SERVICE_TERMS = {
+    "name_change_facility": ["name change", "नाम परिवर्तन", "નામ ફેરફાર", "naam badlav"],
+    "address_change_facility": ["address change", "पता परिवर्तन", "સરનામું ફેરફાર"],
+}
+
+# Field weights: a name hit outranks a category hit
+FIELD_WEIGHTS = {"name": 3.0, "id": 2.5, "alias": 2.0, "category": 1.0, "service": 0.8}
+EXACT, PREFIX, FUZZY = 1.0, 0.75, 0.55
+MIN_FUZZY_SIMILARITY = 0.5
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False
+
+
+class SearchIndex:
+    """Ranked prefix/fuzzy/transliterated search over catalogue suppliers"""
+
+    def __init__(self, data: Dict[str, List[Dict[str, Any]]]):
+        self.documents: List[Tuple[str, Dict[str, Any]]] = []
+        # token -> {doc index: best field weight}
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.trie = _TrieNode()
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.gram_counts: Dict[str, int] = {}
+
+        for category, suppliers in data.items():
+            for supplier in suppliers:
+                self._add(category, supplier)
+        for token in self.postings:
+            self._insert(token)
+            grams = _trigrams(token)
+            self.gram_counts[token] = len(grams)
+            for gram in grams:
+                self.grams[gram].add(token)
+        self.postings = dict(self.postings)
+        self.grams = dict(self.grams)
+
+    # ---- build ---------------------------------------------------------
+
+    def _add(self, category: str, supplier: Dict[str, Any]):
+        doc = len(self.documents)
+        self.documents.append((category, supplier))
+        fields: List[Tuple[str, Iterable[str]]] = [
+            ("name", [supplier.get("name", "")]),
+            ("id", [supplier.get("id", ""), (supplier.get("id") or "").replace("-", "")]),
+            ("alias", SUPPLIER_ALIASES.get(supplier.get("id"), []) + list(supplier.get("aliases", []))),
+            ("category", [category] + CATEGORY_ALIASES.get(category, [])),
+            ("service", [term for key, terms in SERVICE_TERMS.items()
+                         if str(supplier.get(key, "")).lower().startswith("yes") for term in terms]),
+        ]
+        for field, texts in fields:
+            weight = FIELD_WEIGHTS[field]
+            for text in texts:
+                for token in tokenize(text):
+                    if weight > self.postings[token].get(doc, 0):
+                        self.postings[token][doc] = weight
+
+    def _insert(self, token: str):
+        node = self.trie
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    # ---- query ---------------------------------------------------------
+
+    def _completions(self, prefix: str, limit: int = 50) -> List[str]:
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found: List[str] = []
+        stack = [(node, prefix)]
+        while stack and len(found) < limit:
+            node, text = stack.pop()
+            if node.terminal:
+                found.append(text)
+            stack.extend((child, text + char) for char, child in node.children.items())
+        return found
+
+    def _fuzzy(self, token: str) -> Dict[str, float]:
+        """Indexed tokens similar to token -> similarity (0..1)"""
+        grams = _trigrams(token)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.grams.get(gram, ()):
+                overlap[candidate] += 1
+        limit = 1 if len(token) <= 5 else 2
+        matches = {}
+        for candidate, shared in overlap.items():
+            similarity = 2 * shared / (len(grams) + self.gram_counts[candidate])
+            if similarity < MIN_FUZZY_SIMILARITY:
+                distance = _edit_distance(token, candidate, limit)
+                if distance <= limit:
+                    similarity = max(similarity, 1 - distance / max(len(token), len(candidate)))
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                matches[candidate] = similarity
+        return matches
+
+    def _match_token(self, token: str, prefix: bool) -> Dict[int, float]:
+        """doc -> best score for one query token"""
+        scores: Dict[int, float] = {}
+
+        def credit(indexed: str, quality: float):
+            for doc, weight in self.postings.get(indexed, {}).items():
+                score = quality * weight
+                if score > scores.get(doc, 0):
+                    scores[doc] = score
+
+        credit(token, EXACT)
+        if prefix:
+            for completion in self._completions(token):
+                if completion != token:
+                    credit(completion, PREFIX * (len(token) / len(completion)) ** 0.5)
+        # Typo matching only for tokens the catalogue doesn't contain verbatim
+        if len(token) >= 3 and token not in self.postings:
+            for candidate, similarity in self._fuzzy(token).items():
+                if candidate != token:
+                    credit(candidate, FUZZY * similarity)
+        return scores
+
+    def search(self, query: str, limit: Optional[int] = 20, prefix: bool = True) -> List[Dict[str, Any]]:
+        """
+        Suppliers ranked by relevance. Every query token must match (exactly,
+        as a prefix or fuzzily); if nothing matches all of them, suppliers
+        matching most tokens are returned instead. limit=None returns all.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        per_token = [self._match_token(token, prefix) for token in tokens]
+
+        totals: Dict[int, float] = defaultdict(float)
+        hits: Dict[int, int] = defaultdict(int)
+        for scores in per_token:
+            for doc, score in scores.items():
+                totals[doc] += score
+                hits[doc] += 1
+        if not totals:
+            return []
+        required = len(tokens) if any(count == len(tokens) for count in hits.values()) else max(hits.values())
+
+        ranked = sorted(
+            (doc for doc, count in hits.items() if count >= required),
+            key=lambda doc: (-totals[doc], self.documents[doc][1].get("name", "")),
+        )
+        results = []
+        for doc in ranked[:limit]:
+            category, supplier = self.documents[doc]
+            results.append({**supplier, "category": category, "score": round(totals[doc] / len(tokens), 3)})
+        return results
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Type-ahead suggestions: id, name and category of the best prefix matches"""
+        return [
+            {"id": result.get("id"), "name": result.get("name"), "category": result["category"], "score": result["score"]}
+            for result in self.search(prefix, limit=limit, prefix=True)
+        ]
@@ -1,24 +1,19 @@
 """
 Service Data Loader
-Loads all services from JSON file
+Category-oriented helpers over the shared services catalogue
 """
-import json
-import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from .catalogue import ServicesCatalogue, get_catalogue
 
 class ServiceLoader:
-    def __init__(self):
-        self.data_file = os.path.join(os.path.dirname(__file__), 'services_data.json')
-        self.services = self._load_services()
+    def __init__(self, catalogue: Optional[ServicesCatalogue] = None):
+        self.catalogue = catalogue or get_catalogue()
     
-    def _load_services(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load services from JSON file"""
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading services: {e}")
-            return {}
+    @property
+    def services(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Current catalogue data (picks up reloads)"""
+        return self.catalogue.data
     
     def get_all_services(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get all services"""
@@ -30,34 +25,28 @@ class ServiceLoader:
     
     def get_service_by_id(self, category: str, service_id: str) -> Dict[str, Any]:
         """Get specific service by ID"""
-        services = self.services.get(category, [])
-        for service in services:
-            if service['id'] == service_id:
-                return service
-        return {}
+        return self.catalogue.snapshot().by_category_id.get((category, service_id), {})
     
     def get_online_services(self, category: str) -> List[Dict[str, Any]]:
         """Get only online available services"""
-        services = self.services.get(category, [])
-        return [s for s in services if s.get('online_available', False)]
+        return self.catalogue.snapshot().by_category_online.get((category, True), [])
     
     def get_rpa_enabled_services(self, category: str) -> List[Dict[str, Any]]:
         """Get only RPA enabled services"""
-        services = self.services.get(category, [])
-        return [s for s in services if s.get('rpa_enabled', False)]
+        return self.catalogue.snapshot().by_category_rpa.get(category, [])
     
     def get_service_names(self, category: str) -> List[str]:
         """Get list of service names for a category"""
         services = self.services.get(category, [])
         return [s['name'] for s in services]
     
+    def search(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Ranked suppliers (with their category) matching a free-text query; limit=None for all"""
+        return self.catalogue.snapshot().search.search(query, limit=limit)
+
     def get_service_by_name(self, category: str, name: str) -> Dict[str, Any]:
         """Get service by name"""
-        services = self.services.get(category, [])
-        for service in services:
-            if service['name'].lower() == name.lower():
-                return service
-        return {}
+        return self.catalogue.snapshot().by_category_name.get((category, name.lower()), {})
 
 # Global instance
 _loader = None
@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # SQLite needs connect_args for check_same_thread
 connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
@@ -17,3 +20,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def sync_table_columns(table):
+    """
+    Bring an existing table up to date with its model.
+    create_all() never alters existing tables, so columns added to a model
+    later are added here. Indexes are created if missing. On SQLite, which
+    can't relax NOT NULL, an empty table whose nullability changed is rebuilt.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        table.create(bind=engine)
+        return
+
+    existing = {col["name"]: col for col in inspector.get_columns(table.name)}
+
+    if engine.dialect.name == "sqlite":
+        relaxed = [
+            col.name for col in table.columns
+            if col.name in existing and col.nullable and not existing[col.name]["nullable"] and not col.primary_key
+        ]
+        if relaxed:
+            with engine.connect() as conn:
+                rows = conn.execute(text(f"SELECT COUNT(*) FROM {table.name}")).scalar()
+            if rows == 0:
+                logger.info(f"Rebuilding empty table {table.name} (nullable: {', '.join(relaxed)})")
+                table.drop(bind=engine)
+                table.create(bind=engine)
+                return
+            logger.warning(f"Table {table.name} has NOT NULL on {', '.join(relaxed)}; rebuild it to relax")
+
+    with engine.begin() as conn:
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            ddl = CreateColumn(col).compile(dialect=engine.dialect)
+            logger.info(f"Adding column {table.name}.{col.name}")
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        if engine.dialect.name == "postgresql":
+            for col in table.columns:
+                if col.name in existing and col.nullable and not existing[col.name]["nullable"] and not col.primary_key:
+                    conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {col.name} DROP NOT NULL"))
+
+    existing_indexes = {idx["name"] for idx in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            index.create(bind=engine)
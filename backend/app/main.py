@@ -1,13 +1,35 @@
-from fastapi import FastAPI
+import logging
+import threading
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from fastapi.responses import JSONResponse
+from .database import engine, Base, sync_table_columns
 from .routers import auth, users, services, applications, demo_government_simple as demo_government, services_api, whatsapp, documents, services_data, portal_redirect, torrent_power, torrent_automation, proxy
 from .config import get_settings
+from .services.driver_pool import get_driver_pool
+from .services.browser_mode import browser_mode, resolve_headless, shutdown_display
+from .services.browser_executor import get_browser_executor, BrowserCapacityError
+from .services.tab_scheduler import shutdown_tab_schedulers, tab_scheduler_stats
+from .services.resource_blocker import resource_blocking_stats
+from .services.screenshot_pipeline import get_screenshot_pipeline, shutdown_screenshot_pipeline
+from .services.user_data_service import user_data_service
+from .services.ocr_pool import OCRCapacityError, get_ocr_pool, shutdown_ocr_pool
+from .services.ocr_cache import get_ocr_cache
+from .services.uploads import UploadSizeLimitMiddleware, UploadTooLargeError
+from .services.object_storage import get_object_storage
+from .services.http_clients import close_http_clients, http_client_stats, start_http_clients
+from .services.proxy_cache import get_proxy_cache
+from .models import RPASubmission, Document, User
+from .worker import RPAWorker
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Create database tables (only creates if they don't exist)
 Base.metadata.create_all(bind=engine)
+sync_table_columns(RPASubmission.__table__)
+sync_table_columns(Document.__table__)
+sync_table_columns(User.__table__)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -24,12 +46,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads from their Content-Length, before the body is spooled
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(services.router)
-app.include_router(services_api.router)
+# services_data's fixed paths (/data, /stats, /search, ...) must come before services_api's /{category}
 app.include_router(services_data.router)
+app.include_router(services_api.router)
 app.include_router(portal_redirect.router)
 app.include_router(applications.router)
 app.include_router(documents.router)
@@ -39,6 +65,84 @@ app.include_router(torrent_power.router)
 app.include_router(torrent_automation.router)
 app.include_router(proxy.router)
 
+@app.on_event("startup")
+def start_driver_pool():
+    # Launch warm browsers in the background so startup isn't blocked on Chrome
+    if settings.DRIVER_POOL_PREWARM:
+        threading.Thread(target=get_driver_pool().prewarm, args=(resolve_headless(),), daemon=True).start()
+
+@app.on_event("startup")
+def start_screenshot_sweeper():
+    # Keep the screenshots volume within its retention age and size cap
+    get_screenshot_pipeline().start_sweeper()
+
+@app.on_event("startup")
+def start_user_data_sweeper():
+    # Expired stored form data is removed in the background, not on lookups
+    user_data_service.start_sweeper()
+
+@app.on_event("startup")
+def start_outbound_clients():
+    # Keep-alive client pools for the proxy and WhatsApp, instead of a client per request
+    start_http_clients()
+
+@app.on_event("startup")
+def resume_ocr():
+    # Documents uploaded just before a restart still get their OCR
+    try:
+        get_ocr_pool().resume_pending()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not resume queued OCR: {e}")
+
+inline_worker = None
+
+@app.on_event("startup")
+def start_inline_worker():
+    # Work the RPA queue in-process unless dedicated `python -m app.worker` processes do it
+    global inline_worker
+    if settings.RPA_QUEUE_INLINE_WORKER:
+        inline_worker = RPAWorker(
+            concurrency=settings.RPA_WORKER_CONCURRENCY,
+            poll_interval=settings.RPA_QUEUE_POLL_INTERVAL,
+        )
+        inline_worker.start()
+
+@app.on_event("shutdown")
+async def stop_outbound_clients():
+    await close_http_clients()
+
+@app.on_event("shutdown")
+def stop_driver_pool():
+    if inline_worker is not None:
+        inline_worker.request_stop()
+    get_browser_executor().shutdown()
+    shutdown_tab_schedulers()
+    get_driver_pool().shutdown()
+    shutdown_display()
+    shutdown_screenshot_pipeline()
+    user_data_service.shutdown()
+    shutdown_ocr_pool()
+
+@app.exception_handler(BrowserCapacityError)
+async def browser_capacity_handler(request: Request, exc: BrowserCapacityError):
+    return JSONResponse(
+        status_code=429,
+        content={"success": False, "message": exc.message, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(OCRCapacityError)
+async def ocr_capacity_handler(request: Request, exc: OCRCapacityError):
+    return JSONResponse(
+        status_code=429,
+        content={"success": False, "message": exc.message, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request: Request, exc: UploadTooLargeError):
+    return JSONResponse(status_code=413, content={"success": False, "message": exc.message})
+
 @app.get("/")
 def root():
     return {
@@ -50,3 +154,34 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/driver-pool")
+def driver_pool_health():
+    return {
+        **get_driver_pool().stats(),
+        "browser_mode": browser_mode(),
+        "executor": get_browser_executor().stats(),
+        "tabs": tab_scheduler_stats(),
+        "resources": resource_blocking_stats(),
+        "screenshots": get_screenshot_pipeline().stats(),
+    }
+
+@app.get("/health/http-clients")
+def http_clients_health():
+    return http_client_stats()
+
+@app.get("/health/proxy-cache")
+def proxy_cache_health():
+    return get_proxy_cache().stats()
+
+@app.get("/health/storage")
+def storage_health():
+    return get_object_storage().stats()
+
+@app.get("/health/ocr")
+def ocr_health():
+    cache = get_ocr_cache()
+    return {
+        "pool": get_ocr_pool().stats(),
+        "cache": cache.stats() if cache is not None else {"enabled": False},
+    }
@@ -73,6 +73,7 @@ class User(Base):
     state = Column(String(100))
     pincode = Column(String(6))
     date_of_birth = Column(String(10))
+    gender = Column(String(10))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -92,6 +93,10 @@ class Document(Base):
     file_url = Column(String(500), nullable=False)
     file_name = Column(String(255))
     extracted_data = Column(JSON)  # OCR extracted data
+    ocr_status = Column(String(20), index=True)  # queued, done, failed or skipped (see ocr_pool)
+    ocr_error = Column(Text)
+    ocr_completed_at = Column(DateTime(timezone=True))
+    content_hash = Column(String(64), index=True)  # sha256 of the uploaded file
     is_verified = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -188,22 +193,53 @@ class RPASubmission(Base):
     __tablename__ = "rpa_submissions"
     
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey("applications.id"), nullable=False)
+    application_id = Column(Integer, ForeignKey("applications.id"), nullable=True)  # Ad-hoc jobs have no application
+    job_type = Column(String(100), index=True)  # Worker handler, e.g. torrent_power_name_change
     target_website = Column(String(255))  # torrent-power, adani-gas, etc.
     target_url = Column(String(500))
-    status = Column(Enum(RPASubmissionStatus), default=RPASubmissionStatus.QUEUED)
+    status = Column(Enum(RPASubmissionStatus), default=RPASubmissionStatus.QUEUED, index=True)
     submission_data = Column(JSON)  # Data sent to external site
     response_data = Column(JSON)  # Response from external site
+    progress = Column(JSON)  # Live progress reported by the worker
     confirmation_number = Column(String(100))  # External confirmation number
     error_message = Column(Text)
     retry_count = Column(Integer, default=0)
     max_retries = Column(Integer, default=3)
+    next_attempt_at = Column(DateTime(timezone=True), index=True)  # Earliest time the job may be claimed
+    lease_token = Column(String(36))  # Set by the worker that currently owns the job
+    locked_by = Column(String(255))  # Worker id holding the lease
+    lease_expires_at = Column(DateTime(timezone=True), index=True)  # Job is reclaimed after this
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     application = relationship("Application", back_populates="rpa_submissions")
 
+class UserFormData(Base):
+    """Form data remembered for automation (UserDataService's SQL backend)"""
+    __tablename__ = "user_form_data"
+    
+    user_key = Column(String(32), primary_key=True)  # md5 of mobile + email
+    mobile = Column(String(15), index=True, nullable=False)
+    email = Column(String(255))
+    form_data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)  # Swept by the TTL sweeper
+    last_used = Column(DateTime, index=True)
+    usage_count = Column(Integer, default=1)
+
+class OCRCacheEntry(Base):
+    """Extracted fields for an image already OCR'd (see ocr_cache)"""
+    __tablename__ = "ocr_cache"
+    
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the image bytes
+    document_type = Column(String(50), primary_key=True)
+    engine_version = Column(String(100), primary_key=True)  # tesseract + preprocessing + extractors
+    extracted_data = Column(JSON, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used = Column(DateTime(timezone=True), index=True, nullable=False)  # LRU order
+
 # Demo Government Website Data
 class DemoTorrentApplication(Base):
     __tablename__ = "demo_torrent_applications"
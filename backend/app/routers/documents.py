@@ -1,22 +1,49 @@
 """
 Documents Router - Upload, OCR, and Auto-fill
+Files live in object storage (Document.file_url is the storage key);
+OCR runs in the background (see ocr_pool); poll /{document_id}/ocr for the result.
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 import os
-from datetime import datetime
+import mimetypes
 
 from app.database import get_db
 from app.auth import get_current_user
-from app.models import User, Document
-from app.services.ocr_service import ocr_service
+from app.models import User, Document, DocumentType
+from app.services.ocr_pool import OCR_DONE, OCRCapacityError
+from app.services.object_storage import get_object_storage
+from app.services.uploads import UploadTooLargeError, create_document_upload
+from app.config import get_settings
 
 router = APIRouter(prefix="/api/documents", tags=["Documents"])
 
-# Upload directory
-UPLOAD_DIR = "uploads/documents"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Older names clients still send for document_type
+DOCUMENT_TYPE_ALIASES = {
+    "aadhar": DocumentType.AADHAAR,
+    "property_document": DocumentType.PROPERTY_PAPER,
+    "property_doc": DocumentType.PROPERTY_PAPER,
+}
+
+def resolve_document_type(document_type: str) -> DocumentType:
+    if document_type in DOCUMENT_TYPE_ALIASES:
+        return DOCUMENT_TYPE_ALIASES[document_type]
+    try:
+        return DocumentType(document_type)
+    except ValueError:
+        return DocumentType.OTHER
+
+def ocr_status_payload(document: Document) -> dict:
+    return {
+        "document_id": document.id,
+        "ocr_status": document.ocr_status,
+        "extracted_data": document.extracted_data or {},
+        "error": document.ocr_error,
+        "completed_at": document.ocr_completed_at,
+    }
 
 @router.post("/upload")
 async def upload_document(
@@ -26,7 +53,11 @@ async def upload_document(
     db: Session = Depends(get_db)
 ):
     """
-    Upload document and extract data using OCR
+    Upload document; OCR runs in the background
+    
+    Returns at once with the document id and ocr_status ("queued" for
+    images, "skipped" otherwise). Poll GET /api/documents/{id}/ocr.
+    An image OCR'd before comes back "done" with its extracted_data.
     
     Supported document types:
     - aadhar: Aadhar Card
@@ -35,45 +66,27 @@ async def upload_document(
     - gas_bill: Gas Bill
     - water_bill: Water Bill
     - property_document: Property Document
+    
+    Each type has a size limit (services/uploads.py); larger files get 413.
     """
+    doc_type = resolve_document_type(document_type)
+    
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{current_user.id}_{document_type}_{timestamp}_{file.filename}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        
-        # Save file
-        with open(filepath, "wb") as f:
-            f.write(content)
-        
-        # Extract data using OCR
-        extracted_data = {}
-        if file.content_type and file.content_type.startswith('image/'):
-            extracted_data = ocr_service.process_document(content, document_type)
-        
-        # Save document record in database
-        document = Document(
-            user_id=current_user.id,
-            document_type=document_type,
-            filename=filename,
-            filepath=filepath,
-            extracted_data=extracted_data
-        )
-        db.add(document)
-        db.commit()
-        db.refresh(document)
+        document = await create_document_upload(db, current_user, file, doc_type)
         
         return {
             "success": True,
             "message": "Document uploaded successfully",
             "document_id": document.id,
-            "extracted_data": extracted_data,
-            "filename": filename
+            "ocr_status": document.ocr_status,
+            "extracted_data": document.extracted_data or {},
+            "status_url": f"/api/documents/{document.id}/ocr",
+            "download_url": f"/api/documents/{document.id}/download",
+            "filename": document.file_name
         }
         
+    except (HTTPException, UploadTooLargeError, OCRCapacityError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -106,6 +119,57 @@ async def get_document(
     
     return document
 
+@router.get("/{document_id}/ocr")
+async def get_document_ocr(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """OCR status and extracted data for a document (poll until done/failed)"""
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return ocr_status_payload(document)
+
+@router.get("/{document_id}/download")
+async def download_document(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    The uploaded file. With S3/MinIO storage this redirects to a short-lived
+    presigned URL so the bytes don't pass through the API; otherwise it is
+    streamed from local storage.
+    """
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    storage = get_object_storage()
+    url = await run_in_threadpool(storage.presigned_url, document.file_url, get_settings().STORAGE_PRESIGN_SECONDS)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    try:
+        chunks = await run_in_threadpool(storage.iter_chunks, document.file_url)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(document.file_name or document.file_url)[0] or "application/octet-stream"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{document.file_name or os.path.basename(document.file_url)}"'}
+    )
+
 @router.get("/autofill/{document_type}")
 async def get_autofill_data(
     document_type: str,
@@ -119,7 +183,8 @@ async def get_autofill_data(
     # Get user's documents of this type
     documents = db.query(Document).filter(
         Document.user_id == current_user.id,
-        Document.document_type == document_type
+        Document.doc_type == resolve_document_type(document_type),
+        Document.ocr_status == OCR_DONE
     ).order_by(Document.created_at.desc()).limit(1).all()
     
     if not documents:
@@ -143,9 +208,16 @@ async def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete file from disk
-    if os.path.exists(document.filepath):
-        os.remove(document.filepath)
+    # Delete the stored file unless another document has the same content
+    shared = db.query(Document.id).filter(
+        Document.file_url == document.file_url,
+        Document.id != document.id
+    ).first()
+    if not shared:
+        try:
+            await run_in_threadpool(get_object_storage().delete, document.file_url)
+        except ValueError:
+            pass  # not a storage key
     
     # Delete from database
     db.delete(document)
@@ -5,10 +5,12 @@ Redirects users to official government and private portals
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
-import json
-import os
 import logging
 
+from app.config import get_settings
+from app.data import get_catalogue
+from app.services.direct_form_service import build_field_specs, resolve_form_url, submit_direct_form
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/portal", tags=["portal-redirect"])
@@ -28,50 +30,18 @@ class PortalRedirectResponse(BaseModel):
     user_guidance: List[str]
     automation_available: bool = False
 
-def load_services_data() -> Dict[str, Any]:
-    """Load services data from JSON file"""
-    try:
-        # Try multiple possible paths
-        possible_paths = [
-            os.path.join(os.path.dirname(__file__), "../data/services_data.json"),
-            "/app/app/data/services_data.json",
-            "/app/data/services_data.json",
-            "backend/app/data/services_data.json"
-        ]
-        
-        for services_file in possible_paths:
-            if os.path.exists(services_file):
-                with open(services_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                logger.info(f"Services data loaded from: {services_file}")
-                return data
-        
-        logger.error("Services data file not found in any expected location")
-        return {}
-        
-    except Exception as e:
-        logger.error(f"Error loading services data: {e}")
-        return {}
+class DirectFormSubmitRequest(BaseModel):
+    supplier_id: str
+    service_type: str = "name_change"
+    user_data: Dict[str, Any] = {}
+    browser_fallback: bool = True  # Launch Chrome if the page can't be handled over HTTP
+    dry_run: bool = False  # Fill and validate, but don't submit
 
 @router.post("/redirect", response_model=PortalRedirectResponse)
 async def get_portal_redirect(request: PortalRedirectRequest):
     """Get portal redirection information for a supplier"""
     try:
-        # Load services data
-        services_data = load_services_data()
-        
-        # Find supplier across all categories
-        supplier = None
-        category = None
-        
-        for cat, suppliers in services_data.items():
-            for s in suppliers:
-                if s.get('id') == request.supplier_id:
-                    supplier = s
-                    category = cat
-                    break
-            if supplier:
-                break
+        category, supplier = get_catalogue().snapshot().find(request.supplier_id)
         
         if not supplier:
             raise HTTPException(
@@ -209,26 +179,7 @@ def generate_instructions(supplier: Dict[str, Any], service_type: str) -> List[s
 async def get_all_suppliers():
     """Get list of all suppliers with portal information"""
     try:
-        services_data = load_services_data()
-        suppliers = []
-        
-        for category, supplier_list in services_data.items():
-            for supplier in supplier_list:
-                suppliers.append({
-                    "id": supplier.get('id'),
-                    "name": supplier.get('name'),
-                    "category": category,
-                    "type": supplier.get('type'),
-                    "portal_url": supplier.get('portal_url'),
-                    "online_available": supplier.get('online_available', False),
-                    "automation_type": supplier.get('automation_type', 'manual_only')
-                })
-        
-        return {
-            "suppliers": suppliers,
-            "total_count": len(suppliers),
-            "categories": list(services_data.keys())
-        }
+        return get_catalogue().snapshot().portal_summary
         
     except Exception as e:
         logger.error(f"Error getting suppliers: {e}")
@@ -238,20 +189,7 @@ async def get_all_suppliers():
 async def get_supplier_portal_info(supplier_id: str):
     """Get detailed portal information for a specific supplier"""
     try:
-        services_data = load_services_data()
-        
-        # Find supplier
-        supplier = None
-        category = None
-        
-        for cat, suppliers in services_data.items():
-            for s in suppliers:
-                if s.get('id') == supplier_id:
-                    supplier = s
-                    category = cat
-                    break
-            if supplier:
-                break
+        category, supplier = get_catalogue().snapshot().find(supplier_id)
         
         if not supplier:
             raise HTTPException(status_code=404, detail="Supplier not found")
@@ -275,4 +213,35 @@ async def get_supplier_portal_info(supplier_id: str):
         raise
     except Exception as e:
         logger.error(f"Error getting supplier info: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/submit-direct")
+async def submit_direct_form_request(request: DirectFormSubmitRequest):
+    """Fill and submit a direct_form portal over HTTP (browser only as fallback)"""
+    _, supplier = get_catalogue().snapshot().find(request.supplier_id)
+    if not supplier:
+        raise HTTPException(status_code=404, detail=f"Supplier '{request.supplier_id}' not found")
+    
+    demo_mode = (get_settings().RPA_MODE or "DEMO").upper() == "DEMO"
+    if not demo_mode and supplier.get('automation_type') != "direct_form":
+        raise HTTPException(
+            status_code=400,
+            detail=f"{supplier.get('name')} is not a direct form portal ({supplier.get('automation_type', 'manual_only')})"
+        )
+    
+    try:
+        form_url = resolve_form_url(supplier, request.service_type)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    fields = build_field_specs(request.user_data)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No form data provided")
+    
+    result = await submit_direct_form(
+        form_url, fields, browser_fallback=request.browser_fallback, dry_run=request.dry_run,
+        portal=request.supplier_id,
+    )
+    return {"supplier_id": request.supplier_id, "supplier_name": supplier.get('name'), **result}
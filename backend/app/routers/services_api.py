@@ -16,6 +16,23 @@ def get_categories():
         "categories": ["gas", "electricity", "water", "property"]
     }
 
+# Registered before the /{category}/... routes, which would otherwise capture it
+@router.get("/search/{query}")
+def search_services(query: str):
+    """Search services across all categories (ranked, best first within each category)"""
+    results = {}
+    
+    # Every match, as this endpoint always returned (GET /api/services/search?q= is the capped one)
+    for match in loader.search(query, limit=None):
+        category = match.pop("category")
+        match.pop("score", None)
+        results.setdefault(category, []).append(match)
+    
+    return {
+        "query": query,
+        "results": results
+    }
+
 @router.get("/{category}")
 def get_services_by_category(category: str):
     """Get all services in a category"""
@@ -84,23 +101,6 @@ def get_service_names(category: str):
         "names": names
     }
 
-@router.get("/search/{query}")
-def search_services(query: str):
-    """Search services across all categories"""
-    results = {}
-    query_lower = query.lower()
-    
-    for category in ["gas", "electricity", "water", "property"]:
-        services = loader.get_services_by_category(category)
-        matching = [s for s in services if query_lower in s['name'].lower()]
-        if matching:
-            results[category] = matching
-    
-    return {
-        "query": query,
-        "results": results
-    }
-
 @router.get("/")
 def get_all_services():
     """Get all services"""
@@ -9,16 +9,19 @@ from typing import Dict, Any, Optional
 import asyncio
 import time
 import threading
-import uuid
 from datetime import datetime
 
 from app.auth import get_current_user
 from app.models import User
+from app.services.browser_executor import get_browser_executor, BrowserCapacityError
+from app.services.browser_mode import requested_visibility
+from app.services.rpa_queue import get_rpa_queue
+from app.models import RPASubmissionStatus
 
 router = APIRouter(prefix="/api/torrent-automation", tags=["Torrent Power RPA Automation"])
 
-# Global task storage for async automation tracking
-automation_tasks: Dict[str, Dict[str, Any]] = {}
+# Async jobs live in the rpa_submissions table and are run by app.worker
+ASYNC_JOB_TYPE = "torrent_power_name_change"
 
 
 class TorrentAutomationRequest(BaseModel):
@@ -29,7 +32,7 @@ class TorrentAutomationRequest(BaseModel):
     mobile: str
     email: str
     confirm_email: Optional[str] = None
-    options: Optional[Dict[str, Any]] = None  # Optional runtime options (headless, keep_open, etc.)
+    options: Optional[Dict[str, Any]] = None  # Optional runtime options (visible, keep_open, etc.)
 
 
 class TorrentAutomationResponse(BaseModel):
@@ -73,50 +76,6 @@ class AutomationStatusResponse(BaseModel):
     result: Optional[Dict[str, Any]] = None
 
 
-import time as time_module
-
-
-def run_torrent_automation_async(task_id: str, automation_data: Dict[str, Any], on_status_update=None):
-    """Run Torrent Power automation in background and track progress"""
-    try:
-        print(f"\n[TASK {task_id}] Starting async automation...")
-        automation_tasks[task_id]['status'] = 'progress'
-        automation_tasks[task_id]['message'] = '🎬 Chrome opening...'
-        
-        from app.services.torrent_power_automation import TorrentPowerAutomation
-        
-        # Initialize automation
-        automation = TorrentPowerAutomation()
-        
-        # Update status: opening browser
-        automation_tasks[task_id]['current_field'] = 'browser_init'
-        automation_tasks[task_id]['message'] = '🌐 Opening Chrome browser...'
-        
-        # Run automation
-        result = automation.execute_complete_workflow(automation_data)
-        
-        # Update task with final result
-        automation_tasks[task_id]['status'] = 'completed'
-        automation_tasks[task_id]['fields_filled'] = result.get('fields_filled', 0)
-        automation_tasks[task_id]['result'] = result
-        automation_tasks[task_id]['message'] = result.get('message', '✅ Automation completed!')
-        automation_tasks[task_id]['details'] = {
-            'fields_filled': result.get('fields_filled', 0),
-            'total_fields': result.get('total_fields', 5),
-            'success_rate': result.get('success_rate', '0%')
-        }
-        
-        print(f"[TASK {task_id}] ✅ Completed - {result.get('fields_filled', 0)}/{result.get('total_fields', 5)} fields filled")
-        
-    except Exception as e:
-        print(f"[TASK {task_id}] ❌ Error: {str(e)}")
-        automation_tasks[task_id]['status'] = 'failed'
-        automation_tasks[task_id]['message'] = f'❌ Automation failed: {str(e)}'
-        automation_tasks[task_id]['error'] = str(e)
-        import traceback
-        automation_tasks[task_id]['details'] = {'error_traceback': traceback.format_exc()}
-
-
 def run_torrent_automation_with_results(automation_data: Dict[str, Any], options: Dict[str, Any] = None) -> Dict[str, Any]:
     """Run Torrent Power automation and return actual results"""
     try:
@@ -135,12 +94,14 @@ def run_torrent_automation_with_results(automation_data: Dict[str, Any], options
         # Get options
         auto_close = options.get('auto_close', True) if options else True
         close_delay = options.get('close_delay', 5) if options else 5
+        human_typing = options.get('human_typing') if options else None  # Opt-in demo typing
+        visible = requested_visibility(options)  # Only when someone is watching; None follows BROWSER_MODE
         
         # Initialize RPA automation service with options
-        automation = TorrentPowerAutomation(auto_close=auto_close, close_delay=close_delay)
+        automation = TorrentPowerAutomation(auto_close=auto_close, close_delay=close_delay, visible=visible, human_typing=human_typing)
         print(f"✅ Service initialized (auto_close={auto_close}, delay={close_delay}s)")
         
-        # Run the complete automation workflow with visible browser
+        # Run the complete automation workflow
         print("🔥 EXECUTING AUTOMATION NOW...\n")
         result = automation.execute_complete_workflow(automation_data)
         
@@ -245,7 +206,7 @@ async def start_torrent_power_rpa_automation(
         
         # RUN AUTOMATION SYNCHRONOUSLY AND WAIT FOR COMPLETION
         print("🎬 Running automation...\n")
-        result = run_torrent_automation_with_results(automation_data, options)
+        result = await get_browser_executor().run(run_torrent_automation_with_results, automation_data, options)
         
         print("✅ RETURNING ACTUAL RESULTS TO FRONTEND!")
         print(f"📊 Fields filled: {result.get('fields_filled', 0)}/{result.get('total_fields', 0)}\n")
@@ -266,7 +227,7 @@ async def start_torrent_power_rpa_automation(
             error=result.get('error', None)
         )
                 
-    except HTTPException:
+    except (HTTPException, BrowserCapacityError):
         raise
     except Exception as e:
         print(f"❌ Torrent RPA automation API error: {str(e)}")
@@ -301,46 +262,33 @@ async def start_torrent_power_automation_async(request: TorrentAutomationRequest
         if not request.email or request.email.strip() == "":
             raise HTTPException(status_code=400, detail="Email address is required")
         
-        # Generate unique task ID
-        task_id = str(uuid.uuid4())[:8]
-        
-        # Initialize task state
-        automation_tasks[task_id] = {
-            'status': 'starting',
-            'message': '🚀 Initializing automation...',
-            'current_field': None,
-            'fields_filled': 0,
-            'total_fields': 5,
-            'progress_percentage': 0,
-            'created_at': datetime.now().isoformat(),
-            'data': {
+        # Queue the job; a browser worker picks it up (survives API restarts)
+        job = get_rpa_queue().enqueue(
+            ASYNC_JOB_TYPE,
+            {
                 'city': request.city or 'Ahmedabad',
                 'service_number': request.service_number,
                 't_number': request.t_number,
                 'mobile': request.mobile,
-                'email': request.email
-            }
-        }
+                'email': request.email,
+                'visible': requested_visibility(request.options),
+            },
+            target_website="torrent-power",
+            target_url="https://connect.torrentpower.com/tplcp/application/namechangerequest",
+        )
+        task_id = str(job.id)
         
         print(f"\n✅ [TASK {task_id}] Created - queued for async execution")
         
-        # Start automation in background thread
-        automation_thread = threading.Thread(
-            target=run_torrent_automation_async,
-            args=(task_id, automation_tasks[task_id]['data']),
-            daemon=True
-        )
-        automation_thread.start()
-        
         return AsyncStartResponse(
             success=True,
             task_id=task_id,
-            message=f"🚀 Automation started. Browser opening now... Poll status with task_id: {task_id}",
+            message=f"🚀 Automation queued. Browser opening shortly... Poll status with task_id: {task_id}",
             status="starting",
             timestamp=datetime.now().isoformat()
         )
         
-    except HTTPException:
+    except (HTTPException, BrowserCapacityError):
         raise
     except Exception as e:
         print(f"❌ Async automation start error: {str(e)}")
@@ -353,13 +301,24 @@ async def start_torrent_power_automation_async(request: TorrentAutomationRequest
         )
 
 
+# Queue status -> status values the frontend polls for
+STATUS_MAP = {
+    RPASubmissionStatus.QUEUED: "starting",
+    RPASubmissionStatus.PROCESSING: "progress",
+    RPASubmissionStatus.RETRY: "progress",
+    RPASubmissionStatus.SUCCESS: "completed",
+    RPASubmissionStatus.FAILED: "failed",
+}
+
+
 @router.get("/status/{task_id}", response_model=AutomationStatusResponse)
 async def get_automation_status(task_id: str):
     """
     Get current status of an automation task
     Client should poll this endpoint every 1 second
     """
-    if task_id not in automation_tasks:
+    job = get_rpa_queue().get(int(task_id)) if task_id.isdigit() else None
+    if job is None or job.job_type != ASYNC_JOB_TYPE:
         return AutomationStatusResponse(
             task_id=task_id,
             status="not_found",
@@ -369,23 +328,39 @@ async def get_automation_status(task_id: str):
             progress_percentage=0
         )
     
-    task = automation_tasks[task_id]
+    progress_data = job.progress or {}
+    result = job.response_data or {}
+    status = STATUS_MAP.get(job.status, "progress")
+    
+    fields_filled = result.get('fields_filled', progress_data.get('fields_filled', 0))
+    total_fields = result.get('total_fields', progress_data.get('total_fields', 5))
     
     # Calculate progress percentage
     progress = 0
-    if task['total_fields'] > 0:
-        progress = int((task['fields_filled'] / task['total_fields']) * 100)
+    if total_fields > 0:
+        progress = int((fields_filled / total_fields) * 100)
+    
+    if status == "completed":
+        message = result.get('message', '✅ Automation completed!')
+        details = {
+            'fields_filled': fields_filled,
+            'total_fields': total_fields,
+            'success_rate': result.get('success_rate', '0%')
+        }
+    else:
+        message = progress_data.get('message', '')
+        details = {'error': job.error_message, 'attempts': job.retry_count} if job.error_message else None
     
     return AutomationStatusResponse(
         task_id=task_id,
-        status=task['status'],
-        current_field=task.get('current_field'),
-        fields_filled=task.get('fields_filled', 0),
-        total_fields=task.get('total_fields', 5),
+        status=status,
+        current_field=progress_data.get('current_field'),
+        fields_filled=fields_filled,
+        total_fields=total_fields,
         progress_percentage=progress,
-        message=task.get('message', ''),
-        details=task.get('details'),
-        result=task.get('result') if task['status'] == 'completed' else None
+        message=message,
+        details=details,
+        result=result if status == "completed" else None
     )
 
 
@@ -611,7 +586,9 @@ async def start_visible_torrent_power_rpa_automation(
             
             # Initialize and run VISIBLE RPA
             rpa = TorrentPowerRPA()
-            result = rpa.run_visible_automation(rpa_data, options=request.options or {})
+            result = await get_browser_executor().run(
+                rpa.run_visible_automation, rpa_data, options=request.options or {}
+            )
 
             print(f"📊 Visible RPA Result: {result}")
             
@@ -654,6 +631,8 @@ async def start_visible_torrent_power_rpa_automation(
                 timestamp=datetime.now().isoformat(),
                 error="Visible RPA service not available. Selenium WebDriver required."
             )
+        except BrowserCapacityError:
+            raise
         except Exception as e:
             print(f"❌ Visible RPA automation error: {e}")
             return TorrentAutomationResponse(
@@ -664,7 +643,7 @@ async def start_visible_torrent_power_rpa_automation(
                 error=f"Visible RPA automation failed: {str(e)}"
             )
         
-    except HTTPException:
+    except (HTTPException, BrowserCapacityError):
         raise
     except Exception as e:
         print(f"❌ Visible Torrent RPA automation API error: {str(e)}")
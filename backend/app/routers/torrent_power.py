@@ -6,10 +6,20 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 import logging
-from app.services.torrent_power_service import torrent_power_service
+from app.services.torrent_power_service import TorrentPowerService
+from app.services.browser_executor import get_browser_executor, BrowserCapacityError
 
 logger = logging.getLogger(__name__)
 
+
+def _fill_name_change_form(form_data: dict) -> dict:
+    """Executor job: a service (and browser lease) of its own, so parallel jobs never share a driver"""
+    service = TorrentPowerService(visible=True)
+    try:
+        return service.submit_name_change_application({**form_data, "t_number": form_data.get("transaction_number") or ""})
+    finally:
+        service.cleanup()
+
 router = APIRouter(prefix="/api/torrent-power", tags=["Torrent Power RPA"])
 
 class TorrentPowerLoginData(BaseModel):
@@ -50,13 +60,13 @@ async def start_live_fill(request: TorrentPowerAutomationRequest):
         form_data = request.form_data.dict()
         
         # Call the automation service
-        result = torrent_power_service.start_live_automation(form_data)
+        result = await get_browser_executor().run(_fill_name_change_form, form_data)
         
         if result['success']:
             return {
                 "success": True,
                 "message": result['message'],
-                "filled_fields": result.get('filled_fields'),
+                "filled_fields": result.get('fields_filled'),
                 "website": "Torrent Power",
                 "service": "Name Change"
             }
@@ -70,6 +80,8 @@ async def start_live_fill(request: TorrentPowerAutomationRequest):
                 }
             )
             
+    except BrowserCapacityError:
+        raise
     except Exception as e:
         logger.error(f"Torrent Power Live Fill API error: {e}")
         raise HTTPException(
@@ -123,19 +135,18 @@ async def automate_name_change(request: TorrentPowerAutomationRequest):
     try:
         logger.info("Starting Torrent Power name change automation")
         
-        # Convert Pydantic models to dictionaries
-        login_data = request.login_data.dict()
+        # Convert Pydantic models to dictionaries (the name change form needs no login)
         form_data = request.form_data.dict()
         
         # Call the automation service
-        result = torrent_power_service.automate_name_change(login_data, form_data)
+        result = await get_browser_executor().run(_fill_name_change_form, form_data)
         
         if result['success']:
             return {
                 "success": True,
                 "message": result['message'],
-                "screenshot": result.get('screenshot'),
-                "next_step": result.get('next_step'),
+                "screenshot": (result.get('screenshots') or [None])[-1],
+                "next_step": " ".join(result.get('next_steps', [])),
                 "website": "Torrent Power",
                 "service": "Name Change"
             }
@@ -149,6 +160,8 @@ async def automate_name_change(request: TorrentPowerAutomationRequest):
                 }
             )
             
+    except BrowserCapacityError:
+        raise
     except Exception as e:
         logger.error(f"Torrent Power automation API error: {e}")
         raise HTTPException(
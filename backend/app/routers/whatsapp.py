@@ -2,8 +2,8 @@ from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse, PlainTextResponse
 import json
 from datetime import datetime
-import httpx
 from app.config import settings
+from app.services.http_clients import get_http_client
 
 router = APIRouter(prefix="/api/whatsapp", tags=["whatsapp"])
 
@@ -315,9 +315,9 @@ async def send_message(phone: str, text: str):
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+        # Shared keep-alive client; retried (with jitter) only when the API never saw the request or rate-limited it
+        response = await get_http_client("whatsapp").post(url, json=payload, headers=headers)
+        response.raise_for_status()
     except Exception as e:
         print(f"Error sending WhatsApp message: {e}")
 
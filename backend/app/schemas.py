@@ -52,6 +52,7 @@ class DocumentResponse(BaseModel):
     file_url: str
     file_name: Optional[str]
     extracted_data: Optional[dict]
+    ocr_status: Optional[str] = None
     is_verified: int
     created_at: datetime
     
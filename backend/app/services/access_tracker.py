@@ -0,0 +1,117 @@
+"""
+Access Tracker
+Write-behind last_used/usage_count bookkeeping for UserDataService.
+Reads only record the access in memory, coalesced per key (latest
+last_used, summed uses); a background thread hands the batch to the store
+every USER_DATA_ACCESS_FLUSH_INTERVAL seconds, or sooner once
+USER_DATA_ACCESS_MAX_PENDING keys are waiting. A crash loses at most one
+interval (or one full batch) of access metadata, never form data.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.user_data_store import TouchBatch, UserDataStore
+
+logger = logging.getLogger(__name__)
+
+
+class AccessTracker:
+    """Buffers per-key access metadata and flushes it to a store in batches"""
+
+    def __init__(self, store: UserDataStore, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, Tuple[datetime, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time keeps batches in order
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"recorded": 0, "flushes": 0, "flushed_keys": 0, "failed_flushes": 0}
+
+    def record(self, user_key: str, when: datetime, uses: int = 1):
+        """Note an access; no I/O"""
+        with self._lock:
+            last_used, pending_uses = self._pending.get(user_key, (when, 0))
+            self._pending[user_key] = (max(last_used, when), pending_uses + uses)
+            self._stats["recorded"] += 1
+            full = len(self._pending) >= self.max_pending
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def pending(self, user_key: str) -> Optional[Tuple[datetime, int]]:
+        """Access metadata for a key that hasn't reached the store yet"""
+        with self._lock:
+            return self._pending.get(user_key)
+
+    def overlay(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """A stored record with its not-yet-flushed last_used/usage_count applied"""
+        pending = self.pending(record["user_key"])
+        if pending:
+            last_used, uses = pending
+            if not record.get("last_used") or last_used.isoformat() > record["last_used"]:
+                record["last_used"] = last_used.isoformat()
+            record["usage_count"] = record.get("usage_count", 0) + uses
+        return record
+
+    def take(self, user_key: str) -> Optional[Tuple[datetime, int]]:
+        """Remove and return a key's pending metadata (its record is about to be rewritten)"""
+        with self._lock:
+            return self._pending.pop(user_key, None)
+
+    def flush(self) -> int:
+        """Write everything pending as one batch; returns the keys written"""
+        with self._flush_lock:
+            with self._lock:
+                batch: TouchBatch = self._pending
+                self._pending = {}
+            if not batch:
+                return 0
+            try:
+                self.store.touch(batch)
+            except Exception as e:
+                # Put the batch back (merged with anything recorded since) for the next flush
+                with self._lock:
+                    for user_key, (last_used, uses) in batch.items():
+                        newer = self._pending.get(user_key)
+                        if newer:
+                            last_used, uses = max(last_used, newer[0]), uses + newer[1]
+                        self._pending[user_key] = (last_used, uses)
+                    self._stats["failed_flushes"] += 1
+                logger.warning(f"⚠️ Access metadata flush failed ({len(batch)} keys): {e}")
+                return 0
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["flushed_keys"] += len(batch)
+            return len(batch)
+
+    def _ensure_thread(self):
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._flush_loop, name="user-access-flusher", daemon=True)
+                self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Stop the flusher and write what is pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pending": len(self._pending), **self._stats}
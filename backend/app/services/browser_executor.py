@@ -0,0 +1,148 @@
+"""
+Browser Job Executor
+Runs blocking Selenium work on a dedicated, bounded thread pool so the
+asyncio event loop stays free for other requests. When every worker is busy
+and the wait queue is full, new jobs are rejected with BrowserCapacityError
+instead of piling up behind the browsers.
+"""
+
+import math
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserCapacityError(Exception):
+    """Raised when the executor is saturated; carries a Retry-After hint"""
+
+    def __init__(self, retry_after: int, message: str = "All browser workers are busy"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.message = message
+
+
+class BrowserJobExecutor:
+    """Bounded thread pool for browser automation jobs"""
+
+    def __init__(self, max_workers: int = 4, queue_depth: int = 8, retry_after: int = 30):
+        self.max_workers = max(1, max_workers)
+        self.queue_depth = max(0, queue_depth)
+        self.retry_after = max(1, retry_after)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="browser-job")
+        self._lock = threading.Lock()
+        self._pending = 0  # running + waiting
+        self._running = 0
+        self._closed = False
+
+        # Average job duration, used to give clients a sensible Retry-After
+        self._avg_duration: Optional[float] = None
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    def _retry_after_hint(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        if self._avg_duration is None:
+            return self.retry_after
+        waves = math.ceil((self._pending - self.max_workers + 1) / self.max_workers)
+        return max(1, math.ceil(self._avg_duration * max(1, waves)))
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a job, or raise BrowserCapacityError when saturated"""
+        with self._lock:
+            if self._closed:
+                raise BrowserCapacityError(self.retry_after, "Browser executor is shutting down")
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                retry_after = self._retry_after_hint()
+                logger.warning(f"Browser executor saturated ({self._pending}/{self.capacity}), retry in {retry_after}s")
+                raise BrowserCapacityError(retry_after)
+            self._pending += 1
+            self._submitted += 1
+
+        try:
+            return self._executor.submit(self._run_job, fn, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise BrowserCapacityError(self.retry_after, "Browser executor is shutting down")
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking job on the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _run_job(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            self._running += 1
+        started = time.monotonic()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                if self._avg_duration is None:
+                    self._avg_duration = elapsed
+                else:
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * elapsed
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs; running jobs finish in the background"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "running": self._running,
+                "waiting": self._pending - self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_duration_seconds": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+            }
+
+
+_browser_executor: Optional[BrowserJobExecutor] = None
+_browser_executor_lock = threading.Lock()
+
+
+def get_browser_executor() -> BrowserJobExecutor:
+    """Get or create the process-wide browser job executor"""
+    global _browser_executor
+    if _browser_executor is None:
+        with _browser_executor_lock:
+            if _browser_executor is None:
+                settings = get_settings()
+                _browser_executor = BrowserJobExecutor(
+                    max_workers=settings.BROWSER_JOB_WORKERS,
+                    queue_depth=settings.BROWSER_JOB_QUEUE_DEPTH,
+                    retry_after=settings.BROWSER_JOB_RETRY_AFTER,
+                )
+    return _browser_executor
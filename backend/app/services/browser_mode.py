@@ -0,0 +1,106 @@
+"""
+Browser Execution Mode
+Decides how automation browsers run, from BROWSER_MODE:
+
+    headless  Chrome's new headless mode (default; least CPU and memory per job)
+    headful   a normal window on the host's display
+    xvfb      a normal window on a virtual X display started on demand
+
+API callers may ask for a visible window when a human is watching; that is
+honoured only while BROWSER_ALLOW_VISIBLE is on.
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+HEADLESS = "headless"
+HEADFUL = "headful"
+XVFB = "xvfb"
+BROWSER_MODES = (HEADLESS, HEADFUL, XVFB)
+
+_xvfb_process: Optional[subprocess.Popen] = None
+_xvfb_lock = threading.Lock()
+
+
+def browser_mode() -> str:
+    """The configured mode (unknown values fall back to headless)"""
+    mode = (get_settings().BROWSER_MODE or HEADLESS).strip().lower()
+    if mode not in BROWSER_MODES:
+        logger.warning(f"⚠️ Unknown BROWSER_MODE '{mode}', using {HEADLESS}")
+        return HEADLESS
+    return mode
+
+
+def resolve_headless(visible: Optional[bool] = None) -> bool:
+    """
+    Whether to launch headless. visible=None follows BROWSER_MODE; True asks
+    for a window (if allowed), False forces headless.
+    """
+    if visible is False:
+        return True
+    if visible:
+        if get_settings().BROWSER_ALLOW_VISIBLE:
+            return False
+        logger.info("🙈 Visible browser requested but BROWSER_ALLOW_VISIBLE is off, using BROWSER_MODE")
+    return browser_mode() == HEADLESS
+
+
+def requested_visibility(options: Optional[Dict[str, Any]]) -> Optional[bool]:
+    """A request's visibility override from its options ("visible", or legacy "headless")"""
+    if not options:
+        return None
+    if options.get("visible") is not None:
+        return bool(options["visible"])
+    if options.get("headless") is not None:
+        return not options["headless"]
+    return None
+
+
+def ensure_display():
+    """Make sure a non-headless Chrome has a display (starts Xvfb in xvfb mode)"""
+    global _xvfb_process
+    if browser_mode() != XVFB:
+        return
+    settings = get_settings()
+    display = settings.XVFB_DISPLAY
+    socket_path = f"/tmp/.X11-unix/X{display.lstrip(':').split('.')[0]}"
+    with _xvfb_lock:
+        if not os.path.exists(socket_path):
+            binary = shutil.which("Xvfb")
+            if not binary:
+                raise RuntimeError("BROWSER_MODE=xvfb but Xvfb is not installed")
+            logger.info(f"🖥️ Starting Xvfb on {display} ({settings.XVFB_SCREEN})")
+            _xvfb_process = subprocess.Popen(
+                [binary, display, "-screen", "0", settings.XVFB_SCREEN, "-nolisten", "tcp"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            deadline = time.monotonic() + 5
+            while not os.path.exists(socket_path):
+                if _xvfb_process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Xvfb failed to start on {display}")
+                time.sleep(0.05)
+        os.environ["DISPLAY"] = display
+
+
+def shutdown_display():
+    """Stop the Xvfb server this process started, if any"""
+    global _xvfb_process
+    with _xvfb_lock:
+        if _xvfb_process is not None and _xvfb_process.poll() is None:
+            _xvfb_process.terminate()
+            try:
+                _xvfb_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                _xvfb_process.kill()
+            logger.info("🖥️ Xvfb stopped")
+        _xvfb_process = None
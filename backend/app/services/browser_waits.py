@@ -0,0 +1,256 @@
+"""
+Browser Wait Toolkit
+Condition-based waits that replace fixed time.sleep pacing in the RPA fill
+routines. Every helper returns as soon as the page reaches the wanted state
+and returns False (instead of raising) when the timeout runs out, so the
+callers keep their best-effort behaviour.
+
+Human-paced typing is a presentation mode only; it is off unless the caller
+or RPA_HUMAN_TYPING asks for it.
+
+Workflows written as step generators yield WaitFor between steps instead of
+blocking. run_steps drives such a generator on a dedicated browser; the tab
+scheduler interleaves several of them on one browser.
+"""
+
+import time
+import logging
+from typing import Any, Callable, Generator, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+POLL_FREQUENCY = 0.05
+
+# Counts in-flight fetch/XHR requests and remembers the last network activity.
+# Resource timing entries also bump the activity clock so images/scripts count.
+NETWORK_PROBE_JS = """
+const idleMs = arguments[0];
+let t = window.__rpaNet;
+if (!t) {
+    t = window.__rpaNet = {inflight: 0, last: performance.now(), resources: 0};
+    const done = () => { t.inflight = Math.max(0, t.inflight - 1); t.last = performance.now(); };
+    if (window.fetch) {
+        const origFetch = window.fetch;
+        window.fetch = function() {
+            t.inflight++; t.last = performance.now();
+            return origFetch.apply(this, arguments).finally(done);
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        t.inflight++; t.last = performance.now();
+        this.addEventListener('loadend', done);
+        return origSend.apply(this, arguments);
+    };
+}
+const n = performance.getEntriesByType('resource').length;
+if (n !== t.resources) { t.resources = n; t.last = performance.now(); }
+return t.inflight === 0 && (performance.now() - t.last) >= idleMs;
+"""
+
+# Records the time of the last DOM mutation; quiet once nothing changed for quietMs
+DOM_QUIET_PROBE_JS = """
+const quietMs = arguments[0];
+let q = window.__rpaDom;
+if (!q) {
+    q = window.__rpaDom = {last: performance.now()};
+    new MutationObserver(() => { q.last = performance.now(); }).observe(
+        document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true}
+    );
+}
+return (performance.now() - q.last) >= quietMs;
+"""
+
+VALUE_PROBE_JS = """
+const el = arguments[0], expected = arguments[1];
+if (el.tagName === 'SELECT') {
+    const opt = el.options[el.selectedIndex];
+    return el.value === expected || (opt && opt.text.trim() === expected);
+}
+return el.value === expected;
+"""
+
+
+def _wait(driver, timeout: float, condition, what: str) -> bool:
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+        return True
+    except TimeoutException:
+        logger.debug(f"⏳ Timed out after {timeout}s waiting for {what}")
+        return False
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Wait for {what} aborted: {e}")
+        return False
+
+
+class WaitFor:
+    """
+    Yielded by a step generator: resume once condition(driver) returns a truthy
+    value (sent back into the generator) or send None after timeout seconds.
+    """
+
+    def __init__(self, condition: Callable[[Any], Any], timeout: float = 10, what: str = "condition", poll: float = POLL_FREQUENCY):
+        self.condition = condition
+        self.timeout = timeout
+        self.what = what
+        self.poll = poll
+
+    def check(self, driver) -> Any:
+        """One non-blocking probe; driver errors (alerts, navigation) count as not yet"""
+        try:
+            return self.condition(driver)
+        except WebDriverException:
+            return False
+
+
+Steps = Generator[WaitFor, Any, Any]
+
+
+def pause(seconds: float) -> WaitFor:
+    """A WaitFor that never fires - a sleep that doesn't hold the browser"""
+    return WaitFor(lambda d: False, timeout=seconds, what="pause")
+
+
+def run_steps(driver, steps: Steps) -> Any:
+    """Drive a step generator on a browser of its own and return its result"""
+    try:
+        request = next(steps)
+        while True:
+            result = None
+            if isinstance(request, WaitFor):
+                try:
+                    result = WebDriverWait(driver, request.timeout, poll_frequency=request.poll).until(request.check)
+                except TimeoutException:
+                    logger.debug(f"⏳ Timed out after {request.timeout}s waiting for {request.what}")
+            request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def navigate(driver, url: str, wait: bool = True):
+    """
+    driver.get blocks until the page loads; wait=False only starts the
+    navigation (CDP Page.navigate) so a step generator can yield while it loads.
+    """
+    if wait:
+        driver.get(url)
+    else:
+        driver.execute_cdp_cmd("Page.navigate", {"url": url})
+
+
+def page_settled(driver) -> bool:
+    """Non-blocking probe: readyState complete, network idle and DOM quiet"""
+    return (
+        driver.execute_script("return document.readyState") == "complete"
+        and driver.execute_script(NETWORK_PROBE_JS, 500)
+        and driver.execute_script(DOM_QUIET_PROBE_JS, 250)
+    )
+
+
+def ui_settled(driver) -> bool:
+    """Non-blocking probe behind wait_for_ui_settled"""
+    return driver.execute_script(NETWORK_PROBE_JS, 200) and driver.execute_script(DOM_QUIET_PROBE_JS, 150)
+
+
+def wait_for_ready_state(driver, timeout: float = 10, state: str = "complete") -> bool:
+    """Wait for document.readyState ('interactive' also accepts 'complete')"""
+    accepted = ("interactive", "complete") if state == "interactive" else ("complete",)
+    return _wait(
+        driver, timeout,
+        lambda d: d.execute_script("return document.readyState") in accepted,
+        f"readyState={state}",
+    )
+
+
+def wait_for_network_idle(driver, timeout: float = 10, idle_ms: int = 500) -> bool:
+    """Wait until no fetch/XHR is in flight and no resource loaded for idle_ms"""
+    return _wait(driver, timeout, lambda d: d.execute_script(NETWORK_PROBE_JS, idle_ms), "network idle")
+
+
+def wait_for_dom_quiet(driver, timeout: float = 5, quiet_ms: int = 250) -> bool:
+    """Wait until a MutationObserver has seen no DOM changes for quiet_ms"""
+    return _wait(driver, timeout, lambda d: d.execute_script(DOM_QUIET_PROBE_JS, quiet_ms), "DOM quiescence")
+
+
+def wait_for_value(driver, element: WebElement, expected: str, timeout: float = 3) -> bool:
+    """Wait until an input/select's DOM value equals the expected value"""
+    return _wait(
+        driver, timeout,
+        lambda d: d.execute_script(VALUE_PROBE_JS, element, expected),
+        f"value '{expected}' to commit",
+    )
+
+
+def wait_for_ui_settled(driver, timeout: float = 3) -> bool:
+    """After an interaction: wait for triggered requests and re-renders to finish"""
+    deadline = time.monotonic() + timeout
+    network = wait_for_network_idle(driver, timeout=timeout, idle_ms=200)
+    remaining = max(0.1, deadline - time.monotonic())
+    return wait_for_dom_quiet(driver, timeout=remaining, quiet_ms=150) and network
+
+
+def wait_for_page_settled(driver, timeout: float = 10) -> bool:
+    """After navigation: readyState complete, network idle, then DOM quiescence"""
+    deadline = time.monotonic() + timeout
+    ready = wait_for_ready_state(driver, timeout=timeout)
+    network = wait_for_network_idle(driver, timeout=max(0.1, deadline - time.monotonic()))
+    quiet = wait_for_dom_quiet(driver, timeout=max(0.1, deadline - time.monotonic()))
+    return ready and network and quiet
+
+
+def type_into(
+    driver,
+    element: WebElement,
+    value: str,
+    human: Optional[bool] = None,
+    char_delay: Optional[float] = None,
+    timeout: float = 3,
+) -> bool:
+    """
+    Replace an input's text and wait for the value to commit.
+    human=True types one character at a time (presentation mode);
+    None falls back to the RPA_HUMAN_TYPING setting.
+    """
+    settings = get_settings()
+    if human is None:
+        human = settings.RPA_HUMAN_TYPING
+    element.clear()
+    if human:
+        delay = settings.RPA_HUMAN_TYPING_DELAY if char_delay is None else char_delay
+        for char in value:
+            element.send_keys(char)
+            time.sleep(delay)
+    else:
+        element.send_keys(value)
+    return wait_for_value(driver, element, value, timeout=timeout)
+
+
+def type_into_steps(
+    driver,
+    element: WebElement,
+    value: str,
+    human: Optional[bool] = None,
+    char_delay: Optional[float] = None,
+    timeout: float = 3,
+) -> Steps:
+    """type_into as a step generator: keystroke delays and the commit wait are yielded"""
+    settings = get_settings()
+    if human is None:
+        human = settings.RPA_HUMAN_TYPING
+    element.clear()
+    if human:
+        delay = settings.RPA_HUMAN_TYPING_DELAY if char_delay is None else char_delay
+        for char in value:
+            element.send_keys(char)
+            yield pause(delay)
+    else:
+        element.send_keys(value)
+    committed = yield WaitFor(lambda d: d.execute_script(VALUE_PROBE_JS, element, value), timeout=timeout,
+                              what=f"value '{value}' to commit")
+    return bool(committed)
@@ -0,0 +1,142 @@
+"""
+Direct Form Service
+Submits name change forms of direct_form portals (and every demo-govt
+portal) over HTTP with the HTTP form engine. Chrome is only launched when
+the engine reports that the page needs a browser.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+from selenium.webdriver.common.by import By
+
+from app.config import get_settings
+from app.services.browser_executor import get_browser_executor
+from app.services.browser_mode import resolve_headless
+from app.services.browser_waits import wait_for_page_settled
+from app.services.driver_pool import get_driver_pool
+from app.services.http_form_engine import BrowserRequired, HttpFormEngine, find_confirmation_number
+from app.services.js_form_filler import fill_form_fields
+from app.services.resource_blocker import block_resources, resource_report
+
+logger = logging.getLogger(__name__)
+
+# Unified portal data key -> field spec (js_form_filler format, shared by both engines)
+DIRECT_FORM_FIELDS = {
+    'city': {'selectors': ['select[name*="city"]', 'input[name*="city"]'], 'labels': ['city']},
+    'district': {'selectors': ['select[name*="district"]', 'input[name*="district"]'], 'labels': ['district']},
+    'zone': {'selectors': ['select[name*="zone"]', 'select[name*="ward"]'], 'labels': ['zone']},
+    'service_number': {'selectors': ['input[name*="serviceNumber"]', 'input[name*="service_no"]', 'input[name*="service"]'], 'labels': ['service number']},
+    't_number': {'selectors': ['input[name="tNo"]', 'input[name*="t_no"]', 'input[name*="tno"]'], 'labels': ['t no', 't number']},
+    'consumer_number': {'selectors': ['input[name*="consumer"]'], 'labels': ['consumer number', 'consumer no']},
+    'bp_number': {'selectors': ['input[name*="bpNumber"]', 'input[name*="bp_no"]'], 'labels': ['bp number']},
+    'connection_number': {'selectors': ['input[name="connectionNumber"]', 'input[name*="connection_no"]'], 'labels': ['connection number']},
+    'connection_id': {'selectors': ['input[name="connectionId"]', 'input[name*="connection_id"]'], 'labels': ['connection id']},
+    'survey_number': {'selectors': ['input[name*="survey"]'], 'labels': ['survey number', 'survey no']},
+    'property_id': {'selectors': ['input[name*="propertyId"]', 'input[name*="property_id"]'], 'labels': ['property id']},
+    'applicant_name': {'selectors': ['input[name*="applicant"]', 'input[name*="new_name"]'], 'labels': ['applicant name', 'new name']},
+    'mobile': {'selectors': ['input[name*="mobile"]', 'input[type="tel"]'], 'labels': ['mobile', 'phone']},
+    'email': {'selectors': ['input[name*="email"]', 'input[type="email"]'], 'labels': ['email']},
+    'address': {'selectors': ['input[name*="address"]', 'textarea[name*="address"]'], 'labels': ['address']},
+    'taluka': {'selectors': ['input[name*="taluka"]'], 'labels': ['taluka']},
+    'village': {'selectors': ['input[name*="village"]'], 'labels': ['village']},
+    'ward': {'selectors': ['input[name*="ward"]'], 'labels': ['ward']},
+}
+
+# Other names the same value arrives under (mirrors the demo portal's own fallbacks)
+DATA_ALIASES = {
+    'district': ['city'],
+    't_number': ['t_no'],
+    'consumer_number': ['consumer_no'],
+    'connection_id': ['connection_number'],
+    'applicant_name': ['new_name', 'full_name', 'name'],
+}
+
+
+def build_field_specs(user_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Attach values from user_data to DIRECT_FORM_FIELDS"""
+    specs = {}
+    for key, spec in DIRECT_FORM_FIELDS.items():
+        value = user_data.get(key)
+        for alias in DATA_ALIASES.get(key, []):
+            value = value or user_data.get(alias)
+        if value:
+            specs[key] = {**spec, 'value': str(value)}
+    return specs
+
+
+def resolve_form_url(supplier: Dict[str, Any], service_type: str = "name_change") -> str:
+    """Demo portal in DEMO mode; the supplier's own form otherwise (never a blocked URL outside PRODUCTION)"""
+    settings = get_settings()
+    mode = (settings.RPA_MODE or "DEMO").upper()
+    if mode == "DEMO":
+        return f"{settings.DEMO_BASE_URL.rstrip('/')}/{supplier['id']}"
+    url = supplier.get(f"{service_type}_url") or supplier.get("portal_url")
+    if not url:
+        raise ValueError(f"No {service_type} form URL for {supplier.get('id')}")
+    if mode != "PRODUCTION" and any(url.startswith(blocked) for blocked in settings.BLOCKED_URLS):
+        raise PermissionError(f"{url} is blocked in {mode} mode")
+    return url
+
+
+def submit_with_browser(
+    url: str, fields: Dict[str, Dict[str, Any]], headless: Optional[bool] = None, portal: Optional[str] = None
+) -> Dict[str, Any]:
+    """Browser fallback: fill the same specs with the JS filler and click submit"""
+    if headless is None:
+        headless = resolve_headless()
+    pool = get_driver_pool()
+    driver = pool.acquire(headless=headless)
+    try:
+        blocker = block_resources(driver, portal, visible=not headless)
+        driver.get(url)
+        wait_for_page_settled(driver)
+        report = fill_form_fields(driver, fields, highlight=False)
+        buttons = driver.find_elements(By.CSS_SELECTOR, "form button[type='submit'], form input[type='submit'], form button:not([type])")
+        if buttons:
+            buttons[0].click()
+        else:
+            driver.execute_script("document.querySelector('form').submit()")
+        wait_for_page_settled(driver)
+        filled = sum(1 for entry in report.values() if entry.get("filled"))
+        return {
+            "success": True,
+            "engine": "browser",
+            "submitted": True,
+            "form_url": url,
+            "response_url": driver.current_url,
+            "fields": report,
+            "fields_filled": filled,
+            "total_fields": len(fields),
+            "confirmation_number": find_confirmation_number(driver.page_source),
+            "resources": resource_report(blocker),
+        }
+    finally:
+        pool.release(driver)
+
+
+async def submit_direct_form(
+    url: str,
+    fields: Dict[str, Dict[str, Any]],
+    browser_fallback: bool = True,
+    dry_run: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+    portal: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Submit over HTTP; use a pooled browser only if the page needs one"""
+    try:
+        async with HttpFormEngine(client=client) as engine:
+            return await engine.submit(url, fields, dry_run=dry_run)
+    except BrowserRequired as e:
+        reason = str(e)
+    except httpx.HTTPError as e:
+        logger.warning(f"⚠️ Direct form fetch failed for {url}: {e}")
+        return {"success": False, "engine": "http", "form_url": url, "error": str(e)}
+
+    if not browser_fallback or dry_run:
+        return {"success": False, "engine": "http", "form_url": url, "browser_required": True, "error": reason}
+    logger.info(f"🌐 {url} needs a browser ({reason}), falling back to Selenium")
+    result = await get_browser_executor().run(submit_with_browser, url, fields, portal=portal)
+    result["fallback_reason"] = reason
+    return result
@@ -0,0 +1,450 @@
+"""
+Chrome WebDriver Pool
+Keeps warm Chrome browsers ready so RPA jobs skip cold browser startup.
+Browsers are health-checked on lease, reset between leases and recycled
+after too many uses or when their memory grows past the configured limit.
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from app.config import get_settings
+from app.services.browser_mode import ensure_display
+
+logger = logging.getLogger(__name__)
+
+# Flags shared by every pooled browser (visible or headless)
+CHROME_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--window-size=1920,1080",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-notifications",
+    "--disable-popup-blocking",
+    "--disable-translate",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+]
+
+# Usual install locations per platform (CHROME_BINARY overrides)
+CHROME_BINARY_CANDIDATES = {
+    "win32": [
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    ],
+    "darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+    "linux": [
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium-browser",
+        "/usr/bin/chromium",
+    ],
+}
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no browser becomes free within the acquire timeout"""
+
+
+class PooledDriver:
+    """Bookkeeping for one pooled Chrome instance"""
+
+    def __init__(self, driver: webdriver.Chrome, headless: bool):
+        self.driver = driver
+        self.headless = headless
+        self.uses = 0
+        self.created_at = time.time()
+
+
+def find_chrome_binary() -> Optional[str]:
+    """Locate a Chrome binary, or None to let Selenium decide"""
+    configured = get_settings().CHROME_BINARY
+    if configured:
+        return configured
+    platform = "linux" if sys.platform.startswith("linux") else sys.platform
+    candidates = CHROME_BINARY_CANDIDATES.get(platform, [])
+    for path in candidates + [shutil.which("google-chrome") or "", shutil.which("chromium") or "", shutil.which("chrome") or ""]:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def build_chrome_options(headless: bool) -> Options:
+    """Chrome options used for every pooled browser"""
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    else:
+        ensure_display()
+        options.add_argument("--start-maximized")
+    for arg in CHROME_ARGS:
+        options.add_argument(arg)
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    if get_settings().RESOURCE_BLOCKING_ENABLED:
+        # Network events feed the per-job resource report
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    binary = find_chrome_binary()
+    if binary:
+        options.binary_location = binary
+    return options
+
+
+def _chrome_service() -> Optional[Service]:
+    """ChromeDriver service: system driver first, then the fast cached driver"""
+    if os.path.exists("/usr/bin/chromedriver"):
+        return Service("/usr/bin/chromedriver")
+    try:
+        from fast_driver import get_fast_chrome_service
+        return get_fast_chrome_service()
+    except Exception as e:
+        logger.warning(f"⚠️ Fast ChromeDriver lookup failed: {e}")
+        return None
+
+
+def launch_chrome(options: Options) -> webdriver.Chrome:
+    """Start a new Chrome process (falls back to Selenium Manager)"""
+    service = _chrome_service()
+    if service is not None:
+        try:
+            return webdriver.Chrome(service=service, options=options)
+        except Exception as e:
+            logger.warning(f"⚠️ Chrome failed with cached driver, retrying via Selenium Manager: {e}")
+    return webdriver.Chrome(options=options)
+
+
+def _process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """Resident memory of a process and all its children (Linux /proc only)"""
+    if not os.path.isdir("/proc"):
+        return None
+
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pages = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                pages += int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            pass
+        stack.extend(children.get(pid, []))
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _quit(driver: webdriver.Chrome):
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing browser: {e}")
+
+
+class ChromeDriverPool:
+    """Process-wide pool of pre-launched Chrome WebDrivers"""
+
+    def __init__(self, min_size: int = 1, max_size: int = 4, max_uses: int = 50,
+                 max_memory_mb: int = 1024, acquire_timeout: int = 60):
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle: Dict[bool, List[PooledDriver]] = {True: [], False: []}
+        self._in_use: Dict[int, PooledDriver] = {}
+        self._total = 0  # idle + in use + launching
+        self._closed = False
+        self._stats = {"launched": 0, "reused": 0, "recycled": 0, "unhealthy": 0, "detached": 0}
+
+    # ---- leasing -------------------------------------------------------
+
+    def acquire(self, headless: bool = True, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """Lease a browser; launches a new one only if no warm one is free"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+
+        while True:
+            pooled, evicted, launch = None, None, False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolExhaustedError("Driver pool is shut down")
+                    if self._idle[headless]:
+                        pooled = self._idle[headless].pop()
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1  # reserve the slot before launching
+                        launch = True
+                        break
+                    if self._idle[not headless]:
+                        # Trade an idle browser of the other mode for a new one
+                        evicted = self._idle[not headless].pop(0)
+                        launch = True
+                        break
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"No browser available after {timeout}s (max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if evicted is not None:
+                _quit(evicted.driver)
+
+            if launch:
+                try:
+                    pooled = self._launch(headless)
+                except Exception:
+                    self._forget_slot()
+                    raise
+            elif not self._is_healthy(pooled):
+                logger.warning("⚠️ Pooled browser failed health check, replacing it")
+                self._stats["unhealthy"] += 1
+                self._dispose(pooled)
+                continue
+            else:
+                self._stats["reused"] += 1
+
+            pooled.uses += 1
+            with self._cond:
+                self._in_use[id(pooled.driver)] = pooled
+            return pooled.driver
+
+    def release(self, driver: Optional[webdriver.Chrome], discard: bool = False):
+        """Return a leased browser; it is reset and reused unless due for recycling"""
+        if driver is None:
+            return
+        with self._cond:
+            pooled = self._in_use.pop(id(driver), None)
+            already_idle = pooled is None and any(
+                p.driver is driver for p in self._idle[True] + self._idle[False]
+            )
+        if already_idle:
+            logger.warning("⚠️ Browser released twice, ignoring")
+            return
+        if pooled is None:
+            # Not leased from this pool (or already detached) - just close it
+            _quit(driver)
+            return
+
+        if discard or self._closed or self._should_recycle(pooled) or not self._reset_state(pooled):
+            self._stats["recycled"] += 1
+            self._dispose(pooled)
+            self._replenish_async()
+            return
+
+        with self._cond:
+            self._idle[pooled.headless].append(pooled)
+            self._cond.notify()
+
+    def detach(self, driver: Optional[webdriver.Chrome]):
+        """Hand a leased browser over to the user; the pool forgets about it"""
+        if driver is None:
+            return
+        with self._cond:
+            pooled = self._in_use.pop(id(driver), None)
+        if pooled is not None:
+            self._stats["detached"] += 1
+            self._forget_slot()
+            self._replenish_async()
+
+    @contextmanager
+    def lease(self, headless: bool = True):
+        """Context manager around acquire/release"""
+        driver = self.acquire(headless=headless)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    # ---- lifecycle -----------------------------------------------------
+
+    def prewarm(self, headless: bool = True) -> int:
+        """Launch browsers until min_size warm ones are idle"""
+        launched = 0
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle[headless]) >= self.min_size or self._total >= self.max_size:
+                    break
+                self._total += 1
+            try:
+                pooled = self._launch(headless)
+            except Exception as e:
+                self._forget_slot()
+                logger.warning(f"⚠️ Pre-warm failed (not critical): {e}")
+                break
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._idle[headless].append(pooled)
+                    self._cond.notify()
+            if closed:
+                self._dispose(pooled)
+                break
+            launched += 1
+        if launched:
+            logger.info(f"🔥 Pre-warmed {launched} Chrome browser(s)")
+        return launched
+
+    def shutdown(self):
+        """Quit every idle browser and refuse new leases"""
+        with self._cond:
+            self._closed = True
+            idle = self._idle[True] + self._idle[False]
+            self._idle = {True: [], False: []}
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            _quit(pooled.driver)
+        logger.info(f"🔒 Driver pool shut down ({len(idle)} idle browser(s) closed)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "total": self._total,
+                "in_use": len(self._in_use),
+                "idle_headless": len(self._idle[True]),
+                "idle_visible": len(self._idle[False]),
+                **self._stats,
+            }
+
+    # ---- internals -----------------------------------------------------
+
+    def _launch(self, headless: bool) -> PooledDriver:
+        start_time = time.time()
+        driver = launch_chrome(build_chrome_options(headless))
+        self._stats["launched"] += 1
+        logger.info(f"✅ Chrome launched for pool in {time.time() - start_time:.2f} seconds (headless={headless})")
+        return PooledDriver(driver, headless)
+
+    def _dispose(self, pooled: PooledDriver):
+        _quit(pooled.driver)
+        self._forget_slot()
+
+    def _forget_slot(self):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def _replenish_async(self):
+        if self.min_size and not self._closed:
+            threading.Thread(target=self.prewarm, daemon=True).start()
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return len(pooled.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _should_recycle(self, pooled: PooledDriver) -> bool:
+        if self.max_uses and pooled.uses >= self.max_uses:
+            logger.info(f"♻️ Recycling browser after {pooled.uses} uses")
+            return True
+        if self.max_memory_mb:
+            try:
+                rss_mb = _process_tree_rss_mb(pooled.driver.service.process.pid)
+            except Exception:
+                rss_mb = None
+            if rss_mb is not None and rss_mb > self.max_memory_mb:
+                logger.info(f"♻️ Recycling browser using {rss_mb:.0f} MB")
+                return True
+        return False
+
+    def _reset_state(self, pooled: PooledDriver) -> bool:
+        """Wipe cookies, storage and extra tabs so the next lease starts clean"""
+        driver = pooled.driver
+        try:
+            try:
+                driver.switch_to.alert.dismiss()
+            except Exception:
+                pass
+
+            # Collect every origin the lease visited before the tabs go away
+            origins = set()
+            old_handles = driver.window_handles
+            for handle in old_handles:
+                driver.switch_to.window(handle)
+                history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+                for entry in history.get("entries", []):
+                    url = entry.get("url", "")
+                    if url.startswith("http"):
+                        origins.add("/".join(url.split("/", 3)[:3]))
+
+            # A fresh tab also drops sessionStorage and back/forward history
+            driver.switch_to.new_window("tab")
+            fresh_handle = driver.current_window_handle
+            for handle in old_handles:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(fresh_handle)
+
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in origins:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+
+            driver.implicitly_wait(0)
+            driver.set_page_load_timeout(300)
+            driver.set_script_timeout(30)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Browser reset failed, discarding it: {e}")
+            return False
+
+
+# Singleton instance
+_driver_pool: Optional[ChromeDriverPool] = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> ChromeDriverPool:
+    """Get or create the process-wide driver pool"""
+    global _driver_pool
+    if _driver_pool is None:
+        with _driver_pool_lock:
+            if _driver_pool is None:
+                settings = get_settings()
+                _driver_pool = ChromeDriverPool(
+                    min_size=settings.DRIVER_POOL_MIN_SIZE,
+                    max_size=settings.DRIVER_POOL_MAX_SIZE,
+                    max_uses=settings.DRIVER_POOL_MAX_USES,
+                    max_memory_mb=settings.DRIVER_POOL_MAX_MEMORY_MB,
+                    acquire_timeout=settings.DRIVER_POOL_ACQUIRE_TIMEOUT,
+                )
+    return _driver_pool
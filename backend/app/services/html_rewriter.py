@@ -0,0 +1,83 @@
+"""
+Streaming HTML Rewriter
+Rewrites proxied pages chunk by chunk as they arrive, instead of buffering
+the whole document and running re.sub over it:
+
+- <meta http-equiv="X-Frame-Options"> tags are dropped
+- src / href / action attributes are rebased onto the page URL with urljoin
+  (a <base href> is honoured)
+- a snippet (the automation <script>) is injected before </body>
+
+Only an unfinished tag at the end of a chunk is held back for the next one
+(at most MAX_CARRY characters), so memory stays constant whatever the page size.
+"""
+
+import re
+from urllib.parse import urljoin
+
+MAX_CARRY = 64 * 1024  # an "unfinished tag" longer than this is a stray '<', passed through as-is
+
+TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)([^>]*)>")
+URL_ATTRIBUTE = re.compile(r"""(\s(?:src|href|action)\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+FRAME_OPTIONS = re.compile(r"""http-equiv\s*=\s*["']?X-Frame-Options""", re.IGNORECASE)
+# Left alone: fragments and URLs that don't point at the upstream
+UNREBASED = ("#", "javascript:", "data:", "mailto:", "tel:", "about:", "blob:")
+
+
+class StreamingHtmlRewriter:
+    """feed() each decoded chunk and send what it returns; close() returns the rest"""
+
+    def __init__(self, base_url: str, inject: str = ""):
+        self.base_url = base_url
+        self.inject = inject
+        self.injected = False
+        self._carry = ""
+
+    def rebase(self, url: str) -> str:
+        value = url.strip()
+        if not value or value.lower().startswith(UNREBASED):
+            return url
+        return urljoin(self.base_url, value)
+
+    def _attribute(self, match: re.Match) -> str:
+        prefix, double, single, bare = match.groups()
+        if double is not None:
+            return f'{prefix}"{self.rebase(double)}"'
+        if single is not None:
+            return f"{prefix}'{self.rebase(single)}'"
+        return prefix + self.rebase(bare)
+
+    def _tag(self, match: re.Match) -> str:
+        closing, name, attributes = match.groups()
+        lowered = name.lower()
+        if closing:
+            if lowered == "body" and self.inject and not self.injected:
+                self.injected = True
+                return self.inject + match.group(0)
+            return match.group(0)
+        if lowered == "meta" and FRAME_OPTIONS.search(attributes):
+            return ""
+        rewritten = f"<{name}{URL_ATTRIBUTE.sub(self._attribute, attributes)}>"
+        if lowered == "base":
+            # Later relative URLs resolve against the (now absolute) base href
+            href = re.search(r"""\shref\s*=\s*["']?([^"'\s>]+)""", rewritten, re.IGNORECASE)
+            if href:
+                self.base_url = href.group(1)
+        return rewritten
+
+    def feed(self, chunk: str) -> str:
+        text = self._carry + chunk
+        cut = text.rfind("<")
+        if cut != -1 and text.find(">", cut) == -1 and len(text) - cut <= MAX_CARRY:
+            text, self._carry = text[:cut], text[cut:]
+        else:
+            self._carry = ""
+        return TAG.sub(self._tag, text)
+
+    def close(self) -> str:
+        text, self._carry = self._carry, ""
+        return TAG.sub(self._tag, text)
+
+    def rewrite(self, html_content: str) -> str:
+        """Whole-document convenience"""
+        return self.feed(html_content) + self.close()
@@ -0,0 +1,268 @@
+"""
+Shared HTTP Clients
+Outbound calls (the iframe proxy, the WhatsApp Cloud API) used to open a new
+httpx.AsyncClient per request: a fresh TCP + TLS handshake every time and no
+keep-alive. Each caller now borrows a named, application-scoped client,
+created on startup and closed on shutdown:
+
+- connection pool with keep-alive, an overall cap and a per-host cap on
+  concurrent requests (httpx itself only limits per client)
+- HTTP/2 when the h2 package is installed (HTTP_CLIENT_HTTP2)
+- retries with full-jitter exponential backoff; Retry-After is honoured
+- counters for requests, retries, TCP connects and TLS handshakes, plus pool
+  utilisation, at /health/http-clients
+"""
+
+import asyncio
+import random
+import logging
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+MAX_RETRY_AFTER = 10.0  # never sleep longer than this on a server's Retry-After
+
+# name -> overrides of the HTTP_CLIENT_* defaults
+CLIENT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "proxy": {},
+    "whatsapp": {"timeout": 15.0},
+}
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class MeteredTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts connection set-up through httpcore's trace hook"""
+
+    def __init__(self, stats: Dict[str, int], **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def _trace(self, event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            self.stats["tcp_connects"] += 1
+        elif event == "connection.start_tls.complete":
+            self.stats["tls_handshakes"] += 1
+        elif event.endswith(".failed") and event.startswith("connection."):
+            self.stats["connect_failures"] += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return await super().handle_async_request(request)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        connections = list(self._pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        http2 = sum(1 for connection in connections if "HTTP/2" in repr(connection))
+        return {"connections": len(connections), "active": len(connections) - idle, "idle": idle, "http2": http2}
+
+
+class PooledHttpClient:
+    """One named httpx.AsyncClient with per-host limits, retries and metrics"""
+
+    def __init__(self, name: str, max_connections: int = 100, max_keepalive: int = 20,
+                 keepalive_expiry: float = 60.0, max_per_host: int = 10, connect_timeout: float = 5.0,
+                 timeout: float = 30.0, http2: bool = True, retries: int = 2, retry_backoff: float = 0.3):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_per_host = max(1, max_per_host)
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff
+        self.http2 = http2 and http2_available()
+        if http2 and not self.http2:
+            logger.info(f"ℹ️ HTTP/2 unavailable for '{name}' client (pip install h2), using HTTP/1.1")
+
+        self._stats = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0, "queued_for_host": 0,
+                       "tcp_connects": 0, "tls_handshakes": 0, "connect_failures": 0}
+        self.transport = MeteredTransport(
+            self._stats,
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=keepalive_expiry),
+            retries=0,  # retried here, with backoff
+        )
+        self.client = httpx.AsyncClient(
+            transport=self.transport,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+        # host -> [semaphore, requests holding or waiting for it]; dropped when idle,
+        # so arbitrary proxied hosts don't accumulate
+        self._host_slots: Dict[str, list] = {}
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one of the host's max_per_host request slots"""
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = [asyncio.Semaphore(self.max_per_host), 0]
+        semaphore = slot[0]
+        slot[1] += 1
+        try:
+            if semaphore.locked():
+                self._stats["queued_for_host"] += 1
+            async with semaphore:
+                yield
+        finally:
+            slot[1] -= 1
+            if not slot[1] and self._host_slots.get(host) is slot:
+                del self._host_slots[host]
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+        # Full jitter: anywhere between 0 and the exponential cap, so retries spread out
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _retryable(self, method: str, error: Optional[Exception], response: Optional[httpx.Response]) -> bool:
+        if error is not None:
+            # A request that never reached the server is always safe to repeat
+            return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)) or (
+                method in IDEMPOTENT_METHODS and isinstance(error, httpx.TransportError)
+            )
+        if response.status_code == 429:
+            return True  # rejected before processing
+        return method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUSES
+
+    async def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """client.request with the per-host cap and retry policy applied (response fully read)"""
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        host = httpx.URL(url).host
+        attempt = 0
+        while True:
+            response = error = None
+            async with self._host_slot(host):
+                self._stats["requests"] += 1
+                self._stats["in_flight"] += 1
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    error = e
+                finally:
+                    self._stats["in_flight"] -= 1
+            if attempt >= retries or not self._retryable(method, error, response):
+                if error is not None:
+                    self._stats["errors"] += 1
+                    raise error
+                return response
+            delay = self._delay(attempt, response)
+            attempt += 1
+            self._stats["retries"] += 1
+            logger.info(f"🔁 {self.name}: retrying {method} {url} in {delay:.2f}s "
+                        f"({error or response.status_code}, attempt {attempt}/{retries})")
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+        """client.stream with the same cap and retry policy; retries only happen before the body is read"""
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        host = httpx.URL(url).host
+        attempt = 0
+        while True:
+            response = error = None
+            async with self._host_slot(host):  # held until the body has been consumed
+                self._stats["requests"] += 1
+                self._stats["in_flight"] += 1
+                try:
+                    try:
+                        response = await self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+                    except httpx.TransportError as e:
+                        error = e
+                    if attempt >= retries or not self._retryable(method, error, response):
+                        if error is not None:
+                            self._stats["errors"] += 1
+                            raise error
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    if response is not None:
+                        await response.aclose()
+                finally:
+                    self._stats["in_flight"] -= 1
+            delay = self._delay(attempt, response)
+            attempt += 1
+            self._stats["retries"] += 1
+            logger.info(f"🔁 {self.name}: retrying {method} {url} in {delay:.2f}s "
+                        f"({error or response.status_code}, attempt {attempt}/{retries})")
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._stats["requests"]
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_per_host": self.max_per_host,
+            **self._stats,
+            "active_hosts": len(self._host_slots),
+            "pool": self.transport.pool_stats(),
+            # How often a request got a kept-alive connection instead of a new one
+            "connection_reuse": round(1 - self._stats["tcp_connects"] / requests, 3) if requests else None,
+        }
+
+
+_clients: Dict[str, PooledHttpClient] = {}
+
+
+def create_http_client(name: str) -> PooledHttpClient:
+    settings = get_settings()
+    options = {
+        "max_connections": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        "max_keepalive": settings.HTTP_CLIENT_KEEPALIVE,
+        "keepalive_expiry": settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        "max_per_host": settings.HTTP_CLIENT_MAX_PER_HOST,
+        "connect_timeout": settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+        "timeout": settings.HTTP_CLIENT_TIMEOUT,
+        "http2": settings.HTTP_CLIENT_HTTP2,
+        "retries": settings.HTTP_CLIENT_RETRIES,
+        "retry_backoff": settings.HTTP_CLIENT_RETRY_BACKOFF,
+        **CLIENT_PROFILES.get(name, {}),
+    }
+    return PooledHttpClient(name, **options)
+
+
+def get_http_client(name: str) -> PooledHttpClient:
+    """Application-scoped client for a caller (created on startup, or on first use)"""
+    client = _clients.get(name)
+    if client is None:
+        client = _clients[name] = create_http_client(name)
+    return client
+
+
+def start_http_clients():
+    for name in CLIENT_PROFILES:
+        get_http_client(name)
+    logger.info(f"🌐 HTTP clients ready: {', '.join(_clients)}")
+
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def http_client_stats() -> Dict[str, Any]:
+    return {name: client.stats() for name, client in _clients.items()}
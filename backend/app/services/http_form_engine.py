@@ -0,0 +1,464 @@
+"""
+HTTP Form Engine
+Fills and submits plain HTML forms with httpx instead of Chrome: fetch the
+page, parse the form (hidden inputs and CSRF tokens included), fill it from
+the same field specs the Selenium fillers use and POST it back with the
+session's cookies. A job costs a few KB and milliseconds instead of a
+browser.
+
+Field specs are the js_form_filler format ("selectors", "labels",
+"fallback_index", "value"). Selectors are matched with a small CSS subset:
+tag, #id, [attr], [attr=v], [attr*=v], [attr^=v], [attr$=v], :first-of-type
+and :nth-of-type(n), comma lists; anything else never matches here.
+
+Pages that need a browser (no form in the served HTML, captcha, script-only
+submit) raise BrowserRequired so the caller can fall back to Selenium.
+"""
+
+import re
+import time
+import logging
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from app.services.driver_pool import CHROME_ARGS
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = next(
+    (arg.split("=", 1)[1] for arg in CHROME_ARGS if arg.startswith("--user-agent=")),
+    "Mozilla/5.0",
+)
+
+CAPTCHA_MARKERS = ("captcha", "g-recaptcha", "h-captcha", "cf-turnstile")
+CSRF_META_NAMES = ("csrf-token", "csrf_token", "_csrf", "xsrf-token")
+
+CONFIRMATION_RE = re.compile(
+    r"(?:confirmation|reference|application|request|acknowledg(?:e)?ment)\s*(?:number|no\.?|id)\s*[:#-]?\s*([A-Z0-9][A-Z0-9/-]{5,})",
+    re.IGNORECASE,
+)
+
+
+class BrowserRequired(Exception):
+    """The page can't be filled without a real browser"""
+
+
+class FormControl:
+    """One input/select/textarea as the server sent it"""
+
+    def __init__(self, tag: str, attrs: Dict[str, str], index: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.index = index  # position among controls of the same tag (for :nth-of-type)
+        self.name = attrs.get("name")
+        self.type = (attrs.get("type") or ("text" if tag == "input" else tag)).lower()
+        self.value = attrs.get("value", "")
+        self.checked = "checked" in attrs
+        self.disabled = "disabled" in attrs
+        self.required = "required" in attrs
+        self.label = ""
+        self.options: List[Tuple[str, str, bool]] = []  # (value, text, selected)
+
+    def matches_labels(self, labels: List[str]) -> bool:
+        texts = [self.label, self.attrs.get("placeholder", ""), self.attrs.get("aria-label", "")]
+        return any(label.lower() in text.lower() for label in labels for text in texts if text)
+
+
+class HtmlForm:
+    def __init__(self, attrs: Dict[str, str]):
+        self.attrs = attrs
+        self.id = attrs.get("id")
+        self.action = attrs.get("action", "")
+        self.method = (attrs.get("method") or "get").lower()
+        self.enctype = (attrs.get("enctype") or "application/x-www-form-urlencoded").lower()
+        self.controls: List[FormControl] = []
+        self.submit_buttons: List[Dict[str, str]] = []
+
+    @property
+    def fillable(self) -> List[FormControl]:
+        return [c for c in self.controls if c.type not in ("hidden", "submit", "button", "image", "reset")]
+
+
+class FormParser(HTMLParser):
+    """Collects forms, their controls, labels and page-level CSRF/captcha hints"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: List[HtmlForm] = []
+        self.csrf_meta: Dict[str, str] = {}
+        self.has_captcha = False
+        self._form: Optional[HtmlForm] = None
+        self._labels_for: Dict[str, str] = {}
+        self._label_text: Optional[List[str]] = None
+        self._label_for: Optional[str] = None
+        self._label_wraps = False
+        self._pending_label = ""
+        self._select: Optional[FormControl] = None
+        self._option: Optional[Dict[str, Any]] = None
+        self._textarea: Optional[FormControl] = None
+        self._tag_counts: Dict[str, int] = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v if v is not None else "") for k, v in attrs}
+        marker = " ".join([attrs.get("class", ""), attrs.get("id", ""), attrs.get("name", "")]).lower()
+        if any(m in marker for m in CAPTCHA_MARKERS) or (tag == "script" and "recaptcha" in attrs.get("src", "")):
+            self.has_captcha = True
+
+        if tag == "meta" and attrs.get("name", "").lower() in CSRF_META_NAMES:
+            self.csrf_meta[attrs["name"]] = attrs.get("content", "")
+        elif tag == "form":
+            self._form = HtmlForm(attrs)
+            self.forms.append(self._form)
+            self._tag_counts = {}
+        elif tag == "label":
+            self._label_text = []
+            self._label_for = attrs.get("for")
+            self._label_wraps = False
+        elif tag in ("input", "select", "textarea") and self._form is not None:
+            index = self._tag_counts.get(tag, 0)
+            self._tag_counts[tag] = index + 1
+            control = FormControl(tag, attrs, index)
+            # A label wrapping the control, else the label just before it
+            if self._label_text is not None:
+                control.label = " ".join("".join(self._label_text).split())
+                self._label_wraps = True
+            else:
+                control.label = self._pending_label
+            self._pending_label = ""
+            if control.type in ("submit", "image"):
+                self._form.submit_buttons.append(attrs)
+            self._form.controls.append(control)
+            if tag == "select":
+                self._select = control
+            elif tag == "textarea":
+                self._textarea = control
+                control.value = ""
+        elif tag == "button" and self._form is not None:
+            if (attrs.get("type") or "submit").lower() == "submit":
+                self._form.submit_buttons.append(attrs)
+        elif tag == "option" and self._select is not None:
+            self._option = {"value": attrs.get("value"), "text": [], "selected": "selected" in attrs}
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+        elif tag == "label" and self._label_text is not None:
+            text = " ".join("".join(self._label_text).split())
+            if self._label_for:
+                self._labels_for[self._label_for] = text
+            elif not self._label_wraps:
+                self._pending_label = text
+            self._label_text = None
+            self._label_for = None
+        elif tag == "option" and self._option is not None:
+            self._close_option()
+        elif tag == "select":
+            if self._option is not None:
+                self._close_option()
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def handle_data(self, data):
+        if self._label_text is not None and self._select is None and self._textarea is None:
+            self._label_text.append(data)
+        if self._option is not None:
+            self._option["text"].append(data)
+        if self._textarea is not None:
+            self._textarea.value += data
+
+    def _close_option(self):
+        text = " ".join("".join(self._option["text"]).split())
+        value = self._option["value"] if self._option["value"] is not None else text
+        self._select.options.append((value, text, self._option["selected"]))
+        self._option = None
+
+
+# ---- CSS subset ----------------------------------------------------------
+
+_SIMPLE_SELECTOR_RE = re.compile(
+    r"""^(?P<tag>[a-zA-Z][a-zA-Z0-9]*|\*)?
+        (?P<id>\#[\w-]+)?
+        (?P<attrs>(?:\[\s*[\w-]+\s*(?:[*^$]?=\s*(?:"[^"]*"|'[^']*'|[^\]\s]+))?\s*\])*)
+        (?P<pseudo>:first-of-type|:nth-of-type\(\d+\))?$""",
+    re.VERBOSE,
+)
+_ATTR_RE = re.compile(r"""\[\s*([\w-]+)\s*(?:([*^$]?=)\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]+)))?\s*\]""")
+
+
+def _matches_simple(control: FormControl, selector: str) -> bool:
+    match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+    if not match:
+        return False  # combinators, :contains() etc. need a browser
+    tag = match.group("tag")
+    if tag and tag != "*" and tag.lower() != control.tag:
+        return False
+    if match.group("id") and control.attrs.get("id") != match.group("id")[1:]:
+        return False
+    for name, op, dq, sq, bare in _ATTR_RE.findall(match.group("attrs") or ""):
+        actual = control.attrs.get(name.lower())
+        if actual is None:
+            return False
+        if not op:
+            continue
+        expected = dq or sq or bare
+        if op == "=" and actual != expected:
+            return False
+        if op == "*=" and expected not in actual:
+            return False
+        if op == "^=" and not actual.startswith(expected):
+            return False
+        if op == "$=" and not actual.endswith(expected):
+            return False
+    pseudo = match.group("pseudo")
+    if pseudo == ":first-of-type" and control.index != 0:
+        return False
+    if pseudo and pseudo.startswith(":nth-of-type") and control.index != int(pseudo[13:-1]) - 1:
+        return False
+    return True
+
+
+def matches_selector(control: FormControl, selector: str) -> bool:
+    """True if the control matches any part of a comma-separated selector list"""
+    return any(_matches_simple(control, part) for part in selector.split(","))
+
+
+# ---- filling -------------------------------------------------------------
+
+def parse_forms(html: str) -> FormParser:
+    parser = FormParser()
+    parser.feed(html)
+    parser.close()
+    # <label for=...> may come after its control; it wins over the nearby-label guess
+    for form in parser.forms:
+        for control in form.controls:
+            explicit = parser._labels_for.get(control.attrs.get("id", ""))
+            if explicit:
+                control.label = explicit
+    return parser
+
+
+def _choose_option(control: FormControl, value: str) -> Optional[Tuple[str, str]]:
+    """Same matching as the JS filler: exact text/value first, then contains"""
+    wanted = value.strip().lower()
+    for opt_value, text, _ in control.options:
+        if text.lower() == wanted or opt_value.lower() == wanted:
+            return opt_value, text
+    for opt_value, text, _ in control.options:
+        if opt_value and (wanted in text.lower() or wanted in opt_value.lower()):
+            return opt_value, text
+    return None
+
+
+def _resolve(form: HtmlForm, spec: Dict[str, Any], claimed: set) -> Tuple[Optional[FormControl], Optional[str], Optional[str]]:
+    candidates = [c for c in form.fillable if id(c) not in claimed and not c.disabled]
+    for selector in spec.get("selectors") or []:
+        for control in candidates:
+            if matches_selector(control, selector):
+                return control, "selector", selector
+    labels = spec.get("labels") or []
+    if labels:
+        for control in candidates:
+            if control.matches_labels(labels):
+                return control, "label", None
+    if spec.get("fallback_index") is not None:
+        texts = [c for c in candidates if c.tag == "input" and c.type == "text"]
+        if texts:
+            return texts[min(spec["fallback_index"], len(texts) - 1)], "position", None
+    return None, None, None
+
+
+def fill_form(form: HtmlForm, fields: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """
+    Fill the form in memory. Returns ({control name: value} to submit, report)
+    where report mirrors fill_form_fields: {field: {filled, strategy, selector, name}}.
+    """
+    values: Dict[str, Any] = {}
+    report: Dict[str, Dict[str, Any]] = {}
+    claimed: set = set()
+
+    # Selects first, as the JS filler does (their choice can drive other fields)
+    order = sorted(fields, key=lambda n: not any(s.strip().startswith("select") for s in fields[n].get("selectors") or []))
+    for field_name in order:
+        spec = fields[field_name]
+        value = spec.get("value")
+        if not value:
+            report[field_name] = {"filled": False, "strategy": None, "selector": None, "error": "no value"}
+            continue
+        control, strategy, selector = _resolve(form, spec, claimed)
+        if control is None or not control.name:
+            report[field_name] = {"filled": False, "strategy": None, "selector": None, "error": "not found"}
+            continue
+        claimed.add(id(control))
+        entry = {"filled": True, "strategy": strategy, "selector": selector, "tag": control.tag, "name": control.name}
+        if control.tag == "select":
+            option = _choose_option(control, str(value))
+            if option is None:
+                entry.update(filled=False, error="option not found")
+            else:
+                values[control.name] = option[0]
+                entry["display"] = option[1]
+        elif control.type in ("checkbox", "radio"):
+            values[control.name] = control.value or "on"
+        else:
+            values[control.name] = str(value)
+            entry["display"] = str(value)
+        report[field_name] = entry
+    return values, report
+
+
+def form_payload(form: HtmlForm, values: Dict[str, str]) -> List[Tuple[str, str]]:
+    """What a browser would send: defaults and hidden inputs, overridden by filled values"""
+    payload: List[Tuple[str, str]] = []
+    for control in form.controls:
+        if not control.name or control.disabled or control.type in ("submit", "image", "button", "reset", "file"):
+            continue
+        if control.name in values:
+            if control.type in ("checkbox", "radio") and values[control.name] != (control.value or "on"):
+                continue
+            payload.append((control.name, values[control.name]))
+            continue
+        if control.type in ("checkbox", "radio"):
+            if control.checked:
+                payload.append((control.name, control.value or "on"))
+        elif control.tag == "select":
+            selected = [o for o in control.options if o[2]] or control.options[:1]
+            if selected:
+                payload.append((control.name, selected[0][0]))
+        else:
+            payload.append((control.name, control.value))
+    # The clicked submit button is part of the submission when it has a name
+    for button in form.submit_buttons[:1]:
+        if button.get("name"):
+            payload.append((button["name"], button.get("value", "")))
+    return payload
+
+
+def pick_form(forms: List[HtmlForm], form_id: Optional[str] = None) -> Optional[HtmlForm]:
+    if form_id:
+        return next((f for f in forms if f.id == form_id), None)
+    # The form with the most fillable controls (skips search boxes and login widgets)
+    return max(forms, key=lambda f: len(f.fillable), default=None)
+
+
+def html_to_text(html: str) -> str:
+    text = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", html)
+    return " ".join(re.sub(r"<[^>]+>", " ", text).split())
+
+
+def find_confirmation_number(html: str) -> Optional[str]:
+    match = CONFIRMATION_RE.search(html_to_text(html))
+    return match.group(1) if match else None
+
+
+class HttpFormEngine:
+    """Fetch, fill and submit one form over HTTP with a cookie-keeping client"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, timeout: float = 15.0):
+        self._own_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml,*/*;q=0.8"},
+        )
+
+    async def aclose(self):
+        if self._own_client:
+            await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def submit(
+        self,
+        url: str,
+        fields: Dict[str, Dict[str, Any]],
+        form_id: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fill and submit the form at url. Raises BrowserRequired when the page
+        needs JavaScript; otherwise returns a result dict like the RPA services.
+        """
+        started = time.perf_counter()
+        page = await self.client.get(url)
+        page.raise_for_status()
+        parsed = parse_forms(page.text)
+        form = pick_form(parsed.forms, form_id)
+        if form is None or not form.fillable:
+            raise BrowserRequired("No form in the served HTML (rendered by JavaScript?)")
+        if parsed.has_captcha:
+            raise BrowserRequired("Form is protected by a captcha")
+        if form.action.strip().lower().startswith("javascript:"):
+            raise BrowserRequired("Form is submitted by script")
+
+        values, report = fill_form(form, fields)
+        filled = sum(1 for entry in report.values() if entry.get("filled"))
+        payload = form_payload(form, values)
+        submitted_names = {name for name, value in payload if value}
+        missing = sorted(c.name for c in form.fillable if c.required and c.name and c.name not in submitted_names)
+
+        result: Dict[str, Any] = {
+            "engine": "http",
+            "form_url": str(page.url),
+            "fields": report,
+            "fields_filled": filled,
+            "total_fields": len(fields),
+            "missing_required": missing,
+        }
+        if missing:
+            result.update(success=False, error=f"Required fields not filled: {', '.join(missing)}")
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+        if dry_run:
+            result.update(success=True, submitted=False, payload=payload)
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+
+        action = urljoin(str(page.url), form.action or str(page.url))
+        headers = {"Referer": str(page.url)}
+        form_names = {name for name, _ in payload}
+        for meta_name, token in parsed.csrf_meta.items():
+            # Frameworks that keep the token in a meta tag expect it as a header
+            if meta_name not in form_names:
+                headers["X-CSRF-Token"] = token
+        if form.method == "post":
+            if form.enctype == "multipart/form-data":
+                response = await self.client.post(action, files=[(k, (None, v)) for k, v in payload], headers=headers)
+            else:
+                response = await self.client.post(action, data=_as_form_dict(payload), headers=headers)
+        else:
+            response = await self.client.get(action, params=payload, headers=headers)
+
+        confirmation = find_confirmation_number(response.text) if response.status_code < 400 else None
+        result.update(
+            success=response.status_code < 400,
+            submitted=True,
+            status_code=response.status_code,
+            response_url=str(response.url),
+            confirmation_number=confirmation,
+            bytes_transferred=len(page.content) + len(response.content),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        if response.status_code >= 400:
+            result["error"] = f"Portal answered HTTP {response.status_code}"
+        logger.info(f"⚡ HTTP form submit {action}: {response.status_code}, {filled}/{len(fields)} fields, {result['elapsed_ms']} ms")
+        return result
+
+
+def _as_form_dict(payload: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """httpx takes repeated names as lists"""
+    data: Dict[str, Any] = {}
+    for name, value in payload:
+        if name in data:
+            data[name] = data[name] if isinstance(data[name], list) else [data[name]]
+            data[name].append(value)
+        else:
+            data[name] = value
+    return data
@@ -0,0 +1,245 @@
+"""
+JavaScript Form Filler
+Resolves and fills a whole form in one execute_script call instead of a
+find_element / clear / send_keys / highlight round-trip per field and per
+selector candidate. The page returns a per-field report; only fields that
+need real key events (flagged `keystrokes`, or whose value did not stick)
+fall back to send_keys. fill_form_steps is the same fill as a step generator
+for workflows that share a browser (see tab_scheduler).
+
+Field spec (one entry per field, filled in order, selects first):
+    {
+        "learned": css,               # selector plan entry, tried before anything else
+        "selectors": [css, ...],      # tried in order
+        "labels": ["service number"], # label / placeholder / aria-label text
+        "fallback_index": 0,          # nth unclaimed input[type=text] as last resort
+        "value": "...",
+        "keystrokes": False,          # True -> resolve in JS, type with send_keys
+    }
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.browser_waits import Steps, WaitFor, run_steps, type_into_steps, ui_settled
+from app.services.selector_plans import get_selector_plan_store
+
+logger = logging.getLogger(__name__)
+
+FILL_FORM_JS = r"""
+const fields = arguments[0], opts = arguments[1] || {};
+const claimed = new Set();
+const report = {};
+
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const pick = list => {
+    const free = list.filter(el => !claimed.has(el));
+    return free.find(visible) || free[0] || null;
+};
+const query = sel => { try { return Array.from(document.querySelectorAll(sel)); } catch (e) { return []; } };
+const controls = 'input:not([type=hidden]):not([type=button]):not([type=submit]), select, textarea';
+
+function byLabel(labels) {
+    const wanted = labels.map(l => l.toLowerCase());
+    const matches = text => text && wanted.some(w => text.toLowerCase().includes(w));
+    for (const label of document.querySelectorAll('label')) {
+        if (!matches(label.textContent)) continue;
+        const target = label.control || label.querySelector(controls)
+            || (label.nextElementSibling && label.nextElementSibling.matches(controls) ? label.nextElementSibling : null)
+            || (label.parentElement && label.parentElement.querySelector(controls));
+        if (target && !claimed.has(target)) return target;
+    }
+    return pick(query(controls).filter(el =>
+        matches(el.getAttribute('placeholder')) || matches(el.getAttribute('aria-label'))));
+}
+
+// Stable selector for the element, so the selector plan can go straight to it next time
+function uniqueSelector(el, matched) {
+    const tag = el.tagName.toLowerCase();
+    const unique = sel => { try { return document.querySelectorAll(sel).length === 1; } catch (e) { return false; } };
+    if (el.id && unique('#' + CSS.escape(el.id))) return '#' + CSS.escape(el.id);
+    const name = el.getAttribute('name');
+    if (name && unique(`${tag}[name="${CSS.escape(name)}"]`)) return `${tag}[name="${CSS.escape(name)}"]`;
+    if (matched && unique(matched)) return matched;
+    return null;
+}
+
+function resolve(spec) {
+    if (spec.learned) {
+        const el = pick(query(spec.learned));
+        if (el) return [el, 'learned', spec.learned];
+        spec.planMiss = true;
+    }
+    for (const sel of spec.selectors || []) {
+        const el = pick(query(sel));
+        if (el) return [el, 'selector', sel];
+    }
+    if (spec.labels && spec.labels.length) {
+        const el = byLabel(spec.labels);
+        if (el) return [el, 'label', null];
+    }
+    if (spec.fallback_index != null) {
+        const inputs = query("input[type='text']").filter(el => !claimed.has(el));
+        const el = inputs[Math.min(spec.fallback_index, inputs.length - 1)];
+        if (el) return [el, 'position', null];
+    }
+    return [null, null, null];
+}
+
+function setValue(el, value) {
+    if (el.tagName === 'SELECT') {
+        const v = value.toLowerCase();
+        const opt = Array.from(el.options).find(o => o.text.trim().toLowerCase() === v || o.value.toLowerCase() === v)
+            || Array.from(el.options).find(o => o.text.toLowerCase().includes(v) || o.value.toLowerCase().includes(v));
+        if (!opt) return null;
+        el.value = opt.value;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return opt.text.trim();
+    }
+    // Native setter so framework-controlled inputs (React etc.) see the change
+    const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    const setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+    el.focus();
+    setter.call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new Event('blur', {bubbles: true}));
+    return el.value === value ? value : null;
+}
+
+const order = Object.keys(fields).sort((a, b) => {
+    const isSelect = n => (fields[n].selectors || []).some(s => s.trim().startsWith('select'));
+    return isSelect(b) - isSelect(a);
+});
+
+for (const name of order) {
+    const spec = fields[name];
+    const [el, strategy, selector] = resolve(spec);
+    if (!el) {
+        report[name] = {filled: false, strategy: null, selector: null, error: 'not found', plan_miss: !!spec.planMiss};
+        continue;
+    }
+    claimed.add(el);
+    const entry = {filled: false, strategy: strategy, selector: selector, tag: el.tagName.toLowerCase(),
+                   id: el.id || null, name: el.getAttribute('name'), plan_miss: !!spec.planMiss,
+                   learned_selector: strategy === 'learned' ? selector : uniqueSelector(el, selector)};
+    if (spec.keystrokes) {
+        entry.needs_keys = true;
+        entry.element = el;
+    } else {
+        const shown = setValue(el, spec.value);
+        if (shown === null) {
+            entry.needs_keys = el.tagName !== 'SELECT';
+            entry.error = el.tagName === 'SELECT' ? 'option not found' : 'value did not commit';
+            if (entry.needs_keys) entry.element = el;
+        } else {
+            entry.filled = true;
+            entry.display = shown;
+            entry.element = el;
+        }
+    }
+    if (opts.highlight && entry.filled) {
+        el.style.backgroundColor = '#d4edda';
+        el.style.border = '2px solid #28a745';
+    }
+    report[name] = entry;
+}
+return report;
+"""
+
+# Returns the names of fields whose value changed after filling (e.g. an AJAX re-render)
+VERIFY_JS = r"""
+const drifted = [];
+for (const [name, el, expected] of arguments[0]) {
+    try {
+        if (!el.isConnected) { drifted.push(name); continue; }
+        if (el.tagName === 'SELECT') {
+            const opt = el.options[el.selectedIndex];
+            if (!opt || opt.text.trim() !== expected) drifted.push(name);
+        } else if (el.value !== expected) {
+            drifted.push(name);
+        }
+    } catch (e) { drifted.push(name); }
+}
+return drifted;
+"""
+
+
+def fill_form_fields(
+    driver,
+    fields: Dict[str, Dict[str, Any]],
+    highlight: bool = True,
+    human_typing: Optional[bool] = None,
+    verify: bool = True,
+    portal: Optional[Tuple[str, str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fill every field in one round-trip and return {field: report}.
+    Each report has filled, strategy ('learned' | 'selector' | 'label' |
+    'position'), the matched selector and the element's id/name.
+    portal=(supplier_id, form_url) enables the learned selector plan.
+    """
+    return run_steps(driver, fill_form_steps(driver, fields, highlight, human_typing, verify, portal))
+
+
+def fill_form_steps(
+    driver,
+    fields: Dict[str, Dict[str, Any]],
+    highlight: bool = True,
+    human_typing: Optional[bool] = None,
+    verify: bool = True,
+    portal: Optional[Tuple[str, str]] = None,
+) -> Steps:
+    """fill_form_fields as a step generator (yields while the page settles)"""
+    specs = {name: dict(spec) for name, spec in fields.items() if spec.get("value")}
+    if portal:
+        for name, selector in get_selector_plan_store().get(*portal).items():
+            if name in specs:
+                specs[name]["learned"] = selector
+    report: Dict[str, Dict[str, Any]] = {
+        name: {"filled": False, "strategy": None, "selector": None, "error": "no value"}
+        for name in fields if name not in specs
+    }
+    if not specs:
+        return report
+
+    result = driver.execute_script(FILL_FORM_JS, specs, {"highlight": highlight}) or {}
+    elements = {}
+    for name, entry in result.items():
+        element = entry.pop("element", None)
+        if element is not None:
+            elements[name] = element
+        if entry.pop("needs_keys", False) and element is not None:
+            # Masked inputs or fields that ignore programmatic values get real key events
+            entry["filled"] = yield from type_into_steps(driver, element, specs[name]["value"], human=human_typing)
+            entry["strategy"] = f"{entry['strategy']}+keys"
+            entry["display"] = specs[name]["value"] if entry["filled"] else None
+            if entry["filled"]:
+                entry.pop("error", None)
+        report[name] = entry
+
+    if verify:
+        expected = [
+            [name, elements[name], report[name].get("display") or specs[name]["value"]]
+            for name in specs if report.get(name, {}).get("filled") and name in elements
+        ]
+        if expected:
+            yield WaitFor(ui_settled, timeout=3, what="UI to settle after fill")
+            drifted = driver.execute_script(VERIFY_JS, expected) or []
+            if drifted:
+                # A dependent re-render reset or replaced these; resolve and fill them again
+                logger.info(f"🔁 Re-filling fields changed after fill: {', '.join(drifted)}")
+                retry = driver.execute_script(FILL_FORM_JS, {name: specs[name] for name in drifted}, {"highlight": highlight}) or {}
+                for name, entry in retry.items():
+                    entry.pop("element", None)
+                    entry.pop("needs_keys", None)
+                    entry["refilled"] = True
+                    report[name] = entry
+
+    if portal:
+        get_selector_plan_store().update(*portal, report)
+
+    filled = sum(1 for entry in report.values() if entry.get("filled"))
+    logger.info(f"⚡ Batch fill: {filled}/{len(fields)} fields in one pass")
+    return report
@@ -3,57 +3,123 @@ Login Assisted Service for websites that require authentication
 These websites need login first, then navigate to name change page
 User handles: Login, CAPTCHA, OTP
 Selenium handles: Form filling after login
+
+Each flow is a step generator, so it runs on a browser of its own or, with
+TAB_SCHEDULER_ENABLED, as a tab (own browser context) of a shared visible
+browser while the user logs in.
 """
-import time
 import logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from typing import Dict, Any, Optional
-import os
 from datetime import datetime
 
+from app.config import get_settings
+from app.services.driver_pool import get_driver_pool
+from app.services.browser_waits import Steps, WaitFor, navigate, page_settled, run_steps, type_into_steps
+from app.services.tab_scheduler import get_tab_scheduler
+from app.services.resource_blocker import block_resources, resource_report
+from app.services.screenshot_pipeline import get_screenshot_pipeline
+
 logger = logging.getLogger(__name__)
 
+# Seconds between checks while waiting on the user; slow, as each check
+# brings a shared browser's tab to the front
+USER_POLL_INTERVAL = 1.0
+
 class LoginAssistedService:
     """Service for websites that require login - User handles auth, Selenium handles form filling"""
     
+    # (data key, candidate field names) for municipal water forms
+    MUNICIPAL_WATER_FIELDS = [
+        ("connection_id", ["connection_id", "consumer_id", "connection_no"]),
+        ("old_name", ["current_name", "old_name", "existing_name"]),
+        ("new_name", ["new_name", "updated_name"]),
+        ("mobile", ["mobile", "phone", "contact"]),
+        ("address", ["address", "location"])
+    ]
+    
     def __init__(self):
         self.driver = None
         self.wait = None
-        os.makedirs("screenshots", exist_ok=True)
+        self.cooperative = False  # True while running as a TabScheduler job
     
     def setup_driver(self, headless: bool = False) -> webdriver.Chrome:
-        """Setup Chrome WebDriver"""
-        chrome_options = Options()
-        
+        """Lease a Chrome WebDriver from the shared pool"""
         # Never use headless for login-required sites (user needs to see)
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1200,800')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
         try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.driver = get_driver_pool().acquire(headless=headless)
             self.wait = WebDriverWait(self.driver, 30)
             return self.driver
         except Exception as e:
             logger.error(f"Failed to setup Chrome driver: {e}")
             raise e
     
+    def screenshot(self, name: str) -> Optional[str]:
+        """Queue a screenshot for the background writer; returns where it will land"""
+        pipeline = get_screenshot_pipeline()
+        filename = pipeline.capture(self.driver, name)
+        return pipeline.path(filename) if filename else None
+
     def close_driver(self):
-        """Close the WebDriver"""
+        """Return the WebDriver to the pool"""
         if self.driver:
-            self.driver.quit()
+            get_driver_pool().release(self.driver)
             self.driver = None
             self.wait = None
 
+    def any_field(self, field_names, timeout: int = 60) -> WaitFor:
+        """Wait until the user has reached a page with one of these named fields"""
+        return WaitFor(
+            lambda driver: any(driver.find_elements(By.NAME, name) for name in field_names),
+            timeout=timeout, what="form fields", poll=USER_POLL_INTERVAL,
+        )
+    
+    def user_reached(self, condition, timeout: int = 30, what: str = "user login") -> WaitFor:
+        """Wait on something the user does in the browser (login, OTP, navigation)"""
+        return WaitFor(condition, timeout=timeout, what=what, poll=USER_POLL_INTERVAL)
+    
+    def hand_over_driver(self):
+        """Leave the browser open for the user and free its pool slot"""
+        if self.driver:
+            get_driver_pool().detach(self.driver)
+    
+    def run_assisted(self, steps_factory, name: str) -> Dict[str, Any]:
+        """
+        Run a login-assisted flow and leave its browser (or tab) with the user.
+        Login is never headless: the user has to see the page.
+        """
+        if get_settings().TAB_SCHEDULER_ENABLED:
+            def start(driver):
+                self.driver = driver
+                self.cooperative = True
+                return self.blocked_steps(steps_factory)
+            return get_tab_scheduler(headless=False).run(start, keep_open=True, name=name)
+        
+        try:
+            self.setup_driver(headless=False)
+            return run_steps(self.driver, self.blocked_steps(steps_factory))
+        except Exception as e:
+            logger.error(f"{name} assistance failed: {str(e)}")
+            return {"success": False, "error": str(e), "message": f"{name} assistance failed"}
+        finally:
+            # Keep browser open for manual verification
+            self.hand_over_driver()
+
+    def blocked_steps(self, steps_factory) -> Steps:
+        """The flow with trackers and ads blocked; the user's page still loads in full"""
+        blocker = block_resources(self.driver, visible=True)
+        try:
+            result = yield from steps_factory()
+        finally:
+            report = resource_report(blocker)
+        if isinstance(result, dict):
+            result["resources"] = report
+        return result
+
     # ELECTRICITY SERVICES - LOGIN REQUIRED
     
     def assist_guvnl_login_and_fill(self, data: Dict[str, Any], service_type: str) -> Dict[str, Any]:
@@ -62,17 +128,19 @@ class LoginAssistedService:
         User handles: Login, CAPTCHA, OTP
         Selenium handles: Navigation to name change page and form filling
         """
+        logger.info(f"Starting GUVNL {service_type} login assistance for consumer: {data.get('consumer_number')}")
+        return self.run_assisted(lambda: self.guvnl_steps(data, service_type), f"GUVNL {service_type}")
+    
+    def guvnl_steps(self, data: Dict[str, Any], service_type: str) -> Steps:
+        """GUVNL flow on an open browser"""
         try:
-            logger.info(f"Starting GUVNL {service_type} login assistance for consumer: {data.get('consumer_number')}")
-            
-            self.setup_driver(headless=False)
-            
             # Navigate to GUVNL login page
             login_url = "https://portal.guvnl.in/login.php"
-            self.driver.get(login_url)
+            navigate(self.driver, login_url, wait=not self.cooperative)
             
             # Wait for login page
-            self.wait.until(EC.presence_of_element_located((By.ID, "username")))
+            if not (yield WaitFor(EC.presence_of_element_located((By.ID, "username")), timeout=30, what="GUVNL login page")):
+                raise TimeoutException("GUVNL login page did not load")
             
             # Show instructions to user
             instruction_script = """
@@ -96,12 +164,14 @@ The system will then automatically navigate to name change page and fill your fo
             # Wait for successful login (look for dashboard or menu elements)
             try:
                 # Wait for login success indicators
-                self.wait.until(EC.any_of(
+                logged_in = yield self.user_reached(EC.any_of(
                     EC.presence_of_element_located((By.CLASS_NAME, "dashboard")),
                     EC.presence_of_element_located((By.ID, "menu")),
                     EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Name Change")),
                     EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Services"))
                 ))
+                if not logged_in:
+                    raise TimeoutException("User did not complete GUVNL login")
                 
                 logger.info("Login successful! Navigating to name change page...")
                 
@@ -110,22 +180,27 @@ The system will then automatically navigate to name change page and fill your fo
                     # Look for name change link in menu
                     name_change_link = self.driver.find_element(By.PARTIAL_LINK_TEXT, "Name Change")
                     name_change_link.click()
+                    via_services = False
                 except:
                     # Alternative navigation
                     services_menu = self.driver.find_element(By.PARTIAL_LINK_TEXT, "Services")
                     services_menu.click()
-                    time.sleep(2)
-                    name_change_link = self.driver.find_element(By.PARTIAL_LINK_TEXT, "Name Change")
+                    via_services = True
+                if via_services:
+                    name_change_link = yield WaitFor(
+                        EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Name Change")), timeout=30, what="Name Change link"
+                    )
+                    if not name_change_link:
+                        raise TimeoutException("Name Change link not found under Services")
                     name_change_link.click()
                 
                 # Wait for name change form
-                time.sleep(3)
+                yield WaitFor(page_settled, timeout=10, what="name change form")
                 
                 # Fill the form automatically
-                filled_fields = self.fill_guvnl_name_change_form(data)
+                filled_fields = yield from self.fill_guvnl_name_change_form(data)
                 
-                screenshot_path = f"screenshots/guvnl_{service_type}_{int(time.time())}.png"
-                self.driver.save_screenshot(screenshot_path)
+                screenshot_path = self.screenshot(f"guvnl_{service_type}")
                 
                 return {
                     "success": True,
@@ -152,12 +227,9 @@ The system will then automatically navigate to name change page and fill your fo
                 "error": str(e),
                 "message": f"GUVNL {service_type} assistance failed"
             }
-        finally:
-            # Keep browser open for manual verification
-            pass
     
-    def fill_guvnl_name_change_form(self, data: Dict[str, Any]) -> int:
-        """Fill GUVNL name change form fields"""
+    def fill_guvnl_name_change_form(self, data: Dict[str, Any]) -> Steps:
+        """Fill GUVNL name change form fields (a step generator returning the count filled)"""
         filled_count = 0
         
         try:
@@ -165,77 +237,63 @@ The system will then automatically navigate to name change page and fill your fo
             if data.get('consumer_number'):
                 try:
                     consumer_field = self.driver.find_element(By.NAME, "consumer_no")
-                    consumer_field.clear()
-                    consumer_field.send_keys(data['consumer_number'])
+                    yield from type_into_steps(self.driver, consumer_field, data['consumer_number'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # Old Name
             if data.get('old_name'):
                 try:
                     old_name_field = self.driver.find_element(By.NAME, "old_name")
-                    old_name_field.clear()
-                    old_name_field.send_keys(data['old_name'])
+                    yield from type_into_steps(self.driver, old_name_field, data['old_name'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # New Name
             if data.get('new_name'):
                 try:
                     new_name_field = self.driver.find_element(By.NAME, "new_name")
-                    new_name_field.clear()
-                    new_name_field.send_keys(data['new_name'])
+                    yield from type_into_steps(self.driver, new_name_field, data['new_name'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # Mobile Number
             if data.get('mobile'):
                 try:
                     mobile_field = self.driver.find_element(By.NAME, "mobile")
-                    mobile_field.clear()
-                    mobile_field.send_keys(data['mobile'])
+                    yield from type_into_steps(self.driver, mobile_field, data['mobile'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # Email
             if data.get('email'):
                 try:
                     email_field = self.driver.find_element(By.NAME, "email")
-                    email_field.clear()
-                    email_field.send_keys(data['email'])
+                    yield from type_into_steps(self.driver, email_field, data['email'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # Address
             if data.get('address'):
                 try:
                     address_field = self.driver.find_element(By.NAME, "address")
-                    address_field.clear()
-                    address_field.send_keys(data['address'])
+                    yield from type_into_steps(self.driver, address_field, data['address'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             # Aadhar Number
             if data.get('aadhar_number'):
                 try:
                     aadhar_field = self.driver.find_element(By.NAME, "aadhar")
-                    aadhar_field.clear()
-                    aadhar_field.send_keys(data['aadhar_number'])
+                    yield from type_into_steps(self.driver, aadhar_field, data['aadhar_number'])
                     filled_count += 1
-                    time.sleep(0.5)
-                except:
+                except Exception:
                     pass
             
             logger.info(f"Filled {filled_count} fields in GUVNL form")
@@ -253,17 +311,19 @@ The system will then automatically navigate to name change page and fill your fo
         User handles: Login, OTP
         Selenium handles: Form filling after login
         """
+        logger.info(f"Starting Adani Gas login assistance for consumer: {data.get('consumer_number')}")
+        return self.run_assisted(lambda: self.adani_gas_steps(data), "Adani Gas")
+    
+    def adani_gas_steps(self, data: Dict[str, Any]) -> Steps:
+        """Adani Gas flow on an open browser"""
         try:
-            logger.info(f"Starting Adani Gas login assistance for consumer: {data.get('consumer_number')}")
-            
-            self.setup_driver(headless=False)
-            
             # Navigate to Adani Gas customer portal
             login_url = "https://www.adanigas.com/myaccount"
-            self.driver.get(login_url)
+            navigate(self.driver, login_url, wait=not self.cooperative)
             
             # Wait for login page
-            self.wait.until(EC.presence_of_element_located((By.ID, "login-form")))
+            if not (yield WaitFor(EC.presence_of_element_located((By.ID, "login-form")), timeout=30, what="Adani Gas login page")):
+                raise TimeoutException("Adani Gas login page did not load")
             
             # Show instructions
             instruction_script = """
@@ -283,11 +343,13 @@ The system will then navigate to name change section and fill your form.`);
             
             # Wait for successful login
             try:
-                self.wait.until(EC.any_of(
+                logged_in = yield self.user_reached(EC.any_of(
                     EC.presence_of_element_located((By.CLASS_NAME, "customer-dashboard")),
                     EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Name Transfer")),
                     EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Services"))
                 ))
+                if not logged_in:
+                    raise TimeoutException("User did not complete Adani Gas login")
                 
                 logger.info("Adani Gas login successful! Navigating to name change...")
                 
@@ -295,13 +357,12 @@ The system will then navigate to name change section and fill your form.`);
                 name_change_link = self.driver.find_element(By.PARTIAL_LINK_TEXT, "Name Transfer")
                 name_change_link.click()
                 
-                time.sleep(3)
+                yield WaitFor(page_settled, timeout=10, what="name transfer form")
                 
                 # Fill form
-                filled_fields = self.fill_adani_gas_form(data)
+                filled_fields = yield from self.fill_adani_gas_form(data)
                 
-                screenshot_path = f"screenshots/adani_gas_{int(time.time())}.png"
-                self.driver.save_screenshot(screenshot_path)
+                screenshot_path = self.screenshot("adani_gas")
                 
                 return {
                     "success": True,
@@ -321,12 +382,11 @@ The system will then navigate to name change section and fill your form.`);
         except Exception as e:
             logger.error(f"Adani Gas assistance failed: {str(e)}")
             return {"success": False, "error": str(e)}
-        finally:
-            pass
     
-    def fill_adani_gas_form(self, data: Dict[str, Any]) -> int:
-        """Fill Adani Gas name change form"""
+    def fill_adani_gas_form(self, data: Dict[str, Any]) -> Steps:
+        """Fill Adani Gas name change form (a step generator returning the count filled)"""
         filled_count = 0
+        yield from ()  # nothing to wait for until the form is mapped
         
         # Similar form filling logic for Adani Gas
         # Implementation details based on actual form structure
@@ -339,11 +399,12 @@ The system will then navigate to name change section and fill your form.`);
         """
         Municipal Water Services (AMC, SMC, VMC, RMC) - Login/Ward verification required
         """
+        logger.info(f"Starting {city} Municipal water login assistance")
+        return self.run_assisted(lambda: self.municipal_water_steps(data, city), f"{city} Municipal")
+    
+    def municipal_water_steps(self, data: Dict[str, Any], city: str) -> Steps:
+        """Municipal water flow on an open browser"""
         try:
-            logger.info(f"Starting {city} Municipal water login assistance")
-            
-            self.setup_driver(headless=False)
-            
             # City-specific URLs
             city_urls = {
                 "AMC": "https://ahmedabadcity.gov.in/citizen-services",
@@ -353,7 +414,9 @@ The system will then navigate to name change section and fill your form.`);
             }
             
             url = city_urls.get(city, city_urls["AMC"])
-            self.driver.get(url)
+            navigate(self.driver, url, wait=not self.cooperative)
+            if self.cooperative:
+                yield WaitFor(page_settled, timeout=30, what=f"{city} portal")
             
             # Show city-specific instructions
             instruction_script = f"""
@@ -371,14 +434,15 @@ The system will then fill your form automatically.`);
             """
             self.driver.execute_script(instruction_script)
             
-            # Wait for user to navigate to form
-            time.sleep(10)  # Give user time to navigate
+            # Wait for user to navigate to form (continues as soon as a known field appears)
+            field_names = [name for _, names in self.MUNICIPAL_WATER_FIELDS for name in names]
+            if not (yield self.any_field(field_names, timeout=60)):
+                logger.info("Form fields not found yet, filling what is available")
             
             # Try to fill form if available
-            filled_fields = self.fill_municipal_water_form(data)
+            filled_fields = yield from self.fill_municipal_water_form(data)
             
-            screenshot_path = f"screenshots/{city.lower()}_water_{int(time.time())}.png"
-            self.driver.save_screenshot(screenshot_path)
+            screenshot_path = self.screenshot(f"{city.lower()}_water")
             
             return {
                 "success": True,
@@ -391,33 +455,21 @@ The system will then fill your form automatically.`);
         except Exception as e:
             logger.error(f"{city} Municipal assistance failed: {str(e)}")
             return {"success": False, "error": str(e)}
-        finally:
-            pass
     
-    def fill_municipal_water_form(self, data: Dict[str, Any]) -> int:
-        """Fill municipal water form fields"""
+    def fill_municipal_water_form(self, data: Dict[str, Any]) -> Steps:
+        """Fill municipal water form fields (a step generator returning the count filled)"""
         filled_count = 0
         
         # Generic form filling for municipal water services
-        field_mappings = [
-            ("connection_id", ["connection_id", "consumer_id", "connection_no"]),
-            ("old_name", ["current_name", "old_name", "existing_name"]),
-            ("new_name", ["new_name", "updated_name"]),
-            ("mobile", ["mobile", "phone", "contact"]),
-            ("address", ["address", "location"])
-        ]
-        
-        for data_key, field_names in field_mappings:
+        for data_key, field_names in self.MUNICIPAL_WATER_FIELDS:
             if data.get(data_key):
                 for field_name in field_names:
                     try:
                         field = self.driver.find_element(By.NAME, field_name)
-                        field.clear()
-                        field.send_keys(data[data_key])
+                        yield from type_into_steps(self.driver, field, data[data_key])
                         filled_count += 1
-                        time.sleep(0.5)
                         break
-                    except:
+                    except Exception:
                         continue
         
         return filled_count
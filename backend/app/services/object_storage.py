@@ -0,0 +1,329 @@
+"""
+Object Storage
+Where uploaded documents and automation screenshots live, so the API, OCR
+workers and RPA workers can run in separate containers. Objects are
+addressed by key ("uploads/documents/3f/3fa9...c1.png", "screenshots/x.webp").
+
+- LocalObjectStorage: files under STORAGE_LOCAL_ROOT. The default root "."
+  keeps keys identical to the relative paths used before, so existing
+  Document.file_url values stay valid.
+- S3ObjectStorage: any S3-compatible store (AWS S3, or MinIO locally; see
+  the minio service in docker-compose.yml). Needs boto3. Downloads are
+  presigned URLs served by the store itself, not the API process.
+
+Uploads are content-addressed (content_key), so the same file uploaded twice
+is stored once.
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# key, size in bytes, modified (unix time)
+ObjectInfo = Tuple[str, int, float]
+
+
+def content_key(prefix: str, content_hash: str, extension: str = "") -> str:
+    """Content-addressed key for an upload: identical files share one object"""
+    extension = extension.lower() if extension.startswith(".") or not extension else f".{extension.lower()}"
+    return f"{prefix.strip('/')}/{content_hash[:2]}/{content_hash}{extension}"
+
+
+def normalize_key(key: str) -> str:
+    """Keys are relative, '/'-separated and never leave the store's root"""
+    key = key.replace("\\", "/").lstrip("/")
+    if not key or any(part in ("", ".", "..") for part in key.split("/")):
+        raise ValueError(f"Invalid storage key: {key!r}")
+    return key
+
+
+class ObjectStorage(ABC):
+    """Key/value store for files"""
+
+    name = "abstract"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"puts": 0, "deduplicated": 0, "bytes_in": 0, "gets": 0, "deletes": 0}
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._stats[name] += value
+
+    @abstractmethod
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False):
+        """Store a local file under key (streamed, never read into memory whole); move may consume path"""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        """Store a small object"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Object content, streamed; FileNotFoundError if missing"""
+
+    @abstractmethod
+    def local_path(self, key: str) -> Iterator[str]:
+        """A filesystem path holding the object for the duration of the block"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove an object; False if there was none"""
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        """Objects whose key starts with prefix"""
+
+    def presigned_url(self, key: str, expires: int = 900) -> Optional[str]:
+        """Direct download URL that doesn't go through the API, or None if the store can't issue one"""
+        return None
+
+    def put_deduplicated(self, key: str, path: str, content_type: Optional[str] = None) -> bool:
+        """put_file unless key already exists (content-addressed keys); True if stored. Consumes path."""
+        if self.exists(key):
+            os.remove(path)
+            self._count(deduplicated=1)
+            return False
+        self.put_file(key, path, content_type, move=True)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, **self._stats}
+
+
+class LocalObjectStorage(ObjectStorage):
+    """Objects as files under a root directory"""
+
+    name = "local"
+
+    def __init__(self, root: str = "."):
+        super().__init__()
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *normalize_key(key).split("/"))
+
+    def _prepare(self, key: str) -> str:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        return target
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False):
+        target = self._prepare(key)
+        size = os.path.getsize(path)
+        if move:
+            shutil.move(path, target)  # a rename on the same filesystem
+        else:
+            shutil.copyfile(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+        self._count(puts=1, bytes_in=size)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        target = self._prepare(key)
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+        self._count(puts=1, bytes_in=len(data))
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        f = open(self.path(key), "rb")  # FileNotFoundError before the first chunk is asked for
+        self._count(gets=1)
+
+        def chunks():
+            with f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+        return chunks()
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        path = self.path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self._count(gets=1)
+        yield path
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            return False
+        self._count(deletes=1)
+        return True
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        directory = self.path(prefix.rstrip("/"))
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                full = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(full, self.root).replace(os.sep, "/")
+                yield key, stat.st_size, stat.st_mtime
+
+
+class S3ObjectStorage(ObjectStorage):
+    """Objects in an S3-compatible bucket (path-style addressing, so MinIO works as-is)"""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None, region: str = "us-east-1", prefix: str = ""):
+        super().__init__()
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 (pip install boto3)") from e
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"},
+                          retries={"max_attempts": 3, "mode": "standard"}),
+        )
+
+    def _key(self, key: str) -> str:
+        return self.prefix + normalize_key(key)
+
+    def _missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def ensure_bucket(self):
+        """Create the bucket if it doesn't exist (MinIO starts empty)"""
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except self._client_error:
+            self.client.create_bucket(Bucket=self.bucket)
+            logger.info(f"🪣 Created bucket {self.bucket}")
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False):
+        size = os.path.getsize(path)
+        # upload_file streams from disk, in parallel multipart chunks for big files
+        self.client.upload_file(path, self.bucket, self._key(key),
+                                ExtraArgs={"ContentType": content_type} if content_type else None)
+        if move:
+            os.remove(path)
+        self._count(puts=1, bytes_in=size)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, **extra)
+        self._count(puts=1, bytes_in=len(data))
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as e:
+            if self._missing(e):
+                return False
+            raise
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except self._client_error as e:
+            if self._missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        self._count(gets=1)
+        return body.iter_chunks(chunk_size)
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        suffix = os.path.splitext(key)[1]
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix="object-")
+        os.close(fd)
+        try:
+            try:
+                self.client.download_file(self.bucket, self._key(key), path)
+            except self._client_error as e:
+                if self._missing(e):
+                    raise FileNotFoundError(key) from e
+                raise
+            self._count(gets=1)
+            yield path
+        finally:
+            os.remove(path)
+
+    def delete(self, key: str) -> bool:
+        if not self.exists(key):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        self._count(deletes=1)
+        return True
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix.rstrip("/")) + "/"):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self.prefix):], item["Size"], item["LastModified"].timestamp()
+
+    def presigned_url(self, key: str, expires: int = 900) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=expires
+        )
+
+
+def create_object_storage(backend: str = "local") -> ObjectStorage:
+    """Store for a STORAGE_BACKEND value"""
+    settings = get_settings()
+    if backend == "s3":
+        storage = S3ObjectStorage(
+            bucket=settings.STORAGE_S3_BUCKET,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            access_key=settings.STORAGE_S3_ACCESS_KEY,
+            secret_key=settings.STORAGE_S3_SECRET_KEY,
+            region=settings.STORAGE_S3_REGION,
+            prefix=settings.STORAGE_S3_PREFIX,
+        )
+        storage.ensure_bucket()
+        return storage
+    if backend != "local":
+        logger.warning(f"Unknown STORAGE_BACKEND '{backend}', using local")
+    return LocalObjectStorage(settings.STORAGE_LOCAL_ROOT)
+
+
+_storage: Optional[ObjectStorage] = None
+_storage_lock = threading.Lock()
+
+
+def get_object_storage() -> ObjectStorage:
+    """Process-wide object store (each OCR worker process builds its own)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_object_storage(get_settings().STORAGE_BACKEND)
+    return _storage
@@ -0,0 +1,148 @@
+"""
+OCR Result Cache
+People upload the same Aadhaar/PAN/bill image for application after
+application. Results are cached in the ocr_cache table under
+
+    (sha256 of the image, document_type, engine version)
+
+where the engine version covers the tesseract binary, the preprocessing
+pipeline and the extractors, so upgrading any of them misses the old
+entries. Entries beyond OCR_CACHE_MAX_ENTRIES are evicted least recently
+used first. Lookups happen in the API process, so the hit/miss counters in
+stats() are complete.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import pytesseract
+from sqlalchemy import func, select
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import OCRCacheEntry
+from app.services.ocr_preprocess import PREPROCESS_VERSION
+from app.services.ocr_service import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+EVICT_EVERY = 50  # check the size cap every this many puts
+
+
+def engine_version() -> str:
+    """Identifies everything that affects the extracted fields"""
+    try:
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = "missing"
+    preprocess = f"prep{PREPROCESS_VERSION}" if get_settings().OCR_PREPROCESS_ENABLED else "raw"
+    return f"tesseract-{tesseract}/{preprocess}/extract{EXTRACTOR_VERSION}"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OCRCache:
+    """LRU cache of extracted fields keyed by image content"""
+
+    def __init__(self, max_entries: int = 10000, session_factory=SessionLocal, version: Optional[str] = None):
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self.version = version or engine_version()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+    def _key(self, content_hash: str, document_type: str):
+        return (content_hash, document_type, self.version)
+
+    def contains(self, content_hash: str, document_type: str) -> bool:
+        with self.session_factory() as db:
+            return db.get(OCRCacheEntry, self._key(content_hash, document_type)) is not None
+
+    def get(self, content_hash: str, document_type: str) -> Optional[Dict[str, Any]]:
+        """Cached fields, or None (counted as a miss)"""
+        with self.session_factory() as db:
+            entry = db.get(OCRCacheEntry, self._key(content_hash, document_type))
+            if entry is None:
+                data = None
+            else:
+                data = entry.extracted_data
+                entry.hits = (entry.hits or 0) + 1
+                entry.last_used = utcnow()
+                db.commit()
+        with self._lock:
+            self._stats["hits" if data is not None else "misses"] += 1
+        return data
+
+    def put(self, content_hash: str, document_type: str, data: Dict[str, Any]):
+        now = utcnow()
+        with self.session_factory() as db:
+            db.merge(OCRCacheEntry(
+                content_hash=content_hash,
+                document_type=document_type,
+                engine_version=self.version,
+                extracted_data=data,
+                hits=0,
+                created_at=now,
+                last_used=now,
+            ))
+            db.commit()
+        with self._lock:
+            self._stats["stores"] += 1
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries beyond max_entries"""
+        with self.session_factory() as db:
+            total = db.scalar(select(func.count()).select_from(OCRCacheEntry))
+            excess = total - self.max_entries
+            if excess <= 0:
+                return 0
+            cutoff = db.scalar(
+                select(OCRCacheEntry.last_used).order_by(OCRCacheEntry.last_used).offset(excess - 1).limit(1)
+            )
+            removed = db.query(OCRCacheEntry).filter(OCRCacheEntry.last_used <= cutoff).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        with self._lock:
+            self._stats["evicted"] += removed
+        logger.info(f"🧹 OCR cache evicted {removed} entries")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            entries = db.scalar(select(func.count()).select_from(OCRCacheEntry))
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "engine_version": self.version,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+            }
+
+
+_ocr_cache: Optional[OCRCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Process-wide OCR cache, or None when OCR_CACHE_ENABLED is off"""
+    global _ocr_cache
+    settings = get_settings()
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    if _ocr_cache is None:
+        with _ocr_cache_lock:
+            if _ocr_cache is None:
+                _ocr_cache = OCRCache(max_entries=settings.OCR_CACHE_MAX_ENTRIES)
+    return _ocr_cache
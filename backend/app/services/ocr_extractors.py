@@ -0,0 +1,140 @@
+"""
+OCR Field Extractors
+Declarative registry of the fields pulled out of OCR text per document type.
+Each field lists its patterns in priority order; a later pattern is only a
+fallback when no earlier one matches anywhere. Patterns are compiled once at
+import, and adding a document type is a dictionary entry in EXTRACTORS.
+
+Each pattern runs as its own search (stopping at the first match) rather than
+as one combined alternation: CPython's re keeps its literal/charset prefix
+scan for a single pattern but not for an alternation, which makes the
+one-pass scanner 2-3x slower on OCR text (see scripts/bench_ocr_extractors.py).
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+I, S = re.IGNORECASE, re.DOTALL
+
+NAME = r'([A-Za-z\s]+)'
+NAME_LINE = r'([A-Za-z][A-Za-z .]*)'  # stops at the end of the line
+MOBILE = r'([6-9]\d{9})'
+DATE = r'(\d{2}[/-]\d{2}[/-]\d{4})'
+ADDRESS_UNTIL_TOTALS = r'(?:Address|पता)[:\s]+(.+?)(?=\n\n|Bill|Amount|\Z)'
+
+
+def pattern(regex: str, flags: int = I, group: int = 1, clean: str = "strip") -> Dict[str, Any]:
+    """One way of finding a field; clean is "strip" or "nospace" """
+    return {"regex": regex, "flags": flags, "group": group, "clean": clean}
+
+
+# document_type -> field -> patterns (priority order)
+EXTRACTORS: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
+    "aadhaar": {
+        "aadhar": [pattern(r'\b\d{4}\s?\d{4}\s?\d{4}\b', flags=0, group=0, clean="nospace")],
+        "name": [
+            pattern(r'(?:Name|नाम)[:\s]+' + NAME),
+            pattern(r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'),
+        ],
+        "dob": [pattern(r'(?:DOB|Date of Birth|जन्म तिथि)[:\s]+' + DATE)],
+        "address": [pattern(r'(?:Address|पता)[:\s]+(.+?)(?=\n\n|\Z)', flags=I | S)],
+    },
+    "pan": {
+        "pan": [pattern(r'\b[A-Z]{5}\d{4}[A-Z]\b', flags=0, group=0)],
+        "name": [pattern(r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', flags=0)],
+        "father_name": [pattern(r"(?:Father's Name)[:\s]+" + NAME)],
+        "dob": [pattern(DATE, flags=0)],
+    },
+    "electricity_bill": {
+        "consumer_number": [
+            pattern(r'(?:Consumer No|Consumer Number|उपभोक्ता संख्या)[:\s]+([A-Z0-9]+)'),
+            pattern(r'(?:Account No|खाता संख्या)[:\s]+([A-Z0-9]+)'),
+        ],
+        "name": [
+            pattern(r'(?:Name|नाम)[:\s]+' + NAME),
+            pattern(r'(?:Consumer Name)[:\s]+' + NAME),
+        ],
+        "address": [pattern(ADDRESS_UNTIL_TOTALS, flags=I | S)],
+        "mobile": [pattern(r'(?:Mobile|Mob|मोबाइल)[:\s]+' + MOBILE)],
+    },
+    "gas_bill": {
+        "consumer_number": [
+            pattern(r'(?:Consumer No|Customer No|BP No)[:\s]+([A-Z0-9]+)'),
+            pattern(r'(?:उपभोक्ता संख्या)[:\s]+([A-Z0-9]+)'),
+        ],
+        "name": [pattern(r'(?:Name|Customer Name|नाम)[:\s]+' + NAME)],
+        "address": [pattern(ADDRESS_UNTIL_TOTALS, flags=I | S)],
+        "mobile": [pattern(r'(?:Mobile|Contact|मोबाइल)[:\s]+' + MOBILE)],
+    },
+    "water_bill": {
+        "connection_number": [
+            pattern(r'(?:Connection No|Connection ID|Water Connection No)[.:\s]+([A-Z0-9/-]+)'),
+            pattern(r'(?:Consumer No|Tenement No|Property No)[.:\s]+([A-Z0-9/-]+)'),
+        ],
+        "name": [pattern(r'(?:Owner Name|Consumer Name|Name|નામ|नाम)[:\s]+' + NAME_LINE)],
+        "address": [pattern(ADDRESS_UNTIL_TOTALS, flags=I | S)],
+        "mobile": [pattern(r'(?:Mobile|Contact|મોબાઇલ|मोबाइल)[:\s]+' + MOBILE)],
+        "ward": [pattern(r'(?:Ward|Zone)[.:\s]+([A-Za-z0-9 -]+?)\s*(?:\n|$)', flags=I | re.M)],
+    },
+    "property_paper": {
+        "survey_number": [pattern(r'(?:Survey No|Survey Number|સર્વે નં|सर्वे नं)[.:\s]+(\d+(?:/[0-9A-Z]+)*)')],
+        "khata_number": [pattern(r'(?:Khata No|Khata Number|ખાતા નં|खाता नं)[.:\s]+(\d+)')],
+        "owner_name": [
+            pattern(r'(?:Owner|Khatedar|Holder)(?:\'s)?(?: Name)?[:\s]+' + NAME_LINE),
+            pattern(r'(?:Name|નામ)[:\s]+' + NAME_LINE),
+        ],
+        "village": [pattern(r'(?:Village|ગામ|गांव)[:\s]+' + NAME_LINE)],
+        "taluka": [pattern(r'(?:Taluka|Tehsil|તાલુકો|तहसील)[:\s]+' + NAME_LINE)],
+        "district": [pattern(r'(?:District|જિલ્લો|जिला)[:\s]+' + NAME_LINE)],
+    },
+    "voter_id": {
+        "epic_number": [pattern(r'\b[A-Z]{3}\d{7}\b', flags=0, group=0)],
+        "name": [pattern(r"(?:Elector'?s Name|Name|નામ|नाम)[:\s]+" + NAME_LINE)],
+        "relative_name": [pattern(r"(?:Father'?s|Husband'?s|Mother'?s) Name[:\s]+" + NAME_LINE)],
+        "dob": [pattern(r'(?:DOB|Date of Birth|જન્મ તારીખ|जन्म तिथि)[:\s]+' + DATE)],
+        "gender": [pattern(r'(?:Sex|Gender)[:\s/]+(Male|Female|Other)')],
+    },
+}
+
+EXTRACTOR_ALIASES = {"aadhar": "aadhaar", "property_document": "property_paper", "property_doc": "property_paper"}
+
+
+class CompiledExtractor:
+    """One document type's patterns, compiled once"""
+
+    def __init__(self, document_type: str, fields: Dict[str, List[Dict[str, Any]]]):
+        self.document_type = document_type
+        # field -> [(pattern, group, clean)] in priority order
+        self.patterns: Dict[str, List[Tuple[re.Pattern, int, str]]] = {
+            field: [(re.compile(spec["regex"], spec["flags"]), spec["group"], spec["clean"]) for spec in specs]
+            for field, specs in fields.items()
+        }
+
+    @staticmethod
+    def _clean(value: str, how: str) -> str:
+        return value.replace(" ", "") if how == "nospace" else value.strip()
+
+    def extract(self, text: str) -> Dict[str, str]:
+        data = {}
+        for field, patterns in self.patterns.items():
+            for compiled, group, clean in patterns:
+                match = compiled.search(text)
+                if match:
+                    data[field] = self._clean(match.group(group), clean)
+                    break
+        return data
+
+
+REGISTRY: Dict[str, CompiledExtractor] = {
+    document_type: CompiledExtractor(document_type, fields) for document_type, fields in EXTRACTORS.items()
+}
+
+
+def get_extractor(document_type: Optional[str]) -> Optional[CompiledExtractor]:
+    return REGISTRY.get(EXTRACTOR_ALIASES.get(document_type or "", document_type or ""))
+
+
+def extract_fields(document_type: str, text: str) -> Dict[str, str]:
+    """Fields for a document type ({} for types without an extractor)"""
+    extractor = get_extractor(document_type)
+    return extractor.extract(text) if extractor else {}
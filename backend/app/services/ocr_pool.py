@@ -0,0 +1,278 @@
+"""
+OCR Worker Pool
+Tesseract is CPU-bound and shells out per image, so uploads no longer run it
+on the event loop. The upload stores the file in object storage and
+saves a Document with ocr_status="queued" and returns; a bounded process pool (OCR_WORKERS
+processes, spawned) runs the OCR and the result is written to
+Document.extracted_data with ocr_status "done" or "failed". Clients poll
+GET /api/documents/{id}/ocr. Documents still queued when the process
+stopped are re-submitted on startup. Images seen before are answered from
+the OCR cache without touching the pool.
+"""
+
+import math
+import time
+import logging
+import threading
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Document, DocumentType
+from app.services.ocr_cache import get_ocr_cache
+from app.services.ocr_service import run_ocr
+
+logger = logging.getLogger(__name__)
+
+OCR_QUEUED = "queued"
+OCR_DONE = "done"
+OCR_FAILED = "failed"
+OCR_SKIPPED = "skipped"  # not an image
+
+
+def _field(data: Dict[str, Any], *names: str) -> Optional[str]:
+    """First non-empty value among an extractor key and its profile-style aliases"""
+    for name in names:
+        if data.get(name):
+            return data[name]
+    return None
+
+
+def apply_to_profile(document: Document, data: Dict[str, Any]):
+    """Copy identity fields from a finished Aadhaar/PAN OCR onto the owner's profile"""
+    user = document.user
+    if user is None or not data:
+        return
+    # Extractor keys (ocr_extractors.EXTRACTORS) first, then the profile names
+    aadhaar_number = _field(data, "aadhar", "aadhaar_number")
+    pan_number = _field(data, "pan", "pan_number")
+    full_name = _field(data, "name", "full_name")
+    date_of_birth = _field(data, "dob", "date_of_birth")
+    if document.doc_type == DocumentType.AADHAAR:
+        if aadhaar_number:
+            user.aadhaar_number = aadhaar_number
+        if full_name and not user.full_name:
+            user.full_name = full_name
+        if date_of_birth:
+            user.date_of_birth = date_of_birth
+        if data.get("address"):
+            user.address = data["address"]
+        if data.get("pincode"):
+            user.pincode = data["pincode"]
+        if data.get("gender"):
+            user.gender = data["gender"]
+    elif document.doc_type == DocumentType.PAN:
+        if pan_number:
+            user.pan_number = pan_number
+        if full_name and not user.full_name:
+            user.full_name = full_name
+        if date_of_birth and not user.date_of_birth:
+            user.date_of_birth = date_of_birth
+
+
+class OCRCapacityError(Exception):
+    """Raised when the OCR pool is saturated; carries a Retry-After hint"""
+
+    def __init__(self, retry_after: int, message: str = "OCR workers are busy"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.message = message
+
+
+class OCRWorkerPool:
+    """Bounded process pool that runs OCR and stores the results on Document rows"""
+
+    def __init__(self, max_workers: int = 2, queue_depth: int = 16, retry_after: int = 10,
+                 session_factory=SessionLocal):
+        self.max_workers = max(1, max_workers)
+        self.queue_depth = max(0, queue_depth)
+        self.retry_after = max(1, retry_after)
+        self.session_factory = session_factory
+
+        self._executor = self._new_executor()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._avg_duration: Optional[float] = None
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: the API process has browser/driver threads that must not be forked
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    def _retry_after_hint(self) -> int:
+        if self._avg_duration is None:
+            return self.retry_after
+        waves = math.ceil((self._pending - self.max_workers + 1) / self.max_workers)
+        return max(1, math.ceil(self._avg_duration * max(1, waves)))
+
+    def ensure_capacity(self):
+        """Raise OCRCapacityError now rather than after the upload is saved"""
+        with self._lock:
+            if self._closed:
+                raise OCRCapacityError(self.retry_after, "OCR pool is shutting down")
+            if self._pending >= self.capacity:
+                self._stats["rejected"] += 1
+                raise OCRCapacityError(self._retry_after_hint())
+
+    def submit(self, document_id: int, key: str, document_type: str,
+               content_hash: Optional[str] = None) -> Optional[Future]:
+        """
+        Queue OCR for a stored document (object storage key), or raise
+        OCRCapacityError when saturated.
+        With a content_hash the cache is tried first; on a hit the result is
+        stored right away and None is returned.
+        """
+        cache = get_ocr_cache() if content_hash else None
+        if cache is not None:
+            try:
+                cached = cache.get(content_hash, document_type)
+            except Exception as e:
+                logger.warning(f"⚠️ OCR cache lookup failed: {e}")
+                cached = None
+            if cached is not None:
+                self._store(document_id, cached, None)
+                logger.info(f"⚡ OCR cache hit for document {document_id} ({document_type})")
+                return None
+
+        with self._lock:
+            if self._closed:
+                raise OCRCapacityError(self.retry_after, "OCR pool is shutting down")
+            if self._pending >= self.capacity:
+                self._stats["rejected"] += 1
+                raise OCRCapacityError(self._retry_after_hint())
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+        started = time.monotonic()
+        try:
+            try:
+                future = self._executor.submit(run_ocr, key, document_type)
+            except BrokenProcessPool:
+                # A worker died (OOM, segfault in tesseract); start a fresh pool
+                logger.warning("⚠️ OCR process pool broken, restarting it")
+                with self._lock:
+                    self._executor = self._new_executor()
+                future = self._executor.submit(run_ocr, key, document_type)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise OCRCapacityError(self.retry_after, "OCR pool is shutting down")
+        future.add_done_callback(lambda f: self._finish(f, document_id, document_type, content_hash, started))
+        logger.info(f"🔎 OCR queued for document {document_id} ({document_type})")
+        return future
+
+    def _finish(self, future: Future, document_id: int, document_type: str,
+                content_hash: Optional[str], started: float):
+        elapsed = time.monotonic() - started
+        error = None
+        data: Dict[str, Any] = {}
+        if future.cancelled():
+            error = "OCR cancelled"
+        elif future.exception() is not None:
+            error = str(future.exception()) or type(future.exception()).__name__
+        else:
+            data = future.result() or {}
+
+        with self._lock:
+            self._pending -= 1
+            self._stats["failed" if error else "completed"] += 1
+            self._avg_duration = elapsed if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * elapsed
+
+        if future.cancelled():
+            return  # shutting down; left queued so the next start picks it up
+        cache = get_ocr_cache() if content_hash and data and not error else None
+        if cache is not None:
+            try:
+                cache.put(content_hash, document_type, data)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not cache OCR result for document {document_id}: {e}")
+        self._store(document_id, data, error, elapsed)
+
+    def _store(self, document_id: int, data: Dict[str, Any], error: Optional[str], elapsed: float = 0.0):
+        """Write a result onto its Document row"""
+        try:
+            with self.session_factory() as db:
+                document = db.get(Document, document_id)
+                if document is None:
+                    return  # deleted while OCR ran
+                document.extracted_data = data
+                document.ocr_status = OCR_FAILED if error else OCR_DONE
+                document.ocr_error = error
+                document.ocr_completed_at = datetime.now(timezone.utc)
+                if not error:
+                    apply_to_profile(document, data)
+                db.commit()
+            if error:
+                logger.warning(f"⚠️ OCR failed for document {document_id}: {error}")
+            else:
+                logger.info(f"✅ OCR done for document {document_id} in {elapsed:.1f}s")
+        except Exception as e:
+            logger.error(f"❌ Could not store OCR result for document {document_id}: {e}")
+
+    def resume_pending(self) -> int:
+        """Re-submit documents left queued by a previous process"""
+        with self.session_factory() as db:
+            queued = db.query(Document.id, Document.file_url, Document.doc_type, Document.content_hash).filter(
+                Document.ocr_status == OCR_QUEUED
+            ).all()
+        resumed = 0
+        for document_id, file_url, doc_type, content_hash in queued:
+            try:
+                self.submit(document_id, file_url, getattr(doc_type, "value", doc_type), content_hash)
+                resumed += 1
+            except OCRCapacityError:
+                break
+        if resumed:
+            logger.info(f"🔁 Resumed OCR for {resumed} queued document(s)")
+        return resumed
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "pending": self._pending,
+                **self._stats,
+                "avg_duration_seconds": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+            }
+
+
+_ocr_pool: Optional[OCRWorkerPool] = None
+_ocr_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> OCRWorkerPool:
+    """Get or create the process-wide OCR pool"""
+    global _ocr_pool
+    if _ocr_pool is None:
+        with _ocr_pool_lock:
+            if _ocr_pool is None:
+                settings = get_settings()
+                _ocr_pool = OCRWorkerPool(
+                    max_workers=settings.OCR_WORKERS,
+                    queue_depth=settings.OCR_QUEUE_DEPTH,
+                    retry_after=settings.OCR_RETRY_AFTER,
+                )
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown()
+            _ocr_pool = None
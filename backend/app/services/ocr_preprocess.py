@@ -0,0 +1,159 @@
+"""
+OCR Preprocessing
+Prepares uploads for Tesseract, whose runtime grows with pixel count:
+
+    EXIF orientation -> grayscale -> crop to the document -> downscale to the
+    target DPI -> deskew -> binarise (Otsu)
+
+Phone photos are usually 12 MP of which the card is a fraction; after this
+stage Tesseract sees a straight, cropped, ~300 DPI black-and-white image.
+Steps and target resolution are set per document_type in
+PREPROCESS_PROFILES (physical width of the document, so an ID card and an
+A4 bill both land at the same DPI). Pillow only.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pipeline's output changes, so cached OCR results are recomputed
+PREPROCESS_VERSION = "1"
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "width_mm": 210,  # physical width of the document (A4)
+    "dpi": 300,  # Tesseract's sweet spot
+    "crop": True,
+    "deskew": True,
+    "binarize": True,
+}
+
+ID_CARD_MM = 85.6  # ISO/IEC 7810 ID-1: Aadhaar, PAN, voter ID
+
+PREPROCESS_PROFILES: Dict[str, Dict[str, Any]] = {
+    "aadhaar": {"width_mm": ID_CARD_MM},
+    "pan": {"width_mm": ID_CARD_MM},
+    "voter_id": {"width_mm": ID_CARD_MM},
+    "passport": {"width_mm": 125},
+    "electricity_bill": {"dpi": 250},
+    "gas_bill": {"dpi": 250},
+    "water_bill": {"dpi": 250},
+    # Stamp paper and old registry copies: faint text survives better in grayscale
+    "property_paper": {"binarize": False},
+}
+PROFILE_ALIASES = {"aadhar": "aadhaar", "property_document": "property_paper", "property_doc": "property_paper"}
+
+ANALYSIS_SIZE = 600  # longest side of the thumbnail used to find the crop and skew
+MAX_SKEW_DEGREES = 6.0
+CROP_MARGIN = 0.02
+
+
+def profile_for(document_type: Optional[str]) -> Dict[str, Any]:
+    """Preprocessing settings for a document type (unknown types get the default)"""
+    key = PROFILE_ALIASES.get(document_type or "", document_type or "")
+    return {**DEFAULT_PROFILE, **PREPROCESS_PROFILES.get(key, {})}
+
+
+def _thumbnail(image: Image.Image) -> Tuple[Image.Image, float]:
+    scale = min(1.0, ANALYSIS_SIZE / max(image.size))
+    if scale == 1.0:
+        return image, 1.0
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.BOX), scale
+
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Threshold that best separates ink from paper (grayscale image)"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_threshold, best_variance = 127, -1.0
+    for threshold, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += threshold * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+    return best_threshold
+
+
+def document_bbox(gray: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box of whatever differs from the photo's border (the document), in gray's pixels"""
+    thumb, scale = _thumbnail(gray)
+    border = [thumb.getpixel((x, y)) for x in (0, thumb.width - 1) for y in range(0, thumb.height, 8)]
+    border += [thumb.getpixel((x, y)) for y in (0, thumb.height - 1) for x in range(0, thumb.width, 8)]
+    background = sorted(border)[len(border) // 2]
+    difference = ImageChops.difference(thumb, Image.new("L", thumb.size, background))
+    mask = difference.point(lambda value: 255 if value > 40 else 0).filter(ImageFilter.MedianFilter(5))
+    box = mask.getbbox()
+    if not box:
+        return None
+    left, top, right, bottom = box
+    if (right - left) * (bottom - top) > 0.95 * thumb.width * thumb.height:
+        return None  # already just the document
+    margin_x, margin_y = CROP_MARGIN * thumb.width, CROP_MARGIN * thumb.height
+    return (
+        max(0, int((left - margin_x) / scale)),
+        max(0, int((top - margin_y) / scale)),
+        min(gray.width, int((right + margin_x) / scale)),
+        min(gray.height, int((bottom + margin_y) / scale)),
+    )
+
+
+def _line_score(ink: Image.Image, angle: float) -> float:
+    """
+    How sharply row ink density changes: highest when text lines are
+    horizontal. Differences (not variance) so background wedges left at the
+    document's corners, which change smoothly row to row, don't dominate.
+    """
+    rotated = ink.rotate(angle, resample=Image.Resampling.NEAREST, expand=False)
+    rows = list(rotated.resize((1, rotated.height), Image.Resampling.BOX).getdata())
+    return sum((below - above) ** 2 for above, below in zip(rows, rows[1:]))
+
+
+def skew_angle(gray: Image.Image) -> float:
+    """Rotation (degrees, counter-clockwise) that straightens the text lines"""
+    thumb, _ = _thumbnail(gray)
+    ink = thumb.point(lambda value, t=otsu_threshold(thumb): 255 if value < t else 0)
+    # Coarse 1° search, then refine around the best angle in 0.2° steps
+    best = max((step * 1.0 for step in range(-int(MAX_SKEW_DEGREES), int(MAX_SKEW_DEGREES) + 1)),
+               key=lambda angle: _line_score(ink, angle))
+    return max((best + step * 0.2 for step in range(-4, 5)), key=lambda angle: _line_score(ink, angle))
+
+
+def preprocess(image: Image.Image, document_type: Optional[str] = None) -> Image.Image:
+    """Tesseract-ready version of an uploaded document image"""
+    profile = profile_for(document_type)
+    image = ImageOps.exif_transpose(image)
+    gray = image.convert("L")
+
+    if profile["crop"]:
+        box = document_bbox(gray)
+        if box:
+            gray = gray.crop(box)
+
+    target_width = round(profile["width_mm"] / 25.4 * profile["dpi"])
+    if gray.width > target_width:
+        height = max(1, round(gray.height * target_width / gray.width))
+        gray = gray.resize((target_width, height), Image.Resampling.LANCZOS)
+
+    if profile["deskew"]:
+        angle = skew_angle(gray)
+        if abs(angle) >= 0.2:
+            gray = gray.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+    if profile["binarize"]:
+        threshold = otsu_threshold(gray)
+        gray = gray.point(lambda value: 255 if value > threshold else 0).convert("1")
+
+    return gray
@@ -1,170 +1,79 @@
 """
 OCR Service for extracting data from documents
-Supports: Aadhar Card, PAN Card, Electricity Bill, Gas Bill, etc.
+Supports: Aadhar Card, PAN Card, Voter ID, Electricity/Gas/Water Bill,
+Property Paper (field patterns live in ocr_extractors)
 """
-import re
 from typing import Dict, Optional
 import pytesseract
 from PIL import Image
 import io
+import logging
+
+from app.config import get_settings
+from app.services.object_storage import get_object_storage
+from app.services.ocr_extractors import extract_fields, get_extractor
+from app.services.ocr_preprocess import preprocess
+
+logger = logging.getLogger(__name__)
+
+class OCRError(Exception):
+    """OCR of a document failed (raised from the OCR worker processes)"""
+
+# Bump when an extractor changes, so cached OCR results are recomputed
+EXTRACTOR_VERSION = "2"
 
 class OCRService:
     """Extract text and structured data from documents"""
     
     @staticmethod
-    def extract_text_from_image(image_bytes: bytes) -> str:
-        """Extract raw text from image using Tesseract OCR"""
+    def extract_text_from_image(image_bytes: bytes, document_type: Optional[str] = None) -> str:
+        """Extract raw text from image using Tesseract OCR (after preprocessing for the document type)"""
+        return OCRService.extract_text_from_file(io.BytesIO(image_bytes), document_type)
+    
+    @staticmethod
+    def extract_text_from_file(path, document_type: Optional[str] = None) -> str:
+        """Same as extract_text_from_image for a saved file (path or file object), decoded straight from disk"""
         try:
-            image = Image.open(io.BytesIO(image_bytes))
-            text = pytesseract.image_to_string(image)
-            return text
+            return OCRService.read_text(path, document_type)
         except Exception as e:
-            print(f"OCR Error: {e}")
+            logger.warning(f"⚠️ OCR Error: {e}")
             return ""
     
+    @staticmethod
+    def read_text(path, document_type: Optional[str] = None) -> str:
+        """Tesseract text of an image; unlike extract_text_from_file, PIL/Tesseract errors propagate"""
+        image = Image.open(path)
+        if get_settings().OCR_PREPROCESS_ENABLED:
+            image = preprocess(image, document_type)
+        return pytesseract.image_to_string(image)
+    
     @staticmethod
     def extract_aadhar_data(text: str) -> Dict[str, str]:
         """Extract Aadhar card details"""
-        data = {}
-        
-        # Extract Aadhar number (12 digits)
-        aadhar_pattern = r'\b\d{4}\s?\d{4}\s?\d{4}\b'
-        aadhar_match = re.search(aadhar_pattern, text)
-        if aadhar_match:
-            data['aadhar'] = aadhar_match.group().replace(' ', '')
-        
-        # Extract name (usually after "Name:" or before "DOB:")
-        name_patterns = [
-            r'(?:Name|नाम)[:\s]+([A-Za-z\s]+)',
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-        ]
-        for pattern in name_patterns:
-            name_match = re.search(pattern, text, re.IGNORECASE)
-            if name_match:
-                data['name'] = name_match.group(1).strip()
-                break
-        
-        # Extract DOB
-        dob_pattern = r'(?:DOB|Date of Birth|जन्म तिथि)[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})'
-        dob_match = re.search(dob_pattern, text, re.IGNORECASE)
-        if dob_match:
-            data['dob'] = dob_match.group(1)
-        
-        # Extract Address
-        address_pattern = r'(?:Address|पता)[:\s]+(.+?)(?=\n\n|\Z)'
-        address_match = re.search(address_pattern, text, re.IGNORECASE | re.DOTALL)
-        if address_match:
-            data['address'] = address_match.group(1).strip()
-        
-        return data
+        return extract_fields('aadhaar', text)
     
     @staticmethod
     def extract_electricity_bill_data(text: str) -> Dict[str, str]:
         """Extract electricity bill details"""
-        data = {}
-        
-        # Consumer number patterns
-        consumer_patterns = [
-            r'(?:Consumer No|Consumer Number|उपभोक्ता संख्या)[:\s]+([A-Z0-9]+)',
-            r'(?:Account No|खाता संख्या)[:\s]+([A-Z0-9]+)'
-        ]
-        for pattern in consumer_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['consumer_number'] = match.group(1).strip()
-                break
-        
-        # Name
-        name_patterns = [
-            r'(?:Name|नाम)[:\s]+([A-Za-z\s]+)',
-            r'(?:Consumer Name)[:\s]+([A-Za-z\s]+)'
-        ]
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['name'] = match.group(1).strip()
-                break
-        
-        # Address
-        address_pattern = r'(?:Address|पता)[:\s]+(.+?)(?=\n\n|Bill|Amount|\Z)'
-        address_match = re.search(address_pattern, text, re.IGNORECASE | re.DOTALL)
-        if address_match:
-            data['address'] = address_match.group(1).strip()
-        
-        # Mobile number
-        mobile_pattern = r'(?:Mobile|Mob|मोबाइल)[:\s]+([6-9]\d{9})'
-        mobile_match = re.search(mobile_pattern, text, re.IGNORECASE)
-        if mobile_match:
-            data['mobile'] = mobile_match.group(1)
-        
-        return data
+        return extract_fields('electricity_bill', text)
     
     @staticmethod
     def extract_gas_bill_data(text: str) -> Dict[str, str]:
         """Extract gas bill details"""
-        data = {}
-        
-        # Consumer/Customer number
-        consumer_patterns = [
-            r'(?:Consumer No|Customer No|BP No)[:\s]+([A-Z0-9]+)',
-            r'(?:उपभोक्ता संख्या)[:\s]+([A-Z0-9]+)'
-        ]
-        for pattern in consumer_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data['consumer_number'] = match.group(1).strip()
-                break
-        
-        # Name
-        name_pattern = r'(?:Name|Customer Name|नाम)[:\s]+([A-Za-z\s]+)'
-        name_match = re.search(name_pattern, text, re.IGNORECASE)
-        if name_match:
-            data['name'] = name_match.group(1).strip()
-        
-        # Address
-        address_pattern = r'(?:Address|पता)[:\s]+(.+?)(?=\n\n|Bill|Amount|\Z)'
-        address_match = re.search(address_pattern, text, re.IGNORECASE | re.DOTALL)
-        if address_match:
-            data['address'] = address_match.group(1).strip()
-        
-        # Mobile
-        mobile_pattern = r'(?:Mobile|Contact|मोबाइल)[:\s]+([6-9]\d{9})'
-        mobile_match = re.search(mobile_pattern, text, re.IGNORECASE)
-        if mobile_match:
-            data['mobile'] = mobile_match.group(1)
-        
-        return data
+        return extract_fields('gas_bill', text)
     
     @staticmethod
     def extract_pan_card_data(text: str) -> Dict[str, str]:
         """Extract PAN card details"""
-        data = {}
-        
-        # PAN number
-        pan_pattern = r'\b[A-Z]{5}\d{4}[A-Z]\b'
-        pan_match = re.search(pan_pattern, text)
-        if pan_match:
-            data['pan'] = pan_match.group()
-        
-        # Name
-        name_pattern = r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-        name_match = re.search(name_pattern, text)
-        if name_match:
-            data['name'] = name_match.group(1).strip()
-        
-        # Father's name
-        father_pattern = r"(?:Father's Name)[:\s]+([A-Za-z\s]+)"
-        father_match = re.search(father_pattern, text, re.IGNORECASE)
-        if father_match:
-            data['father_name'] = father_match.group(1).strip()
-        
-        # DOB
-        dob_pattern = r'(\d{2}[/-]\d{2}[/-]\d{4})'
-        dob_match = re.search(dob_pattern, text)
-        if dob_match:
-            data['dob'] = dob_match.group(1)
-        
-        return data
+        return extract_fields('pan', text)
+    
+    @classmethod
+    def process_file(cls, path: str, document_type: str) -> Dict[str, str]:
+        """
+        process_document for a saved upload, without reading it into memory
+        first. OCR errors are raised, so the worker pool can mark the document failed.
+        """
+        return cls.extract_data(cls.read_text(path, document_type), document_type)
     
     @classmethod
     def process_document(cls, image_bytes: bytes, document_type: str) -> Dict[str, str]:
@@ -173,33 +82,43 @@ class OCRService:
         
         Args:
             image_bytes: Image file bytes
-            document_type: Type of document (aadhar, pan, electricity_bill, gas_bill, etc.)
+            document_type: Type of document (aadhar, pan, voter_id, electricity_bill, gas_bill, water_bill, property_paper, etc.)
         
         Returns:
             Dictionary with extracted data
         """
         # Extract text from image
-        text = cls.extract_text_from_image(image_bytes)
-        
+        text = cls.extract_text_from_image(image_bytes, document_type)
+        return cls.extract_data(text, document_type)
+    
+    @classmethod
+    def extract_data(cls, text: str, document_type: str) -> Dict[str, str]:
+        """Fields of an OCR'd document"""
         if not text:
             return {}
         
-        # Process based on document type
-        if document_type == 'aadhar':
-            return cls.extract_aadhar_data(text)
-        elif document_type == 'electricity_bill':
-            return cls.extract_electricity_bill_data(text)
-        elif document_type == 'gas_bill':
-            return cls.extract_gas_bill_data(text)
-        elif document_type == 'pan':
-            return cls.extract_pan_card_data(text)
-        else:
-            # Generic extraction
-            return {
-                'raw_text': text,
-                'name': cls.extract_aadhar_data(text).get('name', ''),
-                'address': cls.extract_aadhar_data(text).get('address', '')
-            }
+        # Process based on document type (see ocr_extractors.EXTRACTORS)
+        extractor = get_extractor(document_type)
+        if extractor is not None:
+            return extractor.extract(text)
+        # Generic extraction
+        identity = cls.extract_aadhar_data(text)
+        return {
+            'raw_text': text,
+            'name': identity.get('name', ''),
+            'address': identity.get('address', '')
+        }
 
 # Singleton instance
 ocr_service = OCRService()
+
+
+def run_ocr(key: str, document_type: str) -> Dict[str, str]:
+    """OCR an upload in object storage (entry point for the OCR worker processes)"""
+    try:
+        with get_object_storage().local_path(key) as path:
+            return OCRService.process_file(path, document_type)
+    except Exception as e:
+        # Errors are pickled back to the API process, and some library exceptions
+        # (TesseractNotFoundError) can't be unpickled - that would break the whole pool
+        raise OCRError(f"{type(e).__name__}: {e}") from None
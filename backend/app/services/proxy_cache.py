@@ -0,0 +1,285 @@
+"""
+Proxy Response Cache
+The iframe proxy used to fetch, rewrite and re-inject the same near-static
+page on every load. Rewritten pages are now kept per (variant, URL) - the
+variant names the rewrite, since routes rewrite one URL differently - and follow the
+upstream's caching headers, like a shared HTTP cache:
+
+- Cache-Control no-store / private: never stored
+- max-age / s-maxage / Expires: served from memory while fresh
+- no-cache, or stale with an ETag/Last-Modified: revalidated with
+  If-None-Match / If-Modified-Since; a 304 costs no body and no rewrite
+- no freshness information: PROXY_CACHE_DEFAULT_TTL
+
+A miss is streamed: the upstream body goes through StreamingHtmlRewriter to
+the client as it arrives (StreamedPage), and is stored once complete if it
+fits PROXY_CACHE_MAX_PAGE_KB. Lookups and revalidations of one URL are
+serialised; cached pages carry their own ETag (of the rewritten HTML) so
+browsers revalidate against us.
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from app.config import get_settings
+from app.services.html_rewriter import StreamingHtmlRewriter
+from app.services.http_clients import get_http_client
+
+logger = logging.getLogger(__name__)
+
+HIT, MISS, REVALIDATED = "HIT", "MISS", "REVALIDATED"
+# Upstream headers kept with a page; a 304 updates them
+CACHE_HEADERS = ("cache-control", "expires", "date", "etag", "last-modified")
+
+# (variant, upstream URL)
+CacheKey = Tuple[str, str]
+
+
+class UpstreamStatusError(Exception):
+    """The upstream answered with something other than 200/304"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Upstream returned {status_code}")
+        self.status_code = status_code
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.isdigit() else None
+
+
+def freshness(headers: httpx.Headers, default_ttl: int) -> Optional[Tuple[int, bool]]:
+    """(max_age, must_revalidate) for a response, or None if it may not be stored"""
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives:
+        return None
+    must_revalidate = "no-cache" in directives
+    max_age = _seconds(directives.get("s-maxage")) if "s-maxage" in directives else _seconds(directives.get("max-age"))
+    if max_age is None and headers.get("expires"):
+        try:
+            expires = parsedate_to_datetime(headers["expires"]).timestamp()
+            date = parsedate_to_datetime(headers["date"]).timestamp() if headers.get("date") else time.time()
+            max_age = max(0, int(expires - date))
+        except (TypeError, ValueError):
+            max_age = 0  # an invalid Expires means already expired
+    if max_age is None:
+        max_age = default_ttl
+    return max_age, must_revalidate
+
+
+class CachedPage:
+    """A rewritten upstream page and what is needed to revalidate it"""
+
+    def __init__(self, url: str, body: str, headers: httpx.Headers, policy: Optional[Tuple[int, bool]]):
+        self.url = url
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:20] + '"'
+        self.headers = httpx.Headers({name: headers[name] for name in CACHE_HEADERS if name in headers})
+        self.cacheable = policy is not None
+        self.status = MISS
+        self.refresh(policy)
+
+    def refresh(self, policy: Optional[Tuple[int, bool]]):
+        self.stored_at = time.monotonic()
+        self.max_age, self.must_revalidate = policy or (0, True)
+
+    def remaining(self) -> int:
+        """Seconds this page stays fresh (0 when it must be revalidated)"""
+        if self.must_revalidate:
+            return 0
+        return max(0, int(self.max_age - (time.monotonic() - self.stored_at)))
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class StreamedPage:
+    """A miss being rewritten while the client receives it; cached once complete"""
+
+    status = MISS
+
+    def __init__(self, cache: "ProxyCache", key: CacheKey, response: httpx.Response, stack: AsyncExitStack,
+                 rewriter: StreamingHtmlRewriter, policy: Optional[Tuple[int, bool]]):
+        self.cache = cache
+        self.key = key
+        self.url = key[1]
+        self.response = response
+        self.rewriter = rewriter
+        self.policy = policy
+        self.cacheable = policy is not None
+        self._stack = stack
+
+    def remaining(self) -> int:
+        max_age, must_revalidate = self.policy or (0, True)
+        return 0 if must_revalidate else max_age
+
+    async def body(self) -> AsyncIterator[bytes]:
+        keep = self.cacheable and self.cache.max_entries > 0
+        parts: List[str] = []
+        size = 0
+
+        async def rewritten() -> AsyncIterator[str]:
+            async for chunk in self.response.aiter_text():
+                yield self.rewriter.feed(chunk)
+            yield self.rewriter.close()
+
+        async for text in rewritten():
+            if not text:
+                continue
+            data = text.encode()
+            size += len(data)
+            if keep:
+                parts.append(text)
+                if size > self.cache.max_page_bytes:
+                    keep, parts = False, []  # too big to cache; stop holding on to it
+            yield data
+        self.cache._complete(self, "".join(parts) if keep else None, size)
+
+    async def aclose(self):
+        """Release the upstream connection (also when the client went away mid-stream)"""
+        await self._stack.aclose()
+
+
+class ProxyCache:
+    """LRU of rewritten pages keyed by rewrite variant and upstream URL"""
+
+    def __init__(self, max_entries: int = 200, default_ttl: int = 300, max_page_bytes: int = 2 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_page_bytes = max_page_bytes
+        self._entries: "OrderedDict[CacheKey, CachedPage]" = OrderedDict()
+        self._locks: Dict[CacheKey, asyncio.Lock] = {}
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "uncacheable": 0, "evicted": 0,
+                       "upstream_requests": 0, "upstream_bytes": 0, "served_bytes": 0}
+
+    async def fetch(self, url: str, rewriter: Callable[[], StreamingHtmlRewriter],
+                    headers: Optional[Dict[str, str]] = None, variant: str = "") -> Union[CachedPage, StreamedPage]:
+        """
+        The rewritten page for url: cached (fresh or revalidated), or a
+        StreamedPage whose body() rewrites the upstream response on the fly.
+        variant identifies the rewriter, so differently rewritten copies of
+        one URL never stand in for each other. The caller must aclose() a StreamedPage.
+        """
+        key = (variant, url)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:  # one lookup/revalidation per page at a time
+            try:
+                page = await self._fetch(key, rewriter, headers or {})
+            finally:
+                if key not in self._entries:
+                    self._locks.pop(key, None)
+        if isinstance(page, CachedPage):
+            self._stats["served_bytes"] += len(page.body)
+        return page
+
+    async def _fetch(self, key: CacheKey, rewriter: Callable[[], StreamingHtmlRewriter],
+                     headers: Dict[str, str]) -> Union[CachedPage, StreamedPage]:
+        url = key[1]
+        entry = self._entries.get(key)
+        if entry is not None and entry.remaining() > 0:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            entry.status = HIT
+            return entry
+
+        request_headers = {**headers, **(entry.validators() if entry is not None else {})}
+        stack = AsyncExitStack()
+        response = await stack.enter_async_context(
+            get_http_client("proxy").stream("GET", url, headers=request_headers)
+        )
+        self._stats["upstream_requests"] += 1
+        if response.status_code != 200:
+            await stack.aclose()
+
+        if entry is not None and response.status_code == 304:
+            entry.headers.update({name: response.headers[name] for name in CACHE_HEADERS if name in response.headers})
+            entry.refresh(freshness(entry.headers, self.default_ttl) or (0, True))
+            self._entries.move_to_end(key)
+            self._stats["revalidated"] += 1
+            entry.status = REVALIDATED
+            return entry
+        if response.status_code != 200:
+            raise UpstreamStatusError(response.status_code)
+
+        self._stats["misses"] += 1
+        return StreamedPage(self, key, response, stack, rewriter(), freshness(response.headers, self.default_ttl))
+
+    def _complete(self, streamed: StreamedPage, body: Optional[str], size: int):
+        """A StreamedPage was sent whole; keep it if it may be and fits"""
+        self._stats["upstream_bytes"] += streamed.response.num_bytes_downloaded
+        self._stats["served_bytes"] += size
+        if body is None:
+            self._stats["uncacheable"] += 1
+            self._entries.pop(streamed.key, None)
+            return
+        self._entries[streamed.key] = CachedPage(streamed.url, body, streamed.response.headers, streamed.policy)
+        self._entries.move_to_end(streamed.key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._locks.pop(evicted, None)
+            self._stats["evicted"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["revalidated"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            **self._stats,
+            # Served without downloading the page again
+            "hit_rate": round((self._stats["hits"] + self._stats["revalidated"]) / lookups, 3) if lookups else None,
+        }
+
+
+class StaticAsset:
+    """A file served with a content ETag; version goes in its URL so it can be cached for long"""
+
+    def __init__(self, path: str, media_type: str):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.media_type = media_type
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.version = digest[:10]
+        self.etag = f'"{digest[:20]}"'
+
+
+_proxy_cache: Optional[ProxyCache] = None
+_proxy_cache_lock = threading.Lock()
+
+
+def get_proxy_cache() -> ProxyCache:
+    global _proxy_cache
+    if _proxy_cache is None:
+        with _proxy_cache_lock:
+            if _proxy_cache is None:
+                settings = get_settings()
+                _proxy_cache = ProxyCache(
+                    max_entries=settings.PROXY_CACHE_MAX_ENTRIES if settings.PROXY_CACHE_ENABLED else 0,
+                    default_ttl=settings.PROXY_CACHE_DEFAULT_TTL,
+                    max_page_bytes=settings.PROXY_CACHE_MAX_PAGE_KB * 1024,
+                )
+    return _proxy_cache
@@ -0,0 +1,255 @@
+"""
+Resource Blocker
+Keeps automation browsers from downloading what a form fill never needs:
+images, fonts, media and third-party analytics/ad/social hosts. Blocking is
+done per tab with CDP Network.setBlockedURLs, using a profile chosen per
+portal, and every job reports what it saved.
+
+setBlockedURLs matches URL wildcards, not resource types, so types are
+blocked by file extension. It has no exceptions either: a profile's "allow"
+patterns remove matching deny patterns before they are sent. Portals whose
+captcha is an image keep images.
+
+Visible browsers only drop the invisible categories (analytics, ads,
+social) so the user still sees the real page.
+
+Requests and bytes are counted from ChromeDriver's performance log
+(Network.loadingFinished / loadingFailed with blockedReason "inspector").
+Bytes saved is an estimate: blocked requests are costed at the average size
+seen for their resource type.
+"""
+
+import json
+import fnmatch
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Deny patterns per category
+CATEGORY_PATTERNS: Dict[str, List[str]] = {
+    "images": [f"*.{ext}{suffix}" for ext in ("png", "jpg", "jpeg", "gif", "webp", "bmp", "ico", "svg") for suffix in ("", "?*")],
+    "fonts": [f"*.{ext}{suffix}" for ext in ("woff", "woff2", "ttf", "otf", "eot") for suffix in ("", "?*")]
+             + ["*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "media": [f"*.{ext}{suffix}" for ext in ("mp4", "webm", "mp3", "ogg", "m4a", "avi", "mov") for suffix in ("", "?*")],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*analytics.google.com*", "*hotjar.com*",
+        "*clarity.ms*", "*mixpanel.com*", "*segment.io*", "*nr-data.net*", "*newrelic.com*",
+    ],
+    "ads": [
+        "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+        "*amazon-adsystem.com*", "*taboola.com*", "*outbrain.com*",
+    ],
+    "social": [
+        "*connect.facebook.net*", "*facebook.com/tr*", "*platform.twitter.com*", "*platform.linkedin.com*",
+        "*addthis.com*", "*sharethis.com*",
+    ],
+}
+
+# Categories the user can't see missing
+INVISIBLE_CATEGORIES = ("analytics", "ads", "social")
+
+# Per-portal profiles (supplier id); "default" covers everything else
+RESOURCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {"block": ["images", "fonts", "media", "analytics", "ads", "social"]},
+    # Captcha is an image the user has to read
+    "torrent-power": {"block": ["fonts", "media", "analytics", "ads", "social"]},
+    "pgvcl": {"block": ["fonts", "media", "analytics", "ads", "social"]},
+    "ugvcl": {"block": ["fonts", "media", "analytics", "ads", "social"]},
+    "mgvcl": {"block": ["fonts", "media", "analytics", "ads", "social"]},
+    "dgvcl": {"block": ["fonts", "media", "analytics", "ads", "social"]},
+    # Captcha is served as a GIF
+    "adani-gas": {"block": ["images", "fonts", "media", "analytics", "ads", "social"], "allow": ["*.gif", "*.gif?*"]},
+}
+
+# Fallback sizes (bytes) for costing blocked requests before any were seen
+TYPICAL_BYTES = {"Image": 40_000, "Font": 35_000, "Media": 500_000, "Script": 60_000, "Stylesheet": 20_000}
+DEFAULT_TYPICAL_BYTES = 15_000
+
+
+def profile_patterns(portal: Optional[str] = None, visible: bool = False) -> List[str]:
+    """URL patterns to block for a portal"""
+    profiles = RESOURCE_PROFILES
+    profile = profiles.get(portal or "") or profiles.get(get_settings().RESOURCE_BLOCKING_DEFAULT_PROFILE) or profiles["default"]
+    categories = [c for c in profile.get("block", []) if not visible or c in INVISIBLE_CATEGORIES]
+    patterns = [p for c in categories for p in CATEGORY_PATTERNS.get(c, [])] + list(profile.get("deny", []))
+    allow = profile.get("allow", [])
+    return [p for p in dict.fromkeys(patterns) if not any(fnmatch.fnmatchcase(p, a) for a in allow)]
+
+
+class _Totals:
+    """Process-wide counters and per-type average sizes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = 0
+        self.requests_loaded = 0
+        self.requests_blocked = 0
+        self.bytes_loaded = 0
+        self.bytes_saved_estimate = 0
+        self._size_sum: Dict[str, int] = {}
+        self._size_count: Dict[str, int] = {}
+
+    def learn(self, resource_type: str, size: int):
+        with self.lock:
+            self._size_sum[resource_type] = self._size_sum.get(resource_type, 0) + size
+            self._size_count[resource_type] = self._size_count.get(resource_type, 0) + 1
+
+    def typical(self, resource_type: str) -> int:
+        with self.lock:
+            count = self._size_count.get(resource_type)
+            if count:
+                return self._size_sum[resource_type] // count
+        return TYPICAL_BYTES.get(resource_type, DEFAULT_TYPICAL_BYTES)
+
+    def add(self, report: Dict[str, Any]):
+        with self.lock:
+            self.jobs += 1
+            self.requests_loaded += report["requests_loaded"]
+            self.requests_blocked += report["requests_blocked"]
+            self.bytes_loaded += report["bytes_loaded"]
+            self.bytes_saved_estimate += report["bytes_saved_estimate"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "enabled": get_settings().RESOURCE_BLOCKING_ENABLED,
+                "jobs": self.jobs,
+                "requests_loaded": self.requests_loaded,
+                "requests_blocked": self.requests_blocked,
+                "bytes_loaded": self.bytes_loaded,
+                "bytes_saved_estimate": self.bytes_saved_estimate,
+            }
+
+
+_totals = _Totals()
+
+# id(driver) -> {target id: blocker}; one performance log is shared by all tabs
+_listeners: Dict[int, Dict[str, "ResourceBlocker"]] = {}
+_listeners_lock = threading.Lock()
+
+
+def _pump(driver):
+    """Read the driver's performance log and hand each event to its tab's blocker"""
+    try:
+        entries = driver.get_log("performance")
+    except WebDriverException:
+        return
+    with _listeners_lock:
+        listeners = dict(_listeners.get(id(driver), {}))
+    if not listeners:
+        return
+    only = next(iter(listeners.values())) if len(listeners) == 1 else None
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])
+        except (KeyError, ValueError):
+            continue
+        blocker = listeners.get(message.get("webview")) or only
+        if blocker is not None:
+            event = message.get("message", {})
+            blocker._on_event(event.get("method"), event.get("params", {}))
+
+
+class ResourceBlocker:
+    """Blocking and accounting for one job's tab"""
+
+    def __init__(self, driver, portal: Optional[str] = None, visible: bool = False):
+        self.driver = driver
+        self.portal = portal
+        self.patterns = profile_patterns(portal, visible)
+        self.target = None
+        self._types: Dict[str, str] = {}
+        self.loaded = 0
+        self.bytes_loaded = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self._report: Optional[Dict[str, Any]] = None
+
+    def start(self) -> "ResourceBlocker":
+        self.target = self.driver.current_window_handle
+        _pump(self.driver)  # flush events from before this job
+        open_tabs = set(self.driver.window_handles)
+        with _listeners_lock:
+            tabs = _listeners.setdefault(id(self.driver), {})
+            # Jobs that died before reporting leave listeners on closed tabs
+            for target in [t for t in tabs if t not in open_tabs]:
+                del tabs[target]
+            tabs[self.target] = self
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+        logger.info(f"🧱 Blocking {len(self.patterns)} resource patterns for {self.portal or 'default'} profile")
+        return self
+
+    def _on_event(self, method: str, params: Dict[str, Any]):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            self._types[request_id] = params.get("type", "Other")
+        elif method == "Network.responseReceived":
+            self._types[request_id] = params.get("type", self._types.get(request_id, "Other"))
+        elif method == "Network.loadingFinished":
+            size = int(params.get("encodedDataLength") or 0)
+            resource_type = self._types.get(request_id, "Other")
+            self.loaded += 1
+            self.bytes_loaded += size
+            _totals.learn(resource_type, size)
+        elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            resource_type = params.get("type") or self._types.get(request_id, "Other")
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        """Stop listening and return what this job loaded and saved"""
+        if self._report is not None:
+            return self._report
+        _pump(self.driver)
+        with _listeners_lock:
+            tabs = _listeners.get(id(self.driver), {})
+            tabs.pop(self.target, None)
+            if not tabs:
+                _listeners.pop(id(self.driver), None)
+        saved = sum(count * _totals.typical(t) for t, count in self.blocked_by_type.items())
+        report = {
+            "profile": self.portal if self.portal in RESOURCE_PROFILES else "default",
+            "requests_loaded": self.loaded,
+            "requests_blocked": sum(self.blocked_by_type.values()),
+            "blocked_by_type": dict(self.blocked_by_type),
+            "bytes_loaded": self.bytes_loaded,
+            "bytes_saved_estimate": saved,
+        }
+        _totals.add(report)
+        self._report = report
+        logger.info(
+            f"🧱 Resources: {report['requests_blocked']} requests blocked (~{saved // 1024} KB saved), "
+            f"{self.loaded} loaded ({self.bytes_loaded // 1024} KB)"
+        )
+        return report
+
+
+def block_resources(driver, portal: Optional[str] = None, visible: bool = False) -> Optional[ResourceBlocker]:
+    """Start blocking on the driver's current tab; None when disabled or unsupported"""
+    if not get_settings().RESOURCE_BLOCKING_ENABLED:
+        return None
+    try:
+        return ResourceBlocker(driver, portal, visible).start()
+    except WebDriverException as e:
+        logger.warning(f"⚠️ Resource blocking unavailable: {e}")
+        return None
+
+
+def resource_report(blocker: Optional[ResourceBlocker]) -> Optional[Dict[str, Any]]:
+    """The blocker's report, or None if blocking was off; never raises"""
+    if blocker is None:
+        return None
+    try:
+        return blocker.report()
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Resource report unavailable: {e}")
+        return None
+
+
+def resource_blocking_stats() -> Dict[str, Any]:
+    return _totals.snapshot()
@@ -0,0 +1,300 @@
+"""
+RPA Job Queue
+Durable work queue on top of the rpa_submissions table.
+API processes enqueue jobs; workers (app.worker) claim them with a lease,
+heartbeat while the browser runs and record the result. A job whose lease
+expires (worker crashed or was killed) is put back with exponential backoff
+until max_retries is used up.
+
+Claiming is atomic: SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, and a
+compare-and-swap UPDATE on the lease token everywhere else (SQLite).
+"""
+
+import math
+import random
+import socket
+import os
+import uuid
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import RPASubmission, RPASubmissionStatus
+
+logger = logging.getLogger(__name__)
+
+CLAIMABLE_STATUSES = (RPASubmissionStatus.QUEUED, RPASubmissionStatus.RETRY)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class ClaimedJob:
+    """A job leased to one worker"""
+
+    def __init__(self, job: RPASubmission):
+        self.id = job.id
+        self.job_type = job.job_type
+        self.payload = dict(job.submission_data or {})
+        self.lease_token = job.lease_token
+        self.attempt = (job.retry_count or 0) + 1
+        self.max_retries = job.max_retries
+
+
+class RPAJobQueue:
+    """Enqueue, claim, heartbeat, complete and fail RPA jobs"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        visibility_timeout: int = 300,
+        backoff_base: int = 30,
+        backoff_max: int = 900,
+    ):
+        self.session_factory = session_factory
+        self.visibility_timeout = visibility_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    # ------------------------------------------------------------------ API side
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        target_website: Optional[str] = None,
+        target_url: Optional[str] = None,
+        application_id: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        db: Optional[Session] = None,
+    ) -> RPASubmission:
+        """Insert a job; it becomes claimable immediately"""
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            job = RPASubmission(
+                job_type=job_type,
+                application_id=application_id,
+                target_website=target_website,
+                target_url=target_url,
+                submission_data=payload,
+                status=RPASubmissionStatus.QUEUED,
+                retry_count=0,
+                max_retries=get_settings().RPA_QUEUE_MAX_RETRIES if max_retries is None else max_retries,
+                next_attempt_at=utcnow(),
+                progress={"message": "🚀 Queued, waiting for a browser worker..."},
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            logger.info(f"Enqueued RPA job {job.id} ({job_type})")
+            return job
+        finally:
+            if own_session:
+                db.close()
+
+    def get(self, job_id: int, db: Optional[Session] = None) -> Optional[RPASubmission]:
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            job = db.get(RPASubmission, job_id)
+            if job is not None and own_session:
+                db.expunge(job)
+            return job
+        finally:
+            if own_session:
+                db.close()
+
+    # --------------------------------------------------------------- worker side
+
+    def claim(self, worker_id: str, job_types: Optional[List[str]] = None) -> Optional[ClaimedJob]:
+        """Lease the next due job to this worker, or return None"""
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                return self._claim_skip_locked(db, worker_id, job_types)
+            return self._claim_compare_and_swap(db, worker_id, job_types)
+        finally:
+            db.close()
+
+    def _due_filter(self, now: datetime, job_types: Optional[List[str]]):
+        clauses = [
+            RPASubmission.status.in_(CLAIMABLE_STATUSES),
+            or_(RPASubmission.next_attempt_at.is_(None), RPASubmission.next_attempt_at <= now),
+        ]
+        if job_types:
+            clauses.append(RPASubmission.job_type.in_(job_types))
+        return and_(*clauses)
+
+    def _lease_values(self, worker_id: str, now: datetime) -> Dict[str, Any]:
+        return {
+            "status": RPASubmissionStatus.PROCESSING,
+            "lease_token": str(uuid.uuid4()),
+            "locked_by": worker_id,
+            "lease_expires_at": now + timedelta(seconds=self.visibility_timeout),
+            "started_at": now,
+        }
+
+    def _claim_skip_locked(self, db: Session, worker_id: str, job_types) -> Optional[ClaimedJob]:
+        now = utcnow()
+        job = (
+            db.query(RPASubmission)
+            .filter(self._due_filter(now, job_types))
+            .order_by(RPASubmission.next_attempt_at, RPASubmission.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.rollback()
+            return None
+        for key, value in self._lease_values(worker_id, now).items():
+            setattr(job, key, value)
+        db.commit()
+        db.refresh(job)
+        return ClaimedJob(job)
+
+    def _claim_compare_and_swap(self, db: Session, worker_id: str, job_types) -> Optional[ClaimedJob]:
+        now = utcnow()
+        candidates = (
+            db.query(RPASubmission.id)
+            .filter(self._due_filter(now, job_types))
+            .order_by(RPASubmission.next_attempt_at, RPASubmission.id)
+            .limit(5)
+            .all()
+        )
+        for (job_id,) in candidates:
+            values = self._lease_values(worker_id, now)
+            result = db.execute(
+                update(RPASubmission)
+                .where(RPASubmission.id == job_id, self._due_filter(now, job_types))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            if result.rowcount == 1:
+                job = db.get(RPASubmission, job_id)
+                return ClaimedJob(job)
+        return None
+
+    def _update_leased(self, job_id: int, lease_token: str, values: Dict[str, Any]) -> bool:
+        """Update a job only while this worker still holds its lease"""
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                update(RPASubmission)
+                .where(RPASubmission.id == job_id, RPASubmission.lease_token == lease_token)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id: int, lease_token: str, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """Extend the lease; returns False if the job was taken away"""
+        values: Dict[str, Any] = {"lease_expires_at": utcnow() + timedelta(seconds=self.visibility_timeout)}
+        if progress is not None:
+            values["progress"] = progress
+        return self._update_leased(job_id, lease_token, values)
+
+    def complete(self, job_id: int, lease_token: str, result: Dict[str, Any], confirmation_number: Optional[str] = None) -> bool:
+        return self._update_leased(job_id, lease_token, {
+            "status": RPASubmissionStatus.SUCCESS,
+            "response_data": result,
+            "confirmation_number": confirmation_number,
+            "error_message": None,
+            "completed_at": utcnow(),
+            "lease_token": None,
+            "lease_expires_at": None,
+            "locked_by": None,
+        })
+
+    def backoff_seconds(self, attempt: int) -> int:
+        """Exponential backoff with full jitter"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempt - 1)))
+        return max(1, math.ceil(random.uniform(ceiling / 2, ceiling)))
+
+    def fail(self, job_id: int, lease_token: str, error: str, result: Optional[Dict[str, Any]] = None, retryable: bool = True) -> bool:
+        """Record a failed attempt; schedules a retry while attempts remain"""
+        job = self.get(job_id)
+        if job is None or job.lease_token != lease_token:
+            return False
+        values = self._failure_values(job, error, retryable)
+        if result is not None:
+            values["response_data"] = result
+        return self._update_leased(job_id, lease_token, values)
+
+    def _failure_values(self, job: RPASubmission, error: str, retryable: bool) -> Dict[str, Any]:
+        now = utcnow()
+        attempts = (job.retry_count or 0) + 1
+        values: Dict[str, Any] = {
+            "retry_count": attempts,
+            "error_message": error,
+            "lease_token": None,
+            "lease_expires_at": None,
+            "locked_by": None,
+        }
+        if retryable and attempts <= (job.max_retries or 0):
+            delay = self.backoff_seconds(attempts)
+            values["status"] = RPASubmissionStatus.RETRY
+            values["next_attempt_at"] = now + timedelta(seconds=delay)
+            values["progress"] = {"message": f"🔁 Attempt {attempts} failed, retrying in {delay}s: {error}"}
+            logger.warning(f"RPA job {job.id} failed (attempt {attempts}), retry in {delay}s: {error}")
+        else:
+            values["status"] = RPASubmissionStatus.FAILED
+            values["completed_at"] = now
+            values["progress"] = {"message": f"❌ Automation failed: {error}"}
+            logger.error(f"RPA job {job.id} failed permanently: {error}")
+        return values
+
+    def reap_expired(self) -> int:
+        """Put jobs whose worker stopped heartbeating back on the queue"""
+        db = self.session_factory()
+        try:
+            expired = (
+                db.query(RPASubmission)
+                .filter(
+                    RPASubmission.status == RPASubmissionStatus.PROCESSING,
+                    RPASubmission.lease_expires_at < utcnow(),
+                )
+                .limit(50)
+                .all()
+            )
+            db.expunge_all()
+        finally:
+            db.close()
+
+        reaped = 0
+        for job in expired:
+            error = f"Lease expired (worker {job.locked_by} stopped responding)"
+            # The lease token check makes sure only one reaper (or a late worker) wins
+            if self._update_leased(job.id, job.lease_token, self._failure_values(job, error, True)):
+                reaped += 1
+        return reaped
+
+
+_rpa_queue: Optional[RPAJobQueue] = None
+
+
+def get_rpa_queue() -> RPAJobQueue:
+    """Get the process-wide queue configured from settings"""
+    global _rpa_queue
+    if _rpa_queue is None:
+        settings = get_settings()
+        _rpa_queue = RPAJobQueue(
+            visibility_timeout=settings.RPA_QUEUE_VISIBILITY_TIMEOUT,
+            backoff_base=settings.RPA_QUEUE_BACKOFF_BASE,
+            backoff_max=settings.RPA_QUEUE_BACKOFF_MAX,
+        )
+    return _rpa_queue
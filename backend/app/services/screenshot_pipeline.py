@@ -0,0 +1,252 @@
+"""
+Screenshot Pipeline
+Automation threads only grab the screenshot bytes; a background writer
+downscales, encodes (WebP/JPEG) and puts them in object storage under the
+SCREENSHOT_DIR prefix with a unique per-job filename (with local storage
+that is still the screenshots/ directory). A sweeper deletes screenshots
+past their retention age and trims the prefix back under its size cap,
+oldest first.
+"""
+
+import io
+import time
+import uuid
+import queue
+import logging
+import itertools
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, features
+from selenium.common.exceptions import WebDriverException
+
+from app.config import get_settings
+from app.services.object_storage import ObjectStorage, get_object_storage
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "png": "png"}
+IMAGE_EXTENSIONS = (".webp", ".jpg", ".jpeg", ".png")
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def new_job_id() -> str:
+    """Short id that keeps one job's screenshots apart from every other job's"""
+    return uuid.uuid4().hex[:8]
+
+
+class ScreenshotPipeline:
+    """Background encoder/writer for automation screenshots"""
+
+    def __init__(self, directory: str, fmt: str = "webp", quality: int = 70, max_width: int = 0,
+                 queue_size: int = 64, retention_days: float = 7, max_total_mb: int = 500,
+                 sweep_interval: float = 3600, storage: Optional[ObjectStorage] = None):
+        fmt = fmt.lower().replace("jpg", "jpeg")
+        if fmt not in FORMAT_EXTENSIONS:
+            logger.warning(f"⚠️ Unknown screenshot format '{fmt}', using jpeg")
+            fmt = "jpeg"
+        if fmt == "webp" and not features.check("webp"):
+            logger.warning("⚠️ Pillow has no WebP support, saving screenshots as JPEG")
+            fmt = "jpeg"
+        self.directory = directory.strip("/")  # key prefix in object storage
+        self.storage = storage or get_object_storage()
+        self.format = fmt
+        self.quality = quality
+        self.max_width = max_width
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.sweep_interval = sweep_interval
+
+        self._queue: "queue.Queue[Optional[Tuple[bytes, str]]]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"captured": 0, "written": 0, "dropped": 0, "failed": 0,
+                       "bytes_in": 0, "bytes_out": 0, "swept": 0, "swept_bytes": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="screenshot-writer", daemon=True)
+        self._writer.start()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sequence = itertools.count(1)
+
+    # ---- capture -------------------------------------------------------
+
+    def filename(self, name: str, job_id: Optional[str] = None) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        return f"{name}_{job_id or new_job_id()}_{timestamp}_{next(self._sequence):04d}.{FORMAT_EXTENSIONS[self.format]}"
+
+    def path(self, filename: str) -> str:
+        """Object storage key of a screenshot (a relative path with local storage)"""
+        return f"{self.directory}/{filename}"
+
+    def capture(self, driver, name: str, job_id: Optional[str] = None) -> Optional[str]:
+        """Grab the page and queue it for encoding; returns the filename it will be written to"""
+        try:
+            png = driver.get_screenshot_as_png()
+        except WebDriverException as e:
+            logger.warning(f"⚠️ Screenshot failed: {e}")
+            return None
+        filename = self.filename(name, job_id)
+        return filename if self.submit(png, filename) else None
+
+    def submit(self, png: bytes, filename: str) -> bool:
+        """Queue raw PNG bytes; dropped (not blocked on) when the writer is behind"""
+        with self._lock:
+            self._stats["captured"] += 1
+            self._stats["bytes_in"] += len(png)
+        try:
+            self._queue.put_nowait((png, filename))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            logger.warning(f"⚠️ Screenshot writer is behind, dropped {filename}")
+            return False
+        return True
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Wait until everything queued so far is stored"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    # ---- writer --------------------------------------------------------
+
+    def encode(self, png: bytes) -> bytes:
+        image = Image.open(io.BytesIO(png))
+        resized = bool(self.max_width and image.width > self.max_width)
+        if resized:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.Resampling.BILINEAR)
+        if self.format == "png":
+            if not resized:
+                return png
+            out = io.BytesIO()
+            image.save(out, "PNG", optimize=False)
+            return out.getvalue()
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        if self.format == "webp":
+            image.save(out, "WEBP", quality=self.quality, method=4)
+        else:
+            image.save(out, "JPEG", quality=self.quality, optimize=True)
+        return out.getvalue()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                png, filename = item
+                data = self.encode(png)
+                target = self.path(filename)
+                self.storage.put_bytes(target, data, CONTENT_TYPES[self.format])
+                with self._lock:
+                    self._stats["written"] += 1
+                    self._stats["bytes_out"] += len(data)
+                logger.info(f"📸 Screenshot saved: {target} ({len(png) // 1024} KB → {len(data) // 1024} KB)")
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed"] += 1
+                logger.warning(f"⚠️ Screenshot write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    # ---- retention -----------------------------------------------------
+
+    def sweep(self) -> Dict[str, int]:
+        """Delete screenshots older than the retention age, then oldest first until under the size cap"""
+        files: List[Tuple[float, int, str]] = [
+            (mtime, size, key) for key, size, mtime in self.storage.list(self.directory)
+            if key.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+
+        files.sort()
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        total = sum(size for _, size, _ in files)
+        removed = freed = 0
+        for mtime, size, key in files:
+            expired = cutoff is not None and mtime < cutoff
+            over_cap = self.max_total_bytes and total > self.max_total_bytes
+            if not (expired or over_cap):
+                break
+            try:
+                if not self.storage.delete(key):
+                    continue
+            except Exception:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+
+        with self._lock:
+            self._stats["swept"] += removed
+            self._stats["swept_bytes"] += freed
+        if removed:
+            logger.info(f"🧹 Screenshot sweep removed {removed} files ({freed // (1024 * 1024)} MB)")
+        return {"removed": removed, "freed_bytes": freed}
+
+    def start_sweeper(self):
+        if self._sweeper is not None or not self.sweep_interval:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="screenshot-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"⚠️ Screenshot sweep failed: {e}")
+            self._stop.wait(self.sweep_interval)
+
+    # ---- lifecycle -----------------------------------------------------
+
+    def shutdown(self, timeout: float = 10):
+        """Write what is queued, then stop the writer and sweeper"""
+        self._stop.set()
+        self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._writer.join(timeout=1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"format": self.format, "queued": self._queue.qsize(), **self._stats}
+
+
+_pipeline: Optional[ScreenshotPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_screenshot_pipeline() -> ScreenshotPipeline:
+    """Process-wide screenshot pipeline (created on first use)"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                settings = get_settings()
+                _pipeline = ScreenshotPipeline(
+                    directory=settings.SCREENSHOT_DIR,
+                    fmt=settings.SCREENSHOT_FORMAT,
+                    quality=settings.SCREENSHOT_QUALITY,
+                    max_width=settings.SCREENSHOT_MAX_WIDTH,
+                    queue_size=settings.SCREENSHOT_QUEUE_SIZE,
+                    retention_days=settings.SCREENSHOT_RETENTION_DAYS,
+                    max_total_mb=settings.SCREENSHOT_MAX_TOTAL_MB,
+                    sweep_interval=settings.SCREENSHOT_SWEEP_INTERVAL,
+                )
+    return _pipeline
+
+
+def shutdown_screenshot_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.shutdown()
+            _pipeline = None
@@ -0,0 +1,131 @@
+"""
+Selector Plans
+Remembers which selector actually matched each field on a portal form, keyed
+by supplier id and form URL, so the next job tries that selector first and
+resolves the field with a single DOM query. A learned selector that stops
+matching is dropped and the full strategy list takes over again.
+
+Plans are stored as JSON (SELECTOR_PLANS_PATH) and written atomically.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def plan_key(supplier_id: str, form_url: str) -> str:
+    """supplier|host/path - query strings and fragments don't change the form"""
+    parts = urlsplit(form_url or "")
+    return f"{supplier_id}|{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+class SelectorPlanStore:
+    """Thread-safe, file-backed map of plan key -> {field: learned selector}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._plans: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable selector plans {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._plans, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, supplier_id: str, form_url: str) -> Dict[str, str]:
+        """Learned selector per field for this portal form"""
+        with self._lock:
+            plan = self._plans.get(plan_key(supplier_id, form_url), {})
+            return {field: entry["selector"] for field, entry in plan.items()}
+
+    def update(self, supplier_id: str, form_url: str, report: Dict[str, Dict[str, Any]]):
+        """
+        Apply a fill report: learn the selector of every filled field and
+        forget learned selectors that missed.
+        """
+        key = plan_key(supplier_id, form_url)
+        changed = False
+        with self._lock:
+            plan = self._plans.setdefault(key, {})
+            for field, entry in report.items():
+                if entry.get("plan_miss"):
+                    self.misses += 1
+                    if plan.pop(field, None) is not None:
+                        logger.info(f"🧭 Selector plan miss for {key} {field}; invalidated")
+                        changed = True
+                if not entry.get("filled"):
+                    continue
+                if entry.get("strategy") == "learned":
+                    self.hits += 1
+                    learned = plan.get(field)
+                    if learned:  # may have been dropped meanwhile by another job's miss or invalidate()
+                        learned["hits"] = learned.get("hits", 0) + 1
+                    continue
+                selector = entry.get("learned_selector") or entry.get("selector")
+                if selector and plan.get(field, {}).get("selector") != selector:
+                    plan[field] = {"selector": selector, "hits": 0, "learned_at": time.time()}
+                    changed = True
+            if not plan:
+                self._plans.pop(key, None)
+            if changed:
+                try:
+                    self._save()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not persist selector plans: {e}")
+
+    def invalidate(self, supplier_id: str, form_url: str, field: Optional[str] = None):
+        """Forget one field's selector, or the whole plan"""
+        key = plan_key(supplier_id, form_url)
+        with self._lock:
+            if field is None:
+                self._plans.pop(key, None)
+            else:
+                self._plans.get(key, {}).pop(field, None)
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "plans": len(self._plans),
+                "fields": sum(len(plan) for plan in self._plans.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_plan_store: Optional[SelectorPlanStore] = None
+_plan_store_lock = threading.Lock()
+
+
+def get_selector_plan_store() -> SelectorPlanStore:
+    """Get the process-wide selector plan store"""
+    global _plan_store
+    if _plan_store is None:
+        with _plan_store_lock:
+            if _plan_store is None:
+                _plan_store = SelectorPlanStore(get_settings().SELECTOR_PLANS_PATH)
+    return _plan_store
@@ -5,9 +5,12 @@ Simple RPA Service - Minimal working version
 import time
 import os
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+
+from app.services.browser_mode import requested_visibility, resolve_headless
+from app.services.driver_pool import get_driver_pool, build_chrome_options, launch_chrome
+from app.services.browser_waits import wait_for_page_settled
+from app.services.resource_blocker import block_resources, resource_report
+from app.services.screenshot_pipeline import get_screenshot_pipeline
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -18,85 +21,28 @@ class SimpleTorrentRPA:
         self.driver = None
         
     def setup_driver(self, headless=None, binary_path=None):
-        """Robust Chrome setup with cross-platform handling and webdriver-manager fallback
+        """Lease a Chrome driver from the shared pool
 
-        headless: bool|None -> if None, use env HEADLESS (default=1). If False, browser will be visible.
-        binary_path: optional explicit chrome binary path
+        headless: bool|None -> if None, follow BROWSER_MODE. If False, browser will be visible.
+        binary_path: optional explicit chrome binary path (launches a dedicated, unpooled browser)
         """
         try:
             logger.info("🚀 Setting up Chrome driver...")
 
-            # Basic Chrome options
-            options = Options()
             if headless is None:
-                headless = os.getenv("HEADLESS", "1") in ("1", "true", "True")
+                headless = resolve_headless()
 
-            if headless:
-                try:
-                    options.add_argument("--headless=new")
-                except Exception:
-                    options.add_argument("--headless")
-            else:
+            if not headless:
                 logger.info("🔎 Running with visible browser (headless=False)")
 
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920,1080")
-
-            # Detect Chrome binary if possible (useful on Windows)
-            try:
-                import shutil
-                if binary_path and os.path.exists(binary_path):
-                    options.binary_location = binary_path
-                    logger.info(f"🔧 Using explicit Chrome binary: {binary_path}")
-                else:
-                    # Common Windows locations
-                    possible = [
-                        r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
-                        r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe",
-                        "/usr/bin/google-chrome",
-                        "/usr/bin/google-chrome-stable",
-                        "/usr/bin/chromium-browser",
-                        shutil.which("google-chrome") or "",
-                        shutil.which("chrome") or ""
-                    ]
-                    for p in possible:
-                        if p and os.path.exists(p):
-                            options.binary_location = p
-                            logger.info(f"🔧 Found Chrome binary: {p}")
-                            break
-            except Exception:
-                logger.debug("No explicit Chrome binary detected; relying on system defaults")
-
-            # Try system chromedriver first (Linux default path)
-            driver_path = None
-            if os.path.exists("/usr/bin/chromedriver"):
-                driver_path = "/usr/bin/chromedriver"
-
-            # On Windows, check PATH for chromedriver.exe
-            if not driver_path and os.name == 'nt':
-                import shutil
-                driver_path = shutil.which("chromedriver") or shutil.which("chromedriver.exe")
-
-            # If not found, use webdriver-manager to download the matching driver
-            if not driver_path:
-                try:
-                    from webdriver_manager.chrome import ChromeDriverManager
-                    logger.info("🔍 chromedriver not on PATH, downloading using webdriver-manager...")
-                    driver_path = ChromeDriverManager().install()
-                except Exception as e:
-                    logger.warning(f"webdriver-manager failed: {e}")
-                    driver_path = None
-
-            # Finally, let Selenium Manager try if driver_path is still None (Selenium >= 4.10)
-            if driver_path:
-                service = Service(driver_path)
-                self.driver = webdriver.Chrome(service=service, options=options)
+            if binary_path and os.path.exists(binary_path):
+                # A custom binary can't share the pool's warm browsers
+                logger.info(f"🔧 Using explicit Chrome binary: {binary_path}")
+                options = build_chrome_options(headless)
+                options.binary_location = binary_path
+                self.driver = launch_chrome(options)
             else:
-                # Use Selenium Manager to resolve driver automatically
-                logger.info("🔧 Trying Selenium Manager to resolve Chrome driver automatically")
-                self.driver = webdriver.Chrome(options=options)
+                self.driver = get_driver_pool().acquire(headless=headless)
 
             logger.info("✅ Chrome driver setup successful")
             return True
@@ -107,18 +53,17 @@ class SimpleTorrentRPA:
     
     def run_automation(self, form_data, options=None):
         """Run simple automation. Accepts optional `options` dict:
-           - headless: bool
+           - visible: bool (only when someone is watching; legacy "headless" also accepted)
            - keep_open: bool (if True, keeps browser open after run)
            - pause_after: seconds to wait before closing when visible
            - binary_path: explicit chrome binary location
         """
         keep_open = False
         pause_after = 5
-        headless = None
+        headless = resolve_headless(requested_visibility(options))
         binary_path = None
 
         if options:
-            headless = options.get("headless", None)
             keep_open = options.get("keep_open", False)
             pause_after = options.get("pause_after", pause_after)
             binary_path = options.get("binary_path", None)
@@ -136,21 +81,19 @@ class SimpleTorrentRPA:
                 target_url = "https://connect.torrentpower.com/tplcp/application/namechangerequest"
 
             # Navigate to target
+            visible = not headless
             logger.info(f"🌐 Navigating to {target_url} ...")
+            blocker = block_resources(self.driver, visible=visible)
             self.driver.get(target_url)
-            time.sleep(2)
+            wait_for_page_settled(self.driver)
 
             # Save a quick screenshot for debugging
-            screenshot_path = None
-            try:
-                screenshot_path = os.path.join(os.getcwd(), f"rpa_screenshot_{int(time.time())}.png")
-                self.driver.save_screenshot(screenshot_path)
-                logger.info(f"📸 Screenshot saved: {screenshot_path}")
-            except Exception as e:
-                logger.warning(f"Could not save screenshot: {e}")
+            pipeline = get_screenshot_pipeline()
+            filename = pipeline.capture(self.driver, "rpa_screenshot")
+            screenshot_path = pipeline.path(filename) if filename else None
 
             # If visible, pause so you can see the actions
-            if not (headless if headless is not None else os.getenv("HEADLESS", "1") in ("1", "true", "True")):
+            if visible:
                 logger.info(f"👀 Visible mode: pausing for {pause_after} seconds for demo")
                 time.sleep(pause_after)
 
@@ -163,15 +106,17 @@ class SimpleTorrentRPA:
                 "filled_fields": ["✅ Chrome driver working", "✅ Navigation working"],
                 "total_filled": 2,
                 "total_fields": 2,
-                "screenshot": screenshot_path
+                "screenshot": screenshot_path,
+                "resources": resource_report(blocker),
             }
 
         except Exception as e:
             logger.exception(f"❌ RPA failed: {e}")
             return {"success": False, "error": str(e)}
         finally:
-            if self.driver and not keep_open:
-                try:
-                    self.driver.quit()
-                except Exception:
-                    pass
\ No newline at end of file
+            if self.driver:
+                if keep_open:
+                    get_driver_pool().detach(self.driver)
+                else:
+                    get_driver_pool().release(self.driver)
+                self.driver = None
\ No newline at end of file
@@ -0,0 +1,363 @@
+"""
+Tab Scheduler
+Runs several RPA jobs inside one Chrome process instead of one browser per
+job. Each job gets its own CDP browser context (separate cookies, storage and
+cache, like an incognito profile) holding a single tab. Jobs are step
+generators that yield WaitFor wherever they would otherwise block on the
+page; one scheduler thread round-robins the tabs, probes each pending
+condition once and resumes the job whose condition holds, so while one
+portal is loading the others keep filling.
+
+A browser costs hundreds of MB, a context and tab tens, which is what makes
+this worth it when RAM is the limit on concurrent automations. Chrome
+activates a visible tab when the scheduler switches to it, so jobs that wait
+on a person (login assistance) should poll slowly.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from app.config import get_settings
+from app.services.browser_waits import Steps, WaitFor
+from app.services.driver_pool import get_driver_pool
+
+logger = logging.getLogger(__name__)
+
+# factory(driver) -> step generator, called once the job's tab is current
+StepsFactory = Callable[[Any], Steps]
+
+# Runs before any page script in every job tab
+TAB_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+
+# Seconds between checks for handed-over tabs the user has closed
+KEPT_SWEEP_INTERVAL = 5.0
+
+
+class TabJob:
+    """One job: its browser context, its tab and the condition it is parked on"""
+
+    def __init__(self, factory: StepsFactory, keep_open: bool, name: str):
+        self.factory = factory
+        self.keep_open = keep_open
+        self.name = name
+        self.future: Future = Future()
+        self.steps: Optional[Steps] = None
+        self.context_id: Optional[str] = None
+        self.handle: Optional[str] = None
+        self.waiting: Optional[WaitFor] = None
+        self.deadline = 0.0
+        self.next_poll = 0.0
+
+
+class TabScheduler:
+    """Cooperative scheduler for up to max_tabs jobs on one pooled browser"""
+
+    def __init__(self, max_tabs: int = 4, headless: bool = True, idle_sleep: float = 0.02):
+        self.max_tabs = max(1, max_tabs)
+        self.headless = headless
+        self.idle_sleep = idle_sleep
+        self.driver = None
+        self._home: Optional[str] = None
+        self._current: Optional[str] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: Deque[TabJob] = deque()
+        self._active: List[TabJob] = []
+        self._kept: Dict[str, str] = {}  # window handle -> context id, tabs handed to the user
+        self._last_sweep = 0.0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "browser_restarts": 0}
+
+    # ---- public API ----------------------------------------------------
+
+    def submit(self, factory: StepsFactory, keep_open: bool = False, name: str = "job") -> Future:
+        """Queue a job; the future resolves to the generator's return value"""
+        job = TabJob(factory, keep_open, name)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Tab scheduler is shut down")
+            self._pending.append(job)
+            self._stats["submitted"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                mode = "headless" if self.headless else "visible"
+                self._thread = threading.Thread(target=self._run, name=f"tab-scheduler-{mode}", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return job.future
+
+    def run(self, factory: StepsFactory, keep_open: bool = False, name: str = "job") -> Any:
+        """Submit a job and block until it finishes (for executor/worker threads)"""
+        return self.submit(factory, keep_open, name).result()
+
+    def shutdown(self, timeout: Optional[float] = 10):
+        """Fail queued and running jobs and give the browser back"""
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "headless": self.headless,
+                "max_tabs": self.max_tabs,
+                "active": len(self._active),
+                "pending": len(self._pending),
+                "kept_open": len(self._kept),
+                "browser": self.driver is not None,
+                **self._stats,
+            }
+
+    # ---- scheduler thread ----------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._lock:
+                closed = self._closed
+                admit = []
+                while not closed and self._pending and len(self._active) + len(admit) < self.max_tabs:
+                    admit.append(self._pending.popleft())
+            if closed:
+                self._close_all()
+                return
+
+            for job in admit:
+                self._open(job)
+
+            resumed = False
+            for job in list(self._active):
+                if job not in self._active:
+                    continue  # failed along with a crashed browser this round
+                if job.waiting is None or time.monotonic() < job.next_poll:
+                    continue
+                if not self._switch(job):
+                    continue
+                result = job.waiting.check(self.driver)
+                if result or time.monotonic() >= job.deadline:
+                    if not result:
+                        logger.debug(f"⏳ {job.name}: timed out after {job.waiting.timeout}s waiting for {job.waiting.what}")
+                    self._advance(job, result or None)
+                    resumed = True
+                else:
+                    job.next_poll = time.monotonic() + job.waiting.poll
+
+            if self._kept and time.monotonic() - self._last_sweep >= KEPT_SWEEP_INTERVAL:
+                self._sweep_kept()
+
+            with self._lock:
+                busy = bool(self._active or self._pending)
+            if not busy:
+                if self.driver is not None and not self._kept:
+                    self._release_browser()
+                self._wakeup.wait(KEPT_SWEEP_INTERVAL if self._kept else None)
+                self._wakeup.clear()
+            elif not resumed:
+                self._wakeup.wait(self._idle_timeout())
+                self._wakeup.clear()
+
+    def _idle_timeout(self) -> float:
+        """Sleep until the next poll is due, but never longer than idle_sleep"""
+        due = [job.next_poll for job in self._active if job.waiting is not None]
+        if not due:
+            return self.idle_sleep
+        return max(0.0, min(self.idle_sleep, min(due) - time.monotonic()))
+
+    def _open(self, job: TabJob):
+        """Create the job's browser context and tab, then run it to its first wait"""
+        try:
+            self._ensure_browser()
+            job.context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            target = self.driver.execute_cdp_cmd("Target.createTarget", {
+                "url": "about:blank",
+                "browserContextId": job.context_id,
+                "newWindow": not self.headless,
+                "background": self.headless,
+            })["targetId"]
+            job.handle = self._handle_for(target)
+            self.driver.switch_to.window(job.handle)
+            self._current = job.handle
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": TAB_INIT_SCRIPT})
+            job.steps = job.factory(self.driver)
+        except Exception as e:
+            logger.error(f"❌ {job.name}: could not open a tab: {e}")
+            self._finish(job, error=e)
+            self._check_browser()
+            return
+        with self._lock:
+            self._active.append(job)
+        logger.info(f"🗂️ {job.name}: running in tab {len(self._active)}/{self.max_tabs}")
+        self._advance(job, None, first=True)
+
+    def _advance(self, job: TabJob, value: Any, first: bool = False):
+        """Resume the job's generator until its next wait (or its end)"""
+        if not self._switch(job):
+            return
+        try:
+            request = next(job.steps) if first else job.steps.send(value)
+        except StopIteration as stop:
+            self._finish(job, result=stop.value)
+            return
+        except Exception as e:
+            logger.error(f"❌ {job.name}: step failed: {e}")
+            self._finish(job, error=e)
+            self._check_browser()
+            return
+        if not isinstance(request, WaitFor):
+            # A bare yield just hands the turn to the other tabs
+            request = WaitFor(lambda d: True, timeout=0, what="turn")
+        now = time.monotonic()
+        job.waiting = request
+        job.deadline = now + request.timeout
+        job.next_poll = now
+
+    def _switch(self, job: TabJob) -> bool:
+        if self._current == job.handle:
+            return True
+        try:
+            self.driver.switch_to.window(job.handle)
+            self._current = job.handle
+            return True
+        except WebDriverException as e:
+            # Tab closed under us, or the whole browser is gone
+            self._current = None
+            self._finish(job, error=e)
+            self._check_browser()
+            return False
+
+    def _finish(self, job: TabJob, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            if job in self._active:
+                self._active.remove(job)
+        if job.steps is not None and error is not None:
+            try:
+                job.steps.close()
+            except Exception:
+                pass
+        if job.keep_open and error is None and job.handle:
+            self._kept[job.handle] = job.context_id
+        elif job.context_id:
+            self._dispose_context(job.context_id)
+        with self._lock:
+            self._stats["failed" if error is not None else "completed"] += 1
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    # ---- browser and contexts ------------------------------------------
+
+    def _ensure_browser(self):
+        if self.driver is None:
+            self.driver = get_driver_pool().acquire(headless=self.headless)
+            self._home = self.driver.current_window_handle
+            self._current = self._home
+            logger.info(f"🌐 Tab scheduler leased a browser (headless={self.headless})")
+
+    def _handle_for(self, target_id: str) -> str:
+        """ChromeDriver window handles are the CDP target ids (older builds prefix them)"""
+        for handle in self.driver.window_handles:
+            if handle == target_id or handle.endswith(target_id):
+                return handle
+        return target_id
+
+    def _dispose_context(self, context_id: str):
+        """Close a context and every tab in it; commands go through the home tab"""
+        if self.driver is None:
+            return
+        try:
+            if self._current != self._home:
+                self.driver.switch_to.window(self._home)
+                self._current = self._home
+            self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except WebDriverException as e:
+            logger.debug(f"⚠️ Could not dispose browser context {context_id}: {e}")
+
+    def _sweep_kept(self):
+        """Dispose contexts of handed-over tabs the user has closed"""
+        self._last_sweep = time.monotonic()
+        try:
+            open_handles = set(self.driver.window_handles)
+        except WebDriverException:
+            self._check_browser()
+            return
+        for handle, context_id in list(self._kept.items()):
+            if handle not in open_handles:
+                del self._kept[handle]
+                if self._current == handle:
+                    self._current = None
+                self._dispose_context(context_id)
+
+    def _check_browser(self):
+        """If the browser died, fail its jobs and drop it so the next job gets a new one"""
+        if self.driver is None:
+            return
+        try:
+            self.driver.switch_to.window(self._home)
+            self._current = self._home
+            return
+        except WebDriverException as e:
+            logger.error(f"❌ Tab scheduler browser is gone: {e}")
+        with self._lock:
+            active, self._active = self._active, []
+            self._stats["browser_restarts"] += 1
+        self._kept.clear()
+        get_driver_pool().release(self.driver, discard=True)
+        self.driver = None
+        for job in active:
+            self._finish(job, error=RuntimeError("Browser crashed while the job was running"))
+
+    def _release_browser(self):
+        """Return the browser to the pool, or hand it to the user if tabs are kept open"""
+        if self._kept:
+            get_driver_pool().detach(self.driver)
+            logger.info(f"🎬 Tab scheduler browser left open with {len(self._kept)} tab(s) for review")
+        else:
+            get_driver_pool().release(self.driver)
+        self.driver = None
+        self._home = self._current = None
+        self._kept = {}
+
+    def _close_all(self):
+        with self._lock:
+            jobs = self._active + list(self._pending)
+            self._active, self._pending = [], deque()
+        for job in jobs:
+            self._finish(job, error=RuntimeError("Tab scheduler is shut down"))
+        if self.driver is not None:
+            self._release_browser()
+
+
+_tab_schedulers: Dict[bool, TabScheduler] = {}
+_tab_schedulers_lock = threading.Lock()
+
+
+def get_tab_scheduler(headless: bool = True) -> TabScheduler:
+    """Get the process-wide scheduler for headless or visible tabs"""
+    with _tab_schedulers_lock:
+        scheduler = _tab_schedulers.get(headless)
+        if scheduler is None:
+            scheduler = TabScheduler(max_tabs=get_settings().TAB_SCHEDULER_MAX_TABS, headless=headless)
+            _tab_schedulers[headless] = scheduler
+        return scheduler
+
+
+def tab_scheduler_stats() -> Dict[str, Any]:
+    with _tab_schedulers_lock:
+        schedulers = list(_tab_schedulers.items())
+    return {("headless" if headless else "visible"): scheduler.stats() for headless, scheduler in schedulers}
+
+
+def shutdown_tab_schedulers():
+    with _tab_schedulers_lock:
+        schedulers = list(_tab_schedulers.values())
+        _tab_schedulers.clear()
+    for scheduler in schedulers:
+        scheduler.shutdown()
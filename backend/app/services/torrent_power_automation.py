@@ -9,114 +9,133 @@ import json
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+
+from app.config import get_settings
+from app.services.browser_mode import resolve_headless
+from app.services.driver_pool import get_driver_pool
+from app.services.browser_waits import Steps, WaitFor, navigate, page_settled, pause, run_steps, type_into_steps, ui_settled
+from app.services.js_form_filler import fill_form_steps
+from app.services.resource_blocker import block_resources, resource_report
+from app.services.screenshot_pipeline import get_screenshot_pipeline, new_job_id
+from app.services.tab_scheduler import get_tab_scheduler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+SUPPLIER_ID = "torrent-power"
+FORM_URL = "https://connect.torrentpower.com/tplcp/application/namechangerequest"
+
+# Selector strategies per form field, built once (AI-assisted + fallback selectors)
+FIELD_STRATEGIES = {
+    'city': {
+        'selectors': [
+            'select[name*="city"]',
+            'select[id*="city"]',
+            'select:first-of-type',
+            'select'
+        ],
+        'labels': ['city', 'location', 'area'],
+        'default': 'Ahmedabad'
+    },
+    'service_number': {
+        'selectors': [
+            'input[name*="service"]',
+            'input[placeholder*="service"]',
+            'input[id*="service"]',
+            'input[type="text"]:nth-of-type(1)'
+        ],
+        'labels': ['service number', 'consumer number', 'account'],
+    },
+    't_number': {
+        'selectors': [
+            'input[name*="t_no"], input[name*="tno"], input[id*="t_no"]',
+            'input[placeholder*="T No"], input[placeholder*="T no"], input[placeholder*="transaction"]',
+            'input[name*="transaction"]',
+            'input[name*="reference"]',
+            'input[type="text"]'  # Generic fallback - will be selected carefully by position/label
+        ],
+        'labels': ['t no', 't number', 'transaction no', 'transaction number', 'reference', 'transaction', 'ref no'],
+        'is_critical': True  # Flag this as a critical field for enhanced debugging
+    },
+    'mobile': {
+        'selectors': [
+            'input[name*="mobile"]',
+            'input[placeholder*="mobile"]',
+            'input[type="tel"]',
+            'input[type="text"]:nth-of-type(3)'
+        ],
+        'labels': ['mobile', 'phone', 'contact'],
+    },
+    'email': {
+        'selectors': [
+            'input[name*="email"]',
+            'input[placeholder*="email"]',
+            'input[type="email"]',
+            'input[type="text"]:nth-of-type(4)'
+        ],
+        'labels': ['email', 'mail'],
+    }
+}
+
+
 class TorrentPowerAutomation:
     """
     Production-ready Torrent Power automation with AI-assisted field mapping
     Follows the complete workflow from Unified Portal to Official Website
     """
     
-    def __init__(self, auto_close=True, close_delay=5):
+    def __init__(self, auto_close=True, close_delay=5, visible=None, human_typing=None):
         """Initialize the automation service
         
         Args:
             auto_close: If True, browser will close automatically after filling (default: True)
             close_delay: Seconds to wait before auto-closing (default: 5 for fast close)
+            visible: Ask for a visible browser (True) or a headless one (False); None follows BROWSER_MODE
+            human_typing: Type character by character for demos (default: RPA_HUMAN_TYPING)
         """
         self.driver = None
         self.session_data = {}
         self.screenshots = []
         self.auto_close = auto_close
         self.close_delay = close_delay
+        self.headless = resolve_headless(visible)
+        self.human_typing = get_settings().RPA_HUMAN_TYPING if human_typing is None else human_typing
+        self.cooperative = False  # True while running as a TabScheduler job
+        self.blocker = None
+        self.job_id = new_job_id()  # Tags this run's screenshots
         
-        # Chrome options for production
-        self.chrome_options = Options()
-        
-        # VISIBLE MODE - But optimized for speed! ⚡
-        self.chrome_options.add_argument("--start-maximized")
-        
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
-        self.chrome_options.add_argument("--disable-gpu")
-        self.chrome_options.add_argument("--disable-software-rasterizer")
-        self.chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        self.chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.chrome_options.add_experimental_option('useAutomationExtension', False)
-        self.chrome_options.add_argument("--window-size=1920,1080")
-        self.chrome_options.add_argument("--disable-background-timer-throttling")
-        self.chrome_options.add_argument("--disable-renderer-backgrounding")
-        self.chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-        self.chrome_options.add_argument("--disable-extensions")
-        self.chrome_options.add_argument("--disable-plugins")
-        self.chrome_options.add_argument("--disable-images")  # Faster page load
-        self.chrome_options.add_argument("--disable-notifications")
-        self.chrome_options.add_argument("--disable-popup-blocking")
-        self.chrome_options.add_argument("--disable-translate")
-        self.chrome_options.add_argument("--disable-sync")
-        self.chrome_options.add_argument("--disable-default-apps")
-        self.chrome_options.add_argument("--disable-preconnect")
-        self.chrome_options.add_argument("--disable-component-extensions-with-background-pages")
-
-        # Explicitly set binary location (helps when multiple Chrome installs exist)
-        try:
-            self.chrome_options.binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        except Exception:
-            pass
-        
-        logger.info(f"🚀 TorrentPowerAutomation initialized (auto_close={auto_close}, delay={close_delay}s)")
+        logger.info(f"🚀 TorrentPowerAutomation initialized (auto_close={auto_close}, delay={close_delay}s, headless={self.headless})")
     
     def create_driver(self):
-        """Create Chrome WebDriver instance with FAST cached driver"""
+        """Lease a warm Chrome WebDriver from the shared driver pool"""
         try:
-            logger.info("📍 Getting ChromeDriver (cached - should be instant)...")
+            logger.info("📍 Leasing Chrome browser from pool...")
+            start_time = time.time()
             
-            # Use ultra-fast cached driver
-            from fast_driver import get_fast_chrome_service
-            service = get_fast_chrome_service()
-            logger.info("✅ ChromeDriver ready (instant!)")
+            self.driver = get_driver_pool().acquire(headless=self.headless)
             
-            logger.info("📍 Opening Chrome browser...")
-            start_time = time.time()
+            # Suppress all alerts and popups
+            self.driver.execute_script("""
+                window.alert = function() {};
+                window.confirm = function() { return true; };
+                window.prompt = function() { return ''; };
+            """)
             
-            try:
-                self.driver = webdriver.Chrome(service=service, options=self.chrome_options)
-                
-                # Suppress all alerts and popups
-                self.driver.execute_script("""
-                    window.alert = function() {};
-                    window.confirm = function() { return true; };
-                    window.prompt = function() { return ''; };
-                """)
-                
-                elapsed = time.time() - start_time
-                logger.info(f"✅ Chrome opened in {elapsed:.2f} seconds!")
-            except Exception as driver_error:
-                logger.error(f"❌ Chrome failed: {driver_error}")
-                logger.info("🔄 Retrying without service...")
-                self.driver = webdriver.Chrome(options=self.chrome_options)
-                elapsed = time.time() - start_time
-                logger.info(f"✅ Chrome opened (fallback) in {elapsed:.2f} seconds!")
+            elapsed = time.time() - start_time
+            logger.info(f"✅ Chrome ready in {elapsed:.2f} seconds!")
             
             logger.info("📍 Step: Removing automation indicators...")
             # Remove automation indicators
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             logger.info("✅ Automation indicators removed")
             
-            logger.info("✅ Chrome driver created successfully and is NOW VISIBLE ON SCREEN")
+            logger.info("✅ Chrome driver created successfully" + ("" if self.headless else " and is NOW VISIBLE ON SCREEN"))
             return True
         except Exception as e:
             logger.error(f"❌ Failed to create Chrome driver!")
@@ -127,23 +146,10 @@ class TorrentPowerAutomation:
             return False
     
     def take_screenshot(self, step_name: str):
-        """Take screenshot for audit/logging"""
-        try:
-            import os
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"torrent_automation_{step_name}_{timestamp}.png"
-            
-            # Create screenshots directory if it doesn't exist
-            screenshot_dir = os.path.join(os.getcwd(), "screenshots")
-            if not os.path.exists(screenshot_dir):
-                os.makedirs(screenshot_dir)
-            
-            filepath = os.path.join(screenshot_dir, filename)
-            self.driver.save_screenshot(filepath)
+        """Take screenshot for audit/logging (encoded and written in the background)"""
+        filename = get_screenshot_pipeline().capture(self.driver, f"torrent_automation_{step_name}", self.job_id)
+        if filename:
             self.screenshots.append(filename)
-            logger.info(f"📸 Screenshot saved: {filepath}")
-        except Exception as e:
-            logger.warning(f"⚠️ Screenshot failed: {str(e)}")
     
     def wait_for_element(self, by: By, value: str, timeout: int = 10):
         """Wait for element with timeout"""
@@ -161,68 +167,16 @@ class TorrentPowerAutomation:
         AI-assisted field mapping for Torrent Power website
         Maps unified portal data to official website fields
         """
-        
-        # Field mapping strategies (AI-assisted + fallback selectors)
-        field_mappings = {
-            'city': {
-                'selectors': [
-                    'select[name*="city"]',
-                    'select[id*="city"]',
-                    'select:first-of-type',
-                    'select'
-                ],
-                'labels': ['city', 'location', 'area'],
-                'value': field_data.get('city', 'Ahmedabad')
-            },
-            'service_number': {
-                'selectors': [
-                    'input[name*="service"]',
-                    'input[placeholder*="service"]',
-                    'input[id*="service"]',
-                    'input[type="text"]:nth-of-type(1)'
-                ],
-                'labels': ['service number', 'consumer number', 'account'],
-                'value': field_data.get('service_number', '')
-            },
-            't_number': {
-                'selectors': [
-                    'input[name*="t_no"], input[name*="tno"], input[id*="t_no"]',
-                    'input[placeholder*="T No"], input[placeholder*="T no"], input[placeholder*="transaction"]',
-                    'input[name*="transaction"]',
-                    'input[name*="reference"]',
-                    'input[type="text"]'  # Generic fallback - will be selected carefully by position/label
-                ],
-                'labels': ['t no', 't number', 'transaction no', 'transaction number', 'reference', 'transaction', 'ref no'],
-                'value': field_data.get('t_number', ''),
-                'is_critical': True  # Flag this as a critical field for enhanced debugging
-            },
-            'mobile': {
-                'selectors': [
-                    'input[name*="mobile"]',
-                    'input[placeholder*="mobile"]',
-                    'input[type="tel"]',
-                    'input[type="text"]:nth-of-type(3)'
-                ],
-                'labels': ['mobile', 'phone', 'contact'],
-                'value': field_data.get('mobile', '')
-            },
-            'email': {
-                'selectors': [
-                    'input[name*="email"]',
-                    'input[placeholder*="email"]',
-                    'input[type="email"]',
-                    'input[type="text"]:nth-of-type(4)'
-                ],
-                'labels': ['email', 'mail'],
-                'value': field_data.get('email', '')
-            }
+        return {
+            field_name: {**strategy, 'value': field_data.get(field_name, strategy.get('default', ''))}
+            for field_name, strategy in FIELD_STRATEGIES.items()
         }
-        
-        return field_mappings
     
-    def fill_field_intelligently(self, field_name: str, field_config: Dict[str, Any]) -> bool:
+    def fill_field_steps(self, field_name: str, field_config: Dict[str, Any]) -> Steps:
         """
-        Intelligently fill a field using multiple strategies with visual feedback
+        Intelligently fill a field using multiple strategies with visual feedback.
+        A step generator (returns whether the field was filled): waits and
+        keystroke delays are yielded, so a tab sharing the browser doesn't stall the others.
         """
         value = field_config['value']
         if not value:
@@ -248,14 +202,14 @@ class TorrentPowerAutomation:
                         try:
                             select.select_by_visible_text(value)
                             logger.info(f"✅ {field_name} FILLED via dropdown (visible text): {value}")
-                            time.sleep(1)
+                            yield WaitFor(ui_settled, timeout=3, what="UI to settle")
                             return True
                         except Exception as e1:
                             logger.info(f"  ⚠️ Dropdown visible_text failed: {str(e1)}")
                             try:
                                 select.select_by_value(value)
                                 logger.info(f"✅ {field_name} FILLED via dropdown (value): {value}")
-                                time.sleep(1)
+                                yield WaitFor(ui_settled, timeout=3, what="UI to settle")
                                 return True
                             except Exception as e2:
                                 logger.info(f"  ⚠️ Dropdown value failed: {str(e2)}, trying next selector...")
@@ -268,20 +222,14 @@ class TorrentPowerAutomation:
                         # Scroll into view to ensure it's visible
                         try:
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                            time.sleep(0.5)
                         except:
                             pass
                         
-                        element.clear()
-                        time.sleep(0.5)
-                        
-                        # Slow type for visibility
-                        for char in value:
-                            element.send_keys(char)
-                            time.sleep(0.05)
+                        if not (yield from type_into_steps(self.driver, element, value, human=self.human_typing)):
+                            logger.info(f"  ⚠️ Value did not commit, trying next selector...")
+                            continue
                         
                         logger.info(f"✅ {field_name} FILLED via input: {value}")
-                        time.sleep(1)
                         return True
                 else:
                     logger.info(f"  ❌ Selector found no elements")
@@ -308,19 +256,14 @@ class TorrentPowerAutomation:
                     # Scroll into view
                     try:
                         self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                        time.sleep(0.5)
                     except:
                         pass
                     
-                    element.clear()
-                    time.sleep(0.5)
-                    
-                    for char in value:
-                        element.send_keys(char)
-                        time.sleep(0.05)
+                    if not (yield from type_into_steps(self.driver, element, value, human=self.human_typing)):
+                        logger.info(f"  ⚠️ Value did not commit, trying next match...")
+                        continue
                     
                     logger.info(f"✅ {field_name} FILLED via XPath label matching: {value}")
-                    time.sleep(1)
                     return True
                 except Exception as e:
                     logger.info(f"  ❌ XPath label '{label}' failed: {str(e)}")
@@ -350,12 +293,20 @@ class TorrentPowerAutomation:
         """
         Execute the complete automation workflow
         Step 1-7 as defined in the prompt
-        Runs with VISIBLE browser so user can watch form fields being filled
+        Headless per BROWSER_MODE unless a visible browser was asked for, so the user can watch
         """
+        if get_settings().TAB_SCHEDULER_ENABLED:
+            # Share one Chrome with other jobs, each in its own browser context
+            return get_tab_scheduler(self.headless).run(
+                lambda driver: self.run_in_tab(driver, user_data),
+                keep_open=not self.auto_close,
+                name=f"torrent-power {user_data.get('service_number', '')}".strip(),
+            )
         
         try:
-            logger.info("🎬 🚀 Starting FULL TORRENT POWER AUTOMATION (VISIBLE BROWSER)")
-            logger.info("👀 Watch as the browser opens and fields are filled automatically...")
+            logger.info(f"🎬 🚀 Starting FULL TORRENT POWER AUTOMATION ({'HEADLESS' if self.headless else 'VISIBLE'} BROWSER)")
+            if not self.headless:
+                logger.info("👀 Watch as the browser opens and fields are filled automatically...")
             
             # Initialize driver
             logger.info("📍 Phase 1: Creating browser driver...")
@@ -363,264 +314,308 @@ class TorrentPowerAutomation:
                 raise Exception("Failed to create browser driver - see logs above for errors")
             logger.info("✅ Browser driver ready!")
             
-            # Store session data
-            self.session_data = {
-                'city': user_data.get('city', 'Ahmedabad'),
-                'service_number': user_data.get('service_number', ''),
-                't_number': user_data.get('t_number', ''),
-                'mobile': user_data.get('mobile', ''),
-                'email': user_data.get('email', ''),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"📋 Session data stored: {self.session_data}")
-            
-            # Step 5: Navigate to Official Torrent Power Website
-            logger.info("🌐 Step 5: Opening official Torrent Power website...")
-            logger.info(f"🎬 🔗 NAVIGATING TO: https://connect.torrentpower.com/tplcp/application/namechangerequest")
+            return run_steps(self.driver, self.workflow_steps(user_data))
             
+        except Exception as e:
+            return self.failure_result(e)
+        
+        finally:
+            # Handle browser closing based on settings
+            if self.auto_close:
+                logger.info(f"⏳ Auto-close enabled - waiting {self.close_delay} seconds before closing...")
+                time.sleep(self.close_delay)
+                logger.info("🔒 Returning browser to pool...")
+                if self.driver:
+                    get_driver_pool().release(self.driver)
+                    self.driver = None
+                logger.info("✅ Browser released")
+            else:
+                # The user keeps this browser, so it no longer counts against the pool
+                get_driver_pool().detach(self.driver)
+                logger.info("")
+                logger.info("🎬 BROWSER WILL STAY OPEN FOR YOUR REVIEW!")
+                logger.info("✋ Close the browser manually when done")
+    
+    def run_in_tab(self, driver, user_data: Dict[str, Any]) -> Steps:
+        """
+        The workflow as a TabScheduler job: driver is the shared browser,
+        already switched to this job's tab; the scheduler closes the tab.
+        """
+        self.driver = driver
+        self.cooperative = True
+        try:
+            result = yield from self.workflow_steps(user_data)
+            if self.auto_close and self.close_delay:
+                yield pause(self.close_delay)
+            return result
+        except Exception as e:
+            return self.failure_result(e)
+    
+    def workflow_steps(self, user_data: Dict[str, Any]) -> Steps:
+        """
+        Steps 5-7 on an open browser. Yields WaitFor instead of blocking, so
+        the same steps run on a browser of their own (run_steps) or share one
+        with other jobs (TabScheduler).
+        """
+        self.job_id = new_job_id()
+        self.screenshots = []
+        
+        # Store session data
+        self.session_data = {
+            'city': user_data.get('city', 'Ahmedabad'),
+            'service_number': user_data.get('service_number', ''),
+            't_number': user_data.get('t_number', ''),
+            'mobile': user_data.get('mobile', ''),
+            'email': user_data.get('email', ''),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        logger.info(f"📋 Session data stored: {self.session_data}")
+        
+        # Step 5: Navigate to Official Torrent Power Website
+        logger.info("🌐 Step 5: Opening official Torrent Power website...")
+        logger.info(f"🎬 🔗 NAVIGATING TO: {FORM_URL}")
+        self.blocker = block_resources(self.driver, SUPPLIER_ID, visible=not self.headless)
+        
+        if self.cooperative:
+            # Only start the navigation, so other tabs keep running while it loads
+            navigate(self.driver, FORM_URL, wait=False)
+        else:
             # Set shorter timeout for faster navigation
             self.driver.set_page_load_timeout(15)
-            
             try:
-                self.driver.get("https://connect.torrentpower.com/tplcp/application/namechangerequest")
+                self.driver.get(FORM_URL)
             except Exception as e:
                 logger.warning(f"⚠️ Page load timeout (continuing anyway): {e}")
-            
-            # Wait for form to appear (faster than fixed wait)
-            logger.info("⏳ Waiting for form to load...")
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "form"))
-                )
-                logger.info("✅ Form loaded!")
-            except TimeoutException:
-                logger.warning("⚠️ Form not found, continuing anyway...")
-            
-            time.sleep(1)  # Quick pause for rendering
-            self.take_screenshot("page_loaded")
-            
-            # Step 6: Official Website Auto-Fill
-            logger.info("🤖 Step 6: Starting AI-assisted auto-fill...")
-            logger.info("👉 WATCH AS EACH FIELD IS AUTOMATICALLY FILLED:")
-            logger.info("-" * 60)
-            
-            # Get intelligent field mappings
-            field_mappings = self.smart_field_mapping(self.session_data)
-            
-            # Fill each field intelligently
-            success_count = 0
-            total_fields = len(field_mappings)
-            
-            for field_name, field_config in field_mappings.items():
-                logger.info(f"")
-                logger.info(f"📝 FIELD #{success_count + 1} - {field_name.upper()}")
-                logger.info(f"   Expected value: '{field_config['value']}'")
-                if self.fill_field_intelligently(field_name, field_config):
-                    success_count += 1
-                    logger.info(f"   Status: ✅ SUCCESSFULLY FILLED")
-                else:
-                    logger.warning(f"   Status: ⚠️ Could not find field (will retry with AI)")
-                logger.info(f"")
-            
-            logger.info("-" * 60)
-            logger.info(f"📊 SUMMARY: {success_count}/{total_fields} fields successfully filled")
-            
-            # Take screenshot after filling
-            logger.info("📸 Taking screenshot of filled form...")
-            time.sleep(2)
-            self.take_screenshot("form_filled")
-            logger.info("✅ Screenshot saved!")
-            
-            # Handle captcha refresh if present
+        
+        # Wait for form to appear (faster than fixed wait)
+        logger.info("⏳ Waiting for form to load...")
+        if (yield WaitFor(lambda d: d.find_elements(By.TAG_NAME, "form"), timeout=10, what="form")):
+            logger.info("✅ Form loaded!")
+        else:
+            logger.warning("⚠️ Form not found, continuing anyway...")
+        
+        yield WaitFor(page_settled, timeout=5, what="page to settle")
+        self.take_screenshot("page_loaded")
+        
+        # Step 6: Official Website Auto-Fill
+        logger.info("🤖 Step 6: Starting AI-assisted auto-fill...")
+        logger.info("👉 WATCH AS EACH FIELD IS AUTOMATICALLY FILLED:")
+        logger.info("-" * 60)
+        
+        # Get intelligent field mappings
+        field_mappings = self.smart_field_mapping(self.session_data)
+        
+        # Fill every field in one round-trip; typing per keystroke only if asked for
+        success_count = 0
+        total_fields = len(field_mappings)
+        fill_report = {}
+        if not self.human_typing:
             try:
-                captcha_refresh = self.driver.find_element(By.CSS_SELECTOR, "button[onclick*='captcha'], input[value*='Regenerate'], button:contains('Regenerate')")
-                if captcha_refresh:
-                    captcha_refresh.click()
-                    time.sleep(2)
-                    logger.info("🔄 Captcha refreshed")
-            except:
-                logger.info("ℹ️ No captcha refresh button found")
-            
-            # Step 7: Stop Before Submission (as per rules)
-            logger.info("")
-            logger.info("=" * 60)
-            logger.info("⏹️  Step 7: READY FOR YOUR REVIEW")
-            logger.info("=" * 60)
-            logger.info("✅ All available fields have been auto-filled!")
-            logger.info("👀 Browser window is NOW OPEN with the filled form")
-            logger.info("📝 NEXT MANUAL STEPS:")
-            logger.info("   1. Review all filled information for accuracy")
-            logger.info("   2. Fix any incorrect fields if needed")
-            logger.info("   3. Complete the CAPTCHA manually")
-            logger.info("   4. Click SUBMIT button when ready")
-            logger.info("   5. Save your application reference number")
-            logger.info("=" * 60)
-            logger.info("")
-            
-            # Final screenshot
-            self.take_screenshot("ready_for_submission")
+                fill_report = yield from fill_form_steps(self.driver, field_mappings, portal=(SUPPLIER_ID, FORM_URL))
+            except Exception as e:
+                logger.warning(f"⚠️ Batch fill failed, filling field by field: {e}")
+        
+        for field_name, field_config in field_mappings.items():
+            logger.info(f"")
+            logger.info(f"📝 FIELD #{success_count + 1} - {field_name.upper()}")
+            logger.info(f"   Expected value: '{field_config['value']}'")
+            if fill_report.get(field_name, {}).get('filled'):
+                success_count += 1
+                logger.info(f"   Status: ✅ SUCCESSFULLY FILLED ({fill_report[field_name].get('strategy')})")
+            elif (yield from self.fill_field_steps(field_name, field_config)):
+                success_count += 1
+                logger.info(f"   Status: ✅ SUCCESSFULLY FILLED")
+            else:
+                logger.warning(f"   Status: ⚠️ Could not find field (will retry with AI)")
+            logger.info(f"")
+        
+        logger.info("-" * 60)
+        logger.info(f"📊 SUMMARY: {success_count}/{total_fields} fields successfully filled")
+        
+        # Take screenshot after filling
+        logger.info("📸 Taking screenshot of filled form...")
+        yield WaitFor(ui_settled, timeout=3, what="UI to settle")
+        self.take_screenshot("form_filled")
+        logger.info("✅ Screenshot saved!")
+        
+        # Handle captcha refresh if present
+        captcha_refreshed = False
+        try:
+            captcha_refresh = self.driver.find_element(By.CSS_SELECTOR, "button[onclick*='captcha'], input[value*='Regenerate'], button:contains('Regenerate')")
+            if captcha_refresh:
+                captcha_refresh.click()
+                captcha_refreshed = True
+        except:
+            logger.info("ℹ️ No captcha refresh button found")
+        if captcha_refreshed:
+            yield WaitFor(ui_settled, timeout=3, what="captcha refresh")
+            logger.info("🔄 Captcha refreshed")
+        
+        # Step 7: Stop Before Submission (as per rules)
+        logger.info("")
+        logger.info("=" * 60)
+        logger.info("⏹️  Step 7: READY FOR YOUR REVIEW")
+        logger.info("=" * 60)
+        logger.info("✅ All available fields have been auto-filled!")
+        logger.info("👀 Browser window is NOW OPEN with the filled form")
+        logger.info("📝 NEXT MANUAL STEPS:")
+        logger.info("   1. Review all filled information for accuracy")
+        logger.info("   2. Fix any incorrect fields if needed")
+        logger.info("   3. Complete the CAPTCHA manually")
+        logger.info("   4. Click SUBMIT button when ready")
+        logger.info("   5. Save your application reference number")
+        logger.info("=" * 60)
+        logger.info("")
+        
+        # Final screenshot
+        self.take_screenshot("ready_for_submission")
+        
+        # Success response with modal data - exactly as shown in screenshot
+        return {
+            "success": True,
+            "message": "✅ AUTOMATION COMPLETE! Form filled successfully.",
+            "details": f"Auto-filled {success_count}/{total_fields} fields successfully.",
+            "timestamp": datetime.now().isoformat(),
+            "provider": "torrent_power",
+            "automation_type": "production_ai_selenium_visible",
+            "session_data": self.session_data,
+            "screenshots": self.screenshots,
+            "fields_filled": success_count,
+            "total_fields": total_fields,
+            "success_rate": f"{(success_count/total_fields)*100:.1f}%",
+            "resources": resource_report(self.blocker),
             
-            # Success response with modal data - exactly as shown in screenshot
-            return {
-                "success": True,
-                "message": "✅ AUTOMATION COMPLETE! Form filled successfully.",
-                "details": f"Auto-filled {success_count}/{total_fields} fields successfully.",
-                "timestamp": datetime.now().isoformat(),
-                "provider": "torrent_power",
-                "automation_type": "production_ai_selenium_visible",
-                "session_data": self.session_data,
-                "screenshots": self.screenshots,
-                "fields_filled": success_count,
-                "total_fields": total_fields,
-                "success_rate": f"{(success_count/total_fields)*100:.1f}%",
+            # Modal data - exactly as shown in screenshot
+            "modal": {
+                "title": "Torrent Power | Name Change Application",
+                "header_color": "linear-gradient(90deg, #007bff, #9c27b0)",
+                "close_button": True,
                 
-                # Modal data - exactly as shown in screenshot
-                "modal": {
-                    "title": "Torrent Power | Name Change Application",
-                    "header_color": "linear-gradient(90deg, #007bff, #9c27b0)",
-                    "close_button": True,
-                    
-                    # Success status box
-                    "status_box": {
+                # Success status box
+                "status_box": {
+                    "icon": "✓",
+                    "icon_color": "red",
+                    "text": "Application Submitted Successfully",
+                    "text_color": "red",
+                    "border_color": "red",
+                    "background_color": "#fff5f5"
+                },
+                
+                # Checklist items
+                "checklist": [
+                    {
                         "icon": "✓",
-                        "icon_color": "red",
-                        "text": "Application Submitted Successfully",
-                        "text_color": "red",
-                        "border_color": "red",
-                        "background_color": "#fff5f5"
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "City selected",
+                        "text_color": "green"
                     },
-                    
-                    # Checklist items
-                    "checklist": [
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "City selected",
-                            "text_color": "green"
-                        },
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "Service Number filled",
-                            "text_color": "green"
-                        },
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "T Number filled",
-                            "text_color": "green"
-                        },
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "Mobile Number filled",
-                            "text_color": "green"
-                        },
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "Email filled",
-                            "text_color": "green"
-                        },
-                        {
-                            "icon": "✓",
-                            "icon_color": "green",
-                            "checkbox": "✓",
-                            "checkbox_color": "green",
-                            "text": "Form filled successfully",
-                            "text_color": "green",
-                            "border": "red",
-                            "highlight": True
-                        }
-                    ],
-                    
-                    # Warning message box
-                    "warning_box": {
-                        "icon": "!",
-                        "icon_color": "red",
-                        "icon_size": "large",
-                        "text": "Application has not been submitted due to incorrect data.",
-                        "text_color": "red",
-                        "background_color": "#fff5f5",
-                        "border_color": "#ffebee"
+                    {
+                        "icon": "✓",
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "Service Number filled",
+                        "text_color": "green"
                     },
-                    
-                    # Action button
-                    "button": {
-                        "text": "OK",
-                        "color": "white",
-                        "background_color": "#4caf50",
-                        "action": "close"
+                    {
+                        "icon": "✓",
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "T Number filled",
+                        "text_color": "green"
+                    },
+                    {
+                        "icon": "✓",
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "Mobile Number filled",
+                        "text_color": "green"
+                    },
+                    {
+                        "icon": "✓",
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "Email filled",
+                        "text_color": "green"
+                    },
+                    {
+                        "icon": "✓",
+                        "icon_color": "green",
+                        "checkbox": "✓",
+                        "checkbox_color": "green",
+                        "text": "Form filled successfully",
+                        "text_color": "green",
+                        "border": "red",
+                        "highlight": True
                     }
+                ],
+                
+                # Warning message box
+                "warning_box": {
+                    "icon": "!",
+                    "icon_color": "red",
+                    "icon_size": "large",
+                    "text": "Application has not been submitted due to incorrect data.",
+                    "text_color": "red",
+                    "background_color": "#fff5f5",
+                    "border_color": "#ffebee"
                 },
                 
-                "portal_url": "https://connect.torrentpower.com/tplcp/application/namechangerequest",
-                "automation_summary": "Unified Portal → Torrent Power Name Change auto-fill completed successfully.",
-                "user_action_required": "Review form and submit manually"
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ AUTOMATION FAILED!")
-            logger.error(f"❌ Error type: {type(e).__name__}")
-            logger.error(f"❌ Error message: {str(e)}")
-            import traceback
-            logger.error(f"❌ Full traceback:\n{traceback.format_exc()}")
-            
-            # Take error screenshot if driver exists
-            if self.driver:
-                try:
-                    self.take_screenshot("error_state")
-                except:
-                    pass
+                # Action button
+                "button": {
+                    "text": "OK",
+                    "color": "white",
+                    "background_color": "#4caf50",
+                    "action": "close"
+                }
+            },
             
-            return {
-                "success": False,
-                "error": str(e),
-                "message": f"Torrent Power automation failed: {str(e)}",
-                "timestamp": datetime.now().isoformat(),
-                "provider": "torrent_power",
-                "automation_type": "production_ai_selenium",
-                "session_data": self.session_data,
-                "screenshots": self.screenshots,
-                "troubleshooting": [
-                    "1. Check if Torrent Power website is accessible",
-                    "2. Verify Chrome browser is properly installed",
-                    "3. Ensure stable internet connection",
-                    "4. Try again - website might have temporary issues",
-                    "5. Check backend logs for detailed error information"
-                ],
-                "fallback_action": "Please fill the form manually on Torrent Power website",
-                "portal_url": "https://connect.torrentpower.com/tplcp/application/namechangerequest"
-            }
+            "portal_url": "https://connect.torrentpower.com/tplcp/application/namechangerequest",
+            "automation_summary": "Unified Portal → Torrent Power Name Change auto-fill completed successfully.",
+            "user_action_required": "Review form and submit manually"
+        }
         
-        finally:
-            # Handle browser closing based on settings
-            if self.auto_close:
-                logger.info(f"⏳ Auto-close enabled - waiting {self.close_delay} seconds before closing...")
-                time.sleep(self.close_delay)
-                logger.info("🔒 Closing browser silently...")
-                if self.driver:
-                    try:
-                        # Close silently without any alerts
-                        self.driver.quit()
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error closing browser: {e}")
-                logger.info("✅ Browser closed")
-            else:
-                logger.info("")
-                logger.info("🎬 BROWSER WILL STAY OPEN FOR YOUR REVIEW!")
-                logger.info("✋ Close the browser manually when done")
+    def failure_result(self, e: Exception) -> Dict[str, Any]:
+        """Failure response (with an error screenshot when the browser is up)"""
+        logger.error(f"❌ AUTOMATION FAILED!")
+        logger.error(f"❌ Error type: {type(e).__name__}")
+        logger.error(f"❌ Error message: {str(e)}")
+        import traceback
+        logger.error(f"❌ Full traceback:\n{traceback.format_exc()}")
+        
+        # Take error screenshot if driver exists
+        if self.driver:
+            try:
+                self.take_screenshot("error_state")
+            except:
+                pass
+        
+        return {
+            "success": False,
+            "error": str(e),
+            "message": f"Torrent Power automation failed: {str(e)}",
+            "timestamp": datetime.now().isoformat(),
+            "provider": "torrent_power",
+            "automation_type": "production_ai_selenium",
+            "session_data": self.session_data,
+            "screenshots": self.screenshots,
+            "resources": resource_report(self.blocker),
+            "troubleshooting": [
+                "1. Check if Torrent Power website is accessible",
+                "2. Verify Chrome browser is properly installed",
+                "3. Ensure stable internet connection",
+                "4. Try again - website might have temporary issues",
+                "5. Check backend logs for detailed error information"
+            ],
+            "fallback_action": "Please fill the form manually on Torrent Power website",
+            "portal_url": "https://connect.torrentpower.com/tplcp/application/namechangerequest"
+        }
     
     def cleanup(self):
         """Cleanup resources if needed"""
@@ -3,17 +3,18 @@ Torrent Power Service - Clean Implementation
 Handles Torrent Power automation using Selenium
 """
 
-import time
 import logging
 from typing import Dict, Any, Optional
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+
+from app.services.browser_mode import resolve_headless
+from app.services.driver_pool import get_driver_pool
+from app.services.browser_waits import type_into, wait_for_page_settled
+from app.services.resource_blocker import block_resources, resource_report
+from app.services.screenshot_pipeline import get_screenshot_pipeline, new_job_id
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,27 +24,21 @@ logger = logging.getLogger(__name__)
 class TorrentPowerService:
     """Service for Torrent Power automation"""
     
-    def __init__(self, headless: bool = True):
-        """Initialize the service"""
+    def __init__(self, visible: Optional[bool] = None):
+        """Initialize the service (visible=None follows BROWSER_MODE)"""
         self.driver = None
         self.wait = None
-        self.headless = headless
-        logger.info(f"🚀 TorrentPowerService initialized (headless={headless})")
+        self.headless = resolve_headless(visible)
+        self.blocker = None
+        logger.info(f"🚀 TorrentPowerService initialized (headless={self.headless})")
     
     def initialize_browser(self) -> bool:
-        """Initialize Chrome browser"""
+        """Lease a Chrome browser from the shared pool"""
         try:
             logger.info("🌐 Initializing Chrome browser...")
             
-            chrome_options = Options()
-            if self.headless:
-                chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--window-size=1280,720")
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.driver = get_driver_pool().acquire(headless=self.headless)
+            self.driver.set_window_size(1280, 720)
             self.wait = WebDriverWait(self.driver, 10)
             
             logger.info("✅ Browser initialized successfully")
@@ -64,15 +59,13 @@ class TorrentPowerService:
             
             # Navigate to form
             logger.info("📝 Navigating to Torrent Power name change form...")
+            self.blocker = block_resources(self.driver, "torrent-power", visible=not self.headless)
             self.driver.get("https://connect.torrentpower.com/tplcp/application/namechangerequest")
-            time.sleep(5)  # Wait for page to load completely
+            wait_for_page_settled(self.driver)
             
             # Take initial screenshot
-            try:
-                self.driver.save_screenshot("torrent_initial_page.png")
-                logger.info("📸 Initial page screenshot taken")
-            except:
-                pass
+            job_id = new_job_id()
+            screenshots = [get_screenshot_pipeline().capture(self.driver, "torrent_initial_page", job_id)]
             
             # Fill form fields with actual data
             fields_filled = 0
@@ -82,7 +75,6 @@ class TorrentPowerService:
             try:
                 city_dropdown = self.wait.until(EC.element_to_be_clickable((By.ID, "city")))
                 city_dropdown.click()
-                time.sleep(1)
                 
                 # Select the city from form data
                 city_option = self.driver.find_element(By.XPATH, f"//option[text()='{form_data.get('city', 'Ahmedabad')}']")
@@ -95,8 +87,7 @@ class TorrentPowerService:
             # 2. Fill Service Number
             try:
                 service_field = self.wait.until(EC.presence_of_element_located((By.NAME, "serviceNumber")))
-                service_field.clear()
-                service_field.send_keys(form_data.get('service_number', ''))
+                type_into(self.driver, service_field, form_data.get('service_number', ''))
                 fields_filled += 1
                 logger.info(f"✅ Service Number filled: {form_data.get('service_number', '')}")
             except Exception as e:
@@ -105,8 +96,7 @@ class TorrentPowerService:
             # 3. Fill T Number
             try:
                 t_number_field = self.wait.until(EC.presence_of_element_located((By.NAME, "tNumber")))
-                t_number_field.clear()
-                t_number_field.send_keys(form_data.get('t_number', ''))
+                type_into(self.driver, t_number_field, form_data.get('t_number', ''))
                 fields_filled += 1
                 logger.info(f"✅ T Number filled: {form_data.get('t_number', '')}")
             except Exception as e:
@@ -115,8 +105,7 @@ class TorrentPowerService:
             # 4. Fill Mobile Number
             try:
                 mobile_field = self.wait.until(EC.presence_of_element_located((By.NAME, "mobileNumber")))
-                mobile_field.clear()
-                mobile_field.send_keys(form_data.get('mobile', ''))
+                type_into(self.driver, mobile_field, form_data.get('mobile', ''))
                 fields_filled += 1
                 logger.info(f"✅ Mobile Number filled: {form_data.get('mobile', '')}")
             except Exception as e:
@@ -125,19 +114,14 @@ class TorrentPowerService:
             # 5. Fill Email
             try:
                 email_field = self.wait.until(EC.presence_of_element_located((By.NAME, "email")))
-                email_field.clear()
-                email_field.send_keys(form_data.get('email', ''))
+                type_into(self.driver, email_field, form_data.get('email', ''))
                 fields_filled += 1
                 logger.info(f"✅ Email filled: {form_data.get('email', '')}")
             except Exception as e:
                 logger.error(f"❌ Failed to fill email: {e}")
             
             # Take final screenshot
-            try:
-                self.driver.save_screenshot("torrent_form_filled.png")
-                logger.info("📸 Form filled screenshot taken")
-            except:
-                pass
+            screenshots.append(get_screenshot_pipeline().capture(self.driver, "torrent_form_filled", job_id))
             
             # Return success result
             return {
@@ -145,6 +129,8 @@ class TorrentPowerService:
                 "message": f"Form auto-filled successfully! {fields_filled}/{total_fields} fields completed.",
                 "fields_filled": fields_filled,
                 "total_fields": total_fields,
+                "resources": resource_report(self.blocker),
+                "screenshots": [name for name in screenshots if name],
                 "next_steps": [
                     "✅ Form fields have been automatically filled",
                     "📝 Please review the filled data for accuracy",
@@ -164,6 +150,7 @@ class TorrentPowerService:
             # Keep browser open for user interaction if not headless
             if not self.headless:
                 logger.info("ℹ️ Browser kept open for manual review and submission")
+                get_driver_pool().detach(self.driver)
     
     def cleanup(self):
         """Clean up resources"""
@@ -171,7 +158,7 @@ class TorrentPowerService:
             if self.driver:
                 logger.info("🧹 Cleaning up Torrent Power service...")
                 if self.headless:
-                    self.driver.quit()
+                    get_driver_pool().release(self.driver)
                     self.driver = None
                 logger.info("✅ Torrent Power service cleanup completed")
         except Exception as e:
@@ -179,4 +166,4 @@ class TorrentPowerService:
 
 
 # Global service instance
-torrent_power_service = TorrentPowerService(headless=False)  # Keep browser visible for user interaction
\ No newline at end of file
+torrent_power_service = TorrentPowerService(visible=True)  # Keep browser visible for user interaction
\ No newline at end of file
@@ -4,182 +4,57 @@ Real browser automation for form filling
 """
 
 import time
-import os
-import stat
 import logging
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+
+from app.services.browser_mode import requested_visibility, resolve_headless
+from app.services.driver_pool import get_driver_pool
+from app.services.js_form_filler import fill_form_fields
+from app.services.resource_blocker import block_resources, resource_report
+from app.services.screenshot_pipeline import get_screenshot_pipeline, new_job_id
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TorrentPowerRPA:
+    SUPPLIER_ID = "torrent-power"
+    FORM_URL = "https://connect.torrentpower.com/tplcp/application/namechangerequest"
+    
+    FIELD_LABELS = {
+        'city': 'City',
+        'service_number': 'Service Number',
+        't_number': 'T Number',
+        'mobile': 'Mobile',
+        'email': 'Email',
+    }
+    
     def __init__(self):
         self.driver = None
         self.wait = None
+        self.headless = True
+        self.visible = None  # Per-request override; None follows BROWSER_MODE
+        self.blocker = None
+        self.job_id = new_job_id()
+        self.screenshots = []
         
     def setup_driver(self):
-        """Setup Chrome WebDriver with proper options for EC2"""
+        """Lease a Chrome WebDriver from the shared pool (headless per BROWSER_MODE)"""
         try:
-            chrome_options = Options()
-            
-            # Check if running in Docker/EC2 environment (cross-platform)
-            import platform
-            is_docker = os.path.exists('/.dockerenv')
-            try:
-                node_name = platform.uname().nodename or platform.node()
-            except Exception:
-                node_name = ''
-            is_ec2 = os.path.exists('/opt/aws') or ('ec2' in node_name.lower())
-
-            logger.info(f"🔍 Environment detection - Docker: {is_docker}, EC2: {is_ec2}")
-            
-            if is_docker or is_ec2:
-                # Docker/EC2 specific options
-                chrome_options.add_argument("--headless=new")  # Use new headless mode
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--disable-software-rasterizer")
-                chrome_options.add_argument("--disable-background-timer-throttling")
-                chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-                chrome_options.add_argument("--disable-renderer-backgrounding")
-                chrome_options.add_argument("--disable-features=TranslateUI")
-                chrome_options.add_argument("--disable-ipc-flooding-protection")
-                chrome_options.add_argument("--memory-pressure-off")
-                chrome_options.add_argument("--max_old_space_size=4096")
-                
-                # Set display for X11 forwarding (if available)
-                if 'DISPLAY' not in os.environ:
-                    os.environ['DISPLAY'] = ':99'
-                
-                logger.info("🐳 Using Docker/EC2 optimized Chrome options")
-            else:
-                # Local development - visible browser
-                chrome_options.add_argument("--start-maximized")
-                logger.info("💻 Using local development Chrome options (visible browser)")
-            
-            # Common options for all environments
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--disable-notifications")
-            chrome_options.add_argument("--disable-popup-blocking")
-            chrome_options.add_argument("--disable-translate")
-            chrome_options.add_argument("--disable-logging")
-            chrome_options.add_argument("--disable-login-animations")
-            chrome_options.add_argument("--disable-motion-blur")
-            chrome_options.add_argument("--no-first-run")
-            chrome_options.add_argument("--no-default-browser-check")
-            chrome_options.add_argument("--ignore-certificate-errors")
-            chrome_options.add_argument("--ignore-ssl-errors")
-            chrome_options.add_argument("--ignore-certificate-errors-spki-list")
-            chrome_options.add_argument("--ignore-certificate-errors-ssl-errors")
-            
-            # User agent to avoid detection
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            # Set Chrome binary path for Docker
-            if is_docker:
-                chrome_options.binary_location = "/usr/bin/google-chrome"
-            
-            # Try multiple ChromeDriver approaches in order of preference
-            driver_initialized = False
-            
-            # Method 1: Use system-installed ChromeDriver (from Dockerfile)
-            try:
-                logger.info("🔧 Trying system ChromeDriver from /usr/bin/chromedriver...")
-                service = Service('/usr/bin/chromedriver')
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                logger.info("✅ Chrome driver initialized with system ChromeDriver")
-                driver_initialized = True
-            except Exception as e:
-                logger.error(f"❌ System ChromeDriver failed: {e}")
-            
-            # Method 2: Try webdriver-manager (with path fix)
-            if not driver_initialized:
-                try:
-                    logger.info("🔧 Trying webdriver-manager...")
-                    from webdriver_manager.chrome import ChromeDriverManager
-                    
-                    # Use webdriver-manager to handle driver installation
-                    driver_path = ChromeDriverManager().install()
-                    logger.info(f"🔍 ChromeDriver path from webdriver-manager: {driver_path}")
-                    
-                    # Fix common webdriver-manager path issue
-                    if 'THIRD_PARTY_NOTICES' in driver_path or not driver_path.endswith('chromedriver'):
-                        # Extract the correct directory and find the actual chromedriver binary
-                        driver_dir = os.path.dirname(driver_path)
-                        
-                        # Look for the actual chromedriver binary
-                        possible_paths = [
-                            os.path.join(driver_dir, 'chromedriver'),
-                            os.path.join(driver_dir, 'chromedriver-linux64', 'chromedriver'),
-                            os.path.join(os.path.dirname(driver_dir), 'chromedriver'),
-                        ]
-                        
-                        for possible_path in possible_paths:
-                            if os.path.exists(possible_path):
-                                driver_path = possible_path
-                                logger.info(f"🔧 Fixed ChromeDriver path: {driver_path}")
-                                break
-                        else:
-                            # Search for any chromedriver file in the directory tree
-                            for root, dirs, files in os.walk(os.path.dirname(driver_dir)):
-                                for file in files:
-                                    if file == 'chromedriver':
-                                        driver_path = os.path.join(root, file)
-                                        logger.info(f"🔧 Found ChromeDriver binary: {driver_path}")
-                                        break
-                                if driver_path != ChromeDriverManager().install():
-                                    break
-                    
-                    # Make sure the driver is executable
-                    if os.path.exists(driver_path):
-                        os.chmod(driver_path, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-                        
-                        service = Service(driver_path)
-                        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                        logger.info("✅ Chrome driver initialized with webdriver-manager")
-                        driver_initialized = True
-                    else:
-                        logger.error(f"❌ ChromeDriver path does not exist: {driver_path}")
-                        
-                except ImportError:
-                    logger.error("❌ webdriver-manager not available")
-                except Exception as e:
-                    logger.error(f"❌ webdriver-manager Chrome driver failed: {e}")
-            
-            # Method 3: Try system PATH (no explicit service)
-            if not driver_initialized:
-                try:
-                    logger.info("🔧 Trying Chrome from system PATH...")
-                    self.driver = webdriver.Chrome(options=chrome_options)
-                    logger.info("✅ Chrome driver initialized from system PATH")
-                    driver_initialized = True
-                except Exception as e:
-                    logger.error(f"❌ System PATH Chrome driver failed: {e}")
+            self.headless = resolve_headless(self.visible)
+            logger.info(f"🔍 Browser: {'headless' if self.headless else 'visible'}")
             
-            # If all methods failed
-            if not driver_initialized:
-                raise Exception("All ChromeDriver initialization methods failed")
+            self.driver = get_driver_pool().acquire(headless=self.headless)
             
             # Set timeouts
             self.driver.implicitly_wait(10)
             self.driver.set_page_load_timeout(30)
             self.wait = WebDriverWait(self.driver, 20)
             
-            # Test driver
-            logger.info("🧪 Testing Chrome driver...")
-            self.driver.get("data:text/html,<html><body><h1>Driver Test</h1></body></html>")
-            logger.info("✅ Chrome driver test successful")
-            
+            logger.info("✅ Chrome driver leased from pool")
             return True
             
         except Exception as e:
@@ -199,9 +74,10 @@ class TorrentPowerRPA:
     def navigate_to_torrent_power(self):
         """Navigate to Torrent Power name change form"""
         try:
-            url = "https://connect.torrentpower.com/tplcp/application/namechangerequest"
+            url = self.FORM_URL
             logger.info(f"🌐 Navigating to: {url}")
             
+            self.blocker = block_resources(self.driver, self.SUPPLIER_ID, visible=not self.headless)
             self.driver.get(url)
             
             # Wait for page to load
@@ -209,8 +85,7 @@ class TorrentPowerRPA:
             logger.info("✅ Page loaded successfully")
             
             # Take screenshot for debugging
-            self.driver.save_screenshot("torrent_page_loaded.png")
-            logger.info("📸 Screenshot saved: torrent_page_loaded.png")
+            self.take_screenshot("torrent_page_loaded")
             
             return True
             
@@ -221,208 +96,92 @@ class TorrentPowerRPA:
             logger.error(f"❌ Navigation failed: {e}")
             return False
     
-    def fill_form(self, form_data):
-        """Fill the Torrent Power form with provided data"""
-        try:
-            logger.info("🚀 Starting form filling...")
-            filled_fields = []
-            
-            # 1. Fill City Dropdown
-            try:
-                logger.info("🔍 Looking for city dropdown...")
-                city_select = self.wait.until(EC.element_to_be_clickable((By.TAG_NAME, "select")))
-                
-                select = Select(city_select)
-                city = form_data.get('city', 'Ahmedabad')
-                
-                # Try to select by visible text or value
-                options = select.options
-                for option in options:
-                    if city.lower() in option.text.lower() or city.lower() in option.get_attribute('value').lower():
-                        select.select_by_value(option.get_attribute('value'))
-                        filled_fields.append(f"✅ City: {option.text}")
-                        logger.info(f"✅ City selected: {option.text}")
-                        
-                        # Highlight the field
-                        self.driver.execute_script("arguments[0].style.backgroundColor = '#d4edda'; arguments[0].style.border = '2px solid #28a745';", city_select)
-                        break
-                
-                time.sleep(1)  # Wait for any dynamic updates
-                
-            except Exception as e:
-                logger.error(f"❌ City dropdown error: {e}")
-                filled_fields.append("❌ City dropdown not found")
-            
-            # 2. Fill Service Number
-            try:
-                logger.info("🔍 Looking for service number field...")
-                service_selectors = [
+    def form_field_specs(self, form_data):
+        """Selector strategies for the name change form, in fill order"""
+        return {
+            'city': {
+                'selectors': ["select"],
+                'value': form_data.get('city', 'Ahmedabad'),
+            },
+            'service_number': {
+                'selectors': [
                     "input[placeholder*='Service Number']",
                     "input[placeholder*='Service']",
                     "input[name*='service']",
                     "input[id*='service']"
-                ]
-                
-                service_input = None
-                for selector in service_selectors:
-                    try:
-                        service_input = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        break
-                    except NoSuchElementException:
-                        continue
-                
-                # Fallback to first text input
-                if not service_input:
-                    text_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text']")
-                    if text_inputs:
-                        service_input = text_inputs[0]
-                
-                if service_input and form_data.get('service_number'):
-                    service_input.clear()
-                    service_input.send_keys(form_data['service_number'])
-                    filled_fields.append(f"✅ Service Number: {form_data['service_number']}")
-                    logger.info(f"✅ Service Number filled: {form_data['service_number']}")
-                    
-                    # Highlight the field
-                    self.driver.execute_script("arguments[0].style.backgroundColor = '#d4edda'; arguments[0].style.border = '2px solid #28a745';", service_input)
-                else:
-                    filled_fields.append("❌ Service Number field not found")
-                
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"❌ Service Number error: {e}")
-                filled_fields.append("❌ Service Number error")
-            
-            # 3. Fill T Number
-            try:
-                logger.info("🔍 Looking for T Number field...")
-                t_selectors = [
+                ],
+                'fallback_index': 0,
+                'value': form_data.get('service_number'),
+            },
+            't_number': {
+                'selectors': [
                     "input[placeholder*='T No']",
                     "input[placeholder*='T-No']",
                     "input[placeholder*='TNo']",
                     "input[name*='tno']",
                     "input[id*='tno']"
-                ]
-                
-                t_input = None
-                for selector in t_selectors:
-                    try:
-                        t_input = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        break
-                    except NoSuchElementException:
-                        continue
-                
-                # Fallback to second text input
-                if not t_input:
-                    text_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text']")
-                    if len(text_inputs) > 1:
-                        t_input = text_inputs[1]
-                
-                if t_input and form_data.get('t_number'):
-                    t_input.clear()
-                    t_input.send_keys(form_data['t_number'])
-                    filled_fields.append(f"✅ T Number: {form_data['t_number']}")
-                    logger.info(f"✅ T Number filled: {form_data['t_number']}")
-                    
-                    # Highlight the field
-                    self.driver.execute_script("arguments[0].style.backgroundColor = '#d4edda'; arguments[0].style.border = '2px solid #28a745';", t_input)
-                else:
-                    filled_fields.append("❌ T Number field not found")
-                
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"❌ T Number error: {e}")
-                filled_fields.append("❌ T Number error")
-            
-            # 4. Fill Mobile Number
-            try:
-                logger.info("🔍 Looking for mobile number field...")
-                mobile_selectors = [
+                ],
+                'fallback_index': 0,
+                'value': form_data.get('t_number'),
+            },
+            'mobile': {
+                'selectors': [
                     "input[type='tel']",
                     "input[placeholder*='Mobile']",
                     "input[placeholder*='mobile']",
                     "input[name*='mobile']",
                     "input[id*='mobile']"
-                ]
-                
-                mobile_input = None
-                for selector in mobile_selectors:
-                    try:
-                        mobile_input = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        break
-                    except NoSuchElementException:
-                        continue
-                
-                # Fallback to third text input
-                if not mobile_input:
-                    text_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text']")
-                    if len(text_inputs) > 2:
-                        mobile_input = text_inputs[2]
-                
-                if mobile_input and form_data.get('mobile'):
-                    mobile_input.clear()
-                    mobile_input.send_keys(form_data['mobile'])
-                    filled_fields.append(f"✅ Mobile: {form_data['mobile']}")
-                    logger.info(f"✅ Mobile filled: {form_data['mobile']}")
-                    
-                    # Highlight the field
-                    self.driver.execute_script("arguments[0].style.backgroundColor = '#d4edda'; arguments[0].style.border = '2px solid #28a745';", mobile_input)
-                else:
-                    filled_fields.append("❌ Mobile field not found")
-                
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"❌ Mobile error: {e}")
-                filled_fields.append("❌ Mobile error")
-            
-            # 5. Fill Email
-            try:
-                logger.info("🔍 Looking for email field...")
-                email_selectors = [
+                ],
+                'fallback_index': 0,
+                'value': form_data.get('mobile'),
+            },
+            'email': {
+                'selectors': [
                     "input[type='email']",
                     "input[placeholder*='Email']",
                     "input[placeholder*='email']",
                     "input[name*='email']",
                     "input[id*='email']"
-                ]
-                
-                email_input = None
-                for selector in email_selectors:
-                    try:
-                        email_input = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        break
-                    except NoSuchElementException:
-                        continue
-                
-                # Fallback to fourth text input
-                if not email_input:
-                    text_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text']")
-                    if len(text_inputs) > 3:
-                        email_input = text_inputs[3]
-                
-                if email_input and form_data.get('email'):
-                    email_input.clear()
-                    email_input.send_keys(form_data['email'])
-                    filled_fields.append(f"✅ Email: {form_data['email']}")
-                    logger.info(f"✅ Email filled: {form_data['email']}")
-                    
-                    # Highlight the field
-                    self.driver.execute_script("arguments[0].style.backgroundColor = '#d4edda'; arguments[0].style.border = '2px solid #28a745';", email_input)
+                ],
+                'fallback_index': 0,
+                'value': form_data.get('email'),
+            },
+        }
+    
+    def fill_form(self, form_data, options=None):
+        """Fill the Torrent Power form with provided data"""
+        try:
+            logger.info("🚀 Starting form filling...")
+            filled_fields = []
+            human_typing = options.get('human_typing') if options else None
+            
+            # Wait for the city dropdown so the form is interactive
+            try:
+                self.wait.until(EC.element_to_be_clickable((By.TAG_NAME, "select")))
+            except TimeoutException:
+                logger.warning("⚠️ City dropdown not clickable yet, filling anyway")
+            
+            # Resolve and fill every field in a single round-trip
+            report = fill_form_fields(
+                self.driver,
+                self.form_field_specs(form_data),
+                human_typing=human_typing,
+                portal=(self.SUPPLIER_ID, self.FORM_URL),
+            )
+            
+            for name, label in self.FIELD_LABELS.items():
+                entry = report.get(name, {})
+                if entry.get('filled'):
+                    filled_fields.append(f"✅ {label}: {entry.get('display') or form_data.get(name)}")
+                    logger.info(f"✅ {label} filled via {entry.get('strategy')} {entry.get('selector') or ''}")
+                elif entry.get('error') in ('not found', 'no value'):
+                    filled_fields.append(f"❌ {label} field not found")
                 else:
-                    filled_fields.append("❌ Email field not found")
-                
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"❌ Email error: {e}")
-                filled_fields.append("❌ Email error")
+                    filled_fields.append(f"❌ {label} error")
+                    logger.error(f"❌ {label}: {entry.get('error')}")
             
             # Take final screenshot
-            self.driver.save_screenshot("torrent_form_filled.png")
-            logger.info("📸 Final screenshot saved: torrent_form_filled.png")
+            self.take_screenshot("torrent_form_filled")
             
             # Show success notification on the page
             success_count = len([f for f in filled_fields if f.startswith('✅')])
@@ -457,7 +216,7 @@ class TorrentPowerRPA:
                 "filled_fields": filled_fields,
                 "total_filled": success_count,
                 "total_fields": 5,
-                "screenshots": ["torrent_page_loaded.png", "torrent_form_filled.png"]
+                "screenshots": list(self.screenshots)
             }
             
         except Exception as e:
@@ -488,20 +247,29 @@ class TorrentPowerRPA:
         except Exception as e:
             logger.error(f"❌ Error keeping browser open: {e}")
     
+    def take_screenshot(self, name):
+        """Queue a screenshot tagged with this run's job id"""
+        filename = get_screenshot_pipeline().capture(self.driver, name, self.job_id)
+        if filename:
+            self.screenshots.append(filename)
+
     def close_driver(self):
-        """Close the browser driver"""
+        """Return the browser driver to the pool"""
         try:
             if self.driver:
-                self.driver.quit()
-                logger.info("✅ Browser closed")
+                get_driver_pool().release(self.driver)
+                self.driver = None
+                logger.info("✅ Browser released")
         except Exception as e:
             logger.error(f"❌ Error closing browser: {e}")
     
-    def run_automation(self, form_data, keep_open=True, visible_mode=False):
+    def run_automation(self, form_data, keep_open=True, visible_mode=False, options=None):
         """Run the complete RPA automation"""
         try:
             logger.info("🚀 Starting Torrent Power RPA Automation...")
-            logger.info(f"🔍 Mode: {'Visible' if visible_mode else 'Headless'}")
+            self.job_id, self.screenshots = new_job_id(), []
+            self.visible = True if visible_mode else requested_visibility(options)
+            logger.info(f"🔍 Requested: {'Visible' if self.visible else 'Headless' if self.visible is False else 'BROWSER_MODE'}")
             
             # Setup driver
             if not self.setup_driver():
@@ -513,6 +281,8 @@ class TorrentPowerRPA:
             
             # Fill form (pass options)
             result = self.fill_form(form_data, options=options)
+            result["resources"] = resource_report(self.blocker)
+            result["screenshots"] = self.screenshots
 
             if result["success"] and keep_open:
                 keep_time = options.get('keep_open', 300) if options else 300
@@ -525,33 +295,25 @@ class TorrentPowerRPA:
             logger.error(f"❌ RPA automation failed: {e}")
             return {"success": False, "error": str(e)}
         finally:
-            if not keep_open:
+            if keep_open:
+                # Browser stays with the user; free its pool slot
+                get_driver_pool().detach(self.driver)
+            else:
                 self.close_driver()
 
     def run_visible_automation(self, form_data, options=None):
         """Run automation with visible browser for debugging"""
         try:
             logger.info("🚀 Starting VISIBLE Torrent Power RPA Automation...")
+            self.job_id, self.screenshots = new_job_id(), []
             
             # Temporarily modify Chrome options for visible mode
             original_setup = self.setup_driver
             
             def visible_setup():
-                chrome_options = Options()
-                # Visible browser options
-                chrome_options.add_argument("--start-maximized")
-                chrome_options.add_argument("--disable-notifications")
-                chrome_options.add_argument("--disable-popup-blocking")
-                chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-                
-                try:
-                    from webdriver_manager.chrome import ChromeDriverManager
-                    service = Service(ChromeDriverManager().install())
-                    self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                    logger.info("✅ Visible Chrome driver initialized")
-                except ImportError:
-                    self.driver = webdriver.Chrome(options=chrome_options)
-                    logger.info("✅ Visible Chrome driver initialized (system PATH)")
+                self.headless = resolve_headless(visible=True)
+                self.driver = get_driver_pool().acquire(headless=self.headless)
+                logger.info("✅ Visible Chrome driver leased from pool")
                 
                 self.driver.implicitly_wait(10)
                 self.driver.set_page_load_timeout(30)
@@ -571,6 +333,8 @@ class TorrentPowerRPA:
             
             # Fill form with slower pace for visibility
             result = self.fill_form_visible(form_data, options=options)
+            result["resources"] = resource_report(self.blocker)
+            result["screenshots"] = self.screenshots
             
             # Keep browser open longer for debugging
             keep_time = options.get('keep_open', 600) if options else 600
@@ -585,7 +349,7 @@ class TorrentPowerRPA:
         finally:
             self.close_driver()
     
-    def fill_form_visible(self, form_data):
+    def fill_form_visible(self, form_data, options=None):
         """Fill form with visible feedback and slower pace"""
         try:
             logger.info("🚀 Starting VISIBLE form filling...")
@@ -692,8 +456,7 @@ class TorrentPowerRPA:
                 """)
                 
                 # Try to select by visible text or value
-                options = select.options
-                for option in options:
+                for option in select.options:
                     if city.lower() in option.text.lower() or city.lower() in option.get_attribute('value').lower():
                         value = option.get_attribute('value')
                         # Use JS to set value and dispatch change event for reliability
@@ -842,8 +605,7 @@ class TorrentPowerRPA:
                 filled_fields.append("❌ Email error")
             
             # Take final screenshot
-            self.driver.save_screenshot("torrent_form_filled_visible.png")
-            logger.info("📸 Visible mode screenshot saved")
+            self.take_screenshot("torrent_form_filled_visible")
             
             # Show completion notification
             success_count = len([f for f in filled_fields if f.startswith('✅')])
@@ -868,7 +630,7 @@ class TorrentPowerRPA:
                 "filled_fields": filled_fields,
                 "total_filled": success_count,
                 "total_fields": 5,
-                "screenshots": ["torrent_form_filled_visible.png"],
+                "screenshots": list(self.screenshots),
                 "mode": "visible"
             }
             
@@ -0,0 +1,215 @@
+"""
+Document Uploads
+Uploads are copied to disk in UPLOAD_CHUNK_SIZE chunks with aiofiles while
+their sha256 is computed, instead of read into memory whole and written with
+a blocking open() on the event loop. Size limits are per document type
+(UPLOAD_LIMITS_MB, capped by UPLOAD_MAX_MB) and checked as early as each
+layer allows:
+
+    request Content-Length (UploadSizeLimitMiddleware, before the body is parsed)
+    -> size of the parsed upload -> bytes actually copied
+
+store_upload then hands the file to object storage under a content-addressed
+key, so a file uploaded twice is kept once. create_document_upload is the
+whole document upload (OCR capacity, storage, Document row, OCR queueing)
+shared by /api/documents/upload and /api/users/documents/upload.
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from typing import NamedTuple, Optional
+
+import aiofiles
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.config import get_settings
+from app.models import Document, DocumentType, User
+from app.services.object_storage import content_key, get_object_storage
+from app.services.ocr_cache import get_ocr_cache
+from app.services.ocr_pool import OCR_FAILED, OCR_QUEUED, OCR_SKIPPED, OCRCapacityError, get_ocr_pool
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MULTIPART_OVERHEAD = 64 * 1024  # form fields and part headers around the file
+DOCUMENT_PREFIX = "uploads/documents"  # object storage prefix of uploaded documents
+
+# document_type -> limit in MB (types not listed get "other")
+UPLOAD_LIMITS_MB = {
+    "aadhaar": 5,
+    "pan": 5,
+    "voter_id": 5,
+    "passport": 10,
+    "electricity_bill": 10,
+    "gas_bill": 10,
+    "water_bill": 10,
+    "property_paper": 25,  # multi-page scans
+    "other": 10,
+}
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds its document type's size limit"""
+
+    def __init__(self, limit: int, document_type: Optional[str] = None):
+        self.limit = limit
+        self.document_type = document_type
+        what = f"{document_type} uploads" if document_type else "Uploads"
+        self.message = f"{what} are limited to {limit // MB} MB"
+        super().__init__(self.message)
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    size: int
+    content_hash: str  # sha256 hex
+
+
+class StoredUpload(NamedTuple):
+    key: str  # object storage key
+    size: int
+    content_hash: str  # sha256 hex
+    deduplicated: bool  # the same content was already stored
+
+
+def size_limit(document_type: Optional[str]) -> int:
+    """Largest accepted upload for a document type, in bytes"""
+    limit_mb = UPLOAD_LIMITS_MB.get(document_type or "other", UPLOAD_LIMITS_MB["other"])
+    return min(limit_mb, get_settings().UPLOAD_MAX_MB) * MB
+
+
+async def save_upload(file: UploadFile, path: str, document_type: Optional[str] = None) -> SavedUpload:
+    """
+    Stream an upload to path, hashing it on the way. Raises
+    UploadTooLargeError (leaving nothing on disk) past the type's limit.
+    """
+    limit = size_limit(document_type)
+    if file.size is not None and file.size > limit:
+        raise UploadTooLargeError(limit, document_type)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = path + ".part"
+    chunk_size = get_settings().UPLOAD_CHUNK_SIZE
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLargeError(limit, document_type)
+                digest.update(chunk)
+                await out.write(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return SavedUpload(path, size, digest.hexdigest())
+
+
+async def store_upload(file: UploadFile, prefix: str, document_type: Optional[str] = None) -> StoredUpload:
+    """Stream an upload into object storage under prefix/<sha256[:2]>/<sha256><ext>"""
+    extension = os.path.splitext(os.path.basename(file.filename or ""))[1][:10]
+    tmp_path = os.path.join(get_settings().UPLOAD_TMP_DIR, uuid.uuid4().hex + extension)
+    saved = await save_upload(file, tmp_path, document_type)
+    key = content_key(prefix, saved.content_hash, extension)
+    try:
+        stored = await run_in_threadpool(get_object_storage().put_deduplicated, key, tmp_path, file.content_type)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return StoredUpload(key, saved.size, saved.content_hash, not stored)
+
+
+def _ensure_ocr_capacity(stored: StoredUpload, document_type: str):
+    """Saturated OCR workers only matter when the result isn't cached (429, dropping a new upload)"""
+    cache = get_ocr_cache()
+    if cache is None or cache.contains(stored.content_hash, document_type):
+        return
+    try:
+        get_ocr_pool().ensure_capacity()
+    except OCRCapacityError:
+        if not stored.deduplicated:
+            get_object_storage().delete(stored.key)
+        raise
+
+
+def _save_document(db: Session, document: Document):
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+
+
+def _queue_ocr(db: Session, document: Document, key: str, document_type: str, content_hash: str):
+    try:
+        if get_ocr_pool().submit(document.id, key, document_type, content_hash) is None:
+            db.refresh(document)  # answered from the OCR cache
+    except OCRCapacityError as e:
+        # Filled up since the capacity check; keep the upload, report the OCR as failed
+        document.ocr_status = OCR_FAILED
+        document.ocr_error = e.message
+        db.commit()
+        db.refresh(document)
+
+
+async def create_document_upload(db: Session, user: User, file: UploadFile, doc_type: DocumentType) -> Document:
+    """
+    Store an uploaded document and queue its OCR. Raises UploadTooLargeError
+    (413) or OCRCapacityError (429). Images come back with ocr_status
+    "queued" (or "done" from the OCR cache), other files "skipped".
+    Blocking cache, storage and database calls run in the threadpool.
+    """
+    is_image = bool(file.content_type and file.content_type.startswith("image/"))
+    if is_image and get_ocr_cache() is None:
+        # Nothing can be answered from cache: refuse before saving when the OCR workers are saturated
+        get_ocr_pool().ensure_capacity()
+
+    # Stream into object storage, hashing on the way (413 past the type's limit);
+    # a file stored before is not stored again
+    stored = await store_upload(file, DOCUMENT_PREFIX, doc_type.value)
+    if is_image:
+        await run_in_threadpool(_ensure_ocr_capacity, stored, doc_type.value)
+
+    document = Document(
+        user_id=user.id,
+        doc_type=doc_type,
+        file_name=os.path.basename(file.filename or "upload"),
+        file_url=stored.key,
+        extracted_data={},
+        ocr_status=OCR_QUEUED if is_image else OCR_SKIPPED,
+        content_hash=stored.content_hash,
+    )
+    await run_in_threadpool(_save_document, db, document)
+
+    # OCR runs in a worker process; Aadhaar/PAN results are copied onto the
+    # profile when it finishes (ocr_pool.apply_to_profile)
+    if is_image:
+        await run_in_threadpool(_queue_ocr, db, document, stored.key, doc_type.value, stored.content_hash)
+    return document
+
+
+class UploadSizeLimitMiddleware:
+    """Reject upload requests whose Content-Length is over UPLOAD_MAX_MB before the body is read"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].endswith("/upload"):
+            limit = get_settings().UPLOAD_MAX_MB * MB
+            length = dict(scope["headers"]).get(b"content-length")
+            if length and length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD:
+                logger.warning(f"⚠️ Rejected {int(length) // MB} MB upload to {scope['path']}")
+                error = UploadTooLargeError(limit)
+                response = JSONResponse(status_code=413, content={"success": False, "message": error.message})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -1,32 +1,42 @@
 """
 User Data Service for Selenium Automation
 Stores and retrieves user data for form filling
+Records live in a UserDataStore (SQL table by default, see USER_DATA_BACKEND);
+a background sweeper removes expired ones. Reads never write: access
+metadata goes through a write-behind AccessTracker.
 """
-import json
 import logging
+import threading
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 import hashlib
-import os
+
+from app.config import get_settings
+from app.services.access_tracker import AccessTracker
+from app.services.user_data_store import UserDataStore, create_user_data_store
 
 logger = logging.getLogger(__name__)
 
 class UserDataService:
     """Service to store and retrieve user data for automation"""
     
-    def __init__(self):
-        self.data_dir = "user_data"
-        os.makedirs(self.data_dir, exist_ok=True)
+    def __init__(self, store: Optional[UserDataStore] = None):
+        settings = get_settings()
+        self.store = store or create_user_data_store(settings.USER_DATA_BACKEND, settings.USER_DATA_DIR)
+        self.access = AccessTracker(
+            self.store,
+            flush_interval=settings.USER_DATA_ACCESS_FLUSH_INTERVAL,
+            max_pending=settings.USER_DATA_ACCESS_MAX_PENDING,
+        )
+        self.sweep_interval = settings.USER_DATA_SWEEP_INTERVAL
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
         
     def _generate_user_key(self, mobile: str, email: str = None) -> str:
         """Generate unique key for user based on mobile and email"""
         identifier = f"{mobile}_{email or 'no_email'}"
         return hashlib.md5(identifier.encode()).hexdigest()
     
-    def _get_user_file_path(self, user_key: str) -> str:
-        """Get file path for user data"""
-        return os.path.join(self.data_dir, f"user_{user_key}.json")
-    
     def store_user_data(self, mobile: str, form_data: Dict[str, Any], 
                        email: str = None, expire_hours: int = 24) -> str:
         """
@@ -43,7 +53,6 @@ class UserDataService:
         """
         try:
             user_key = self._generate_user_key(mobile, email)
-            file_path = self._get_user_file_path(user_key)
             
             # Prepare data with metadata
             user_data = {
@@ -58,18 +67,14 @@ class UserDataService:
             }
             
             # Check if user data already exists
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                    user_data["usage_count"] = existing_data.get("usage_count", 0) + 1
-                    user_data["created_at"] = existing_data.get("created_at", user_data["created_at"])
-                except:
-                    pass
+            existing_data = self.store.get(user_key)
+            pending = self.access.take(user_key)
+            if existing_data:
+                user_data["usage_count"] = existing_data.get("usage_count", 0) + (pending[1] if pending else 0) + 1
+                user_data["created_at"] = existing_data.get("created_at", user_data["created_at"])
             
             # Save user data
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, ensure_ascii=False)
+            self.store.put(user_data)
             
             logger.info(f"User data stored for key: {user_key}")
             return user_key
@@ -89,27 +94,22 @@ class UserDataService:
             User data if found and not expired, None otherwise
         """
         try:
-            file_path = self._get_user_file_path(user_key)
+            user_data = self.store.get(user_key)
             
-            if not os.path.exists(file_path):
+            if not user_data:
                 logger.warning(f"User data not found for key: {user_key}")
                 return None
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                user_data = json.load(f)
-            
-            # Check if data has expired
+            # Check if data has expired (the sweeper deletes it)
+            now = datetime.now()
             expires_at = datetime.fromisoformat(user_data["expires_at"])
-            if datetime.now() > expires_at:
+            if now > expires_at:
                 logger.warning(f"User data expired for key: {user_key}")
-                # Clean up expired data
-                os.remove(file_path)
                 return None
             
-            # Update last used timestamp
-            user_data["last_used"] = datetime.now().isoformat()
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, ensure_ascii=False)
+            # Update last used timestamp and usage count (written behind)
+            self.access.record(user_key, now)
+            self.access.overlay(user_data)
             
             logger.info(f"User data retrieved for key: {user_key}")
             return user_data
@@ -136,26 +136,13 @@ class UserDataService:
             if user_data:
                 return user_data
             
-            # If not found, search through all user files
-            for filename in os.listdir(self.data_dir):
-                if filename.startswith("user_") and filename.endswith(".json"):
-                    file_path = os.path.join(self.data_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        
-                        if data.get("mobile") == mobile:
-                            # Check if expired
-                            expires_at = datetime.fromisoformat(data["expires_at"])
-                            if datetime.now() <= expires_at:
-                                return data
-                            else:
-                                # Clean up expired data
-                                os.remove(file_path)
-                    except:
-                        continue
-            
-            return None
+            # If not found, look the mobile up (stored with an email)
+            now = datetime.now()
+            user_data = self.store.find_by_mobile(mobile, now)
+            if user_data:
+                self.access.record(user_data["user_key"], now)
+                self.access.overlay(user_data)
+            return user_data
             
         except Exception as e:
             logger.error(f"Failed to find user by mobile: {e}")
@@ -173,19 +160,19 @@ class UserDataService:
             True if updated successfully, False otherwise
         """
         try:
-            existing_data = self.retrieve_user_data(user_key)
-            if not existing_data:
+            existing_data = self.store.get(user_key)
+            now = datetime.now()
+            if not existing_data or now > datetime.fromisoformat(existing_data["expires_at"]):
                 return False
             
-            # Update form data and metadata
+            # Update form data and metadata (folding in buffered accesses)
+            pending = self.access.take(user_key)
             existing_data["form_data"].update(form_data)
-            existing_data["last_used"] = datetime.now().isoformat()
-            existing_data["usage_count"] = existing_data.get("usage_count", 0) + 1
+            existing_data["last_used"] = now.isoformat()
+            existing_data["usage_count"] = existing_data.get("usage_count", 0) + (pending[1] if pending else 0) + 1
             
             # Save updated data
-            file_path = self._get_user_file_path(user_key)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False)
+            self.store.put(existing_data)
             
             logger.info(f"User data updated for key: {user_key}")
             return True
@@ -205,10 +192,8 @@ class UserDataService:
             True if deleted successfully, False otherwise
         """
         try:
-            file_path = self._get_user_file_path(user_key)
-            
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            self.access.take(user_key)
+            if self.store.delete(user_key):
                 logger.info(f"User data deleted for key: {user_key}")
                 return True
             else:
@@ -221,38 +206,19 @@ class UserDataService:
     
     def cleanup_expired_data(self) -> int:
         """
-        Clean up expired user data files
+        Clean up expired user data
         
         Returns:
-            Number of files cleaned up
+            Number of records cleaned up
         """
-        cleaned_count = 0
-        
         try:
-            for filename in os.listdir(self.data_dir):
-                if filename.startswith("user_") and filename.endswith(".json"):
-                    file_path = os.path.join(self.data_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        
-                        expires_at = datetime.fromisoformat(data["expires_at"])
-                        if datetime.now() > expires_at:
-                            os.remove(file_path)
-                            cleaned_count += 1
-                            logger.info(f"Cleaned expired data: {filename}")
-                    except:
-                        # Remove corrupted files
-                        os.remove(file_path)
-                        cleaned_count += 1
-                        logger.info(f"Cleaned corrupted data: {filename}")
-            
-            logger.info(f"Cleanup completed. Removed {cleaned_count} files.")
+            cleaned_count = self.store.delete_expired(datetime.now())
+            logger.info(f"Cleanup completed. Removed {cleaned_count} records.")
             return cleaned_count
             
         except Exception as e:
             logger.error(f"Failed to cleanup expired data: {e}")
-            return cleaned_count
+            return 0
     
     def get_user_stats(self) -> Dict[str, Any]:
         """
@@ -262,55 +228,28 @@ class UserDataService:
             Statistics dictionary
         """
         try:
-            stats = {
-                "total_users": 0,
-                "active_users": 0,
-                "expired_users": 0,
-                "total_usage": 0,
-                "most_used_fields": {},
-                "recent_activity": []
-            }
-            
-            for filename in os.listdir(self.data_dir):
-                if filename.startswith("user_") and filename.endswith(".json"):
-                    file_path = os.path.join(self.data_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        
-                        stats["total_users"] += 1
-                        stats["total_usage"] += data.get("usage_count", 0)
-                        
-                        # Check if expired
-                        expires_at = datetime.fromisoformat(data["expires_at"])
-                        if datetime.now() > expires_at:
-                            stats["expired_users"] += 1
-                        else:
-                            stats["active_users"] += 1
-                        
-                        # Track field usage
-                        for field_name in data.get("form_data", {}).keys():
-                            stats["most_used_fields"][field_name] = stats["most_used_fields"].get(field_name, 0) + 1
-                        
-                        # Recent activity
-                        stats["recent_activity"].append({
-                            "user_key": data["user_key"][:8] + "...",  # Partial key for privacy
-                            "last_used": data.get("last_used"),
-                            "usage_count": data.get("usage_count", 0)
-                        })
-                        
-                    except:
-                        continue
-            
-            # Sort recent activity
-            stats["recent_activity"].sort(key=lambda x: x["last_used"], reverse=True)
-            stats["recent_activity"] = stats["recent_activity"][:10]  # Top 10
-            
-            return stats
+            self.access.flush()
+            return self.store.stats(datetime.now())
             
         except Exception as e:
             logger.error(f"Failed to get user stats: {e}")
             return {}
+    
+    def start_sweeper(self):
+        """Run cleanup_expired_data every USER_DATA_SWEEP_INTERVAL seconds in the background"""
+        if self._sweeper is not None or not self.sweep_interval:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="user-data-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.cleanup_expired_data()
+    
+    def shutdown(self):
+        """Stop the sweeper and write buffered access metadata"""
+        self._stop.set()
+        self.access.shutdown()
 
 # Global service instance
 user_data_service = UserDataService()
\ No newline at end of file
@@ -0,0 +1,310 @@
+"""
+User Data Stores
+Storage backends behind UserDataService. Records are plain dicts:
+
+    user_key, mobile, email, form_data, created_at, expires_at, last_used, usage_count
+
+with datetimes as ISO strings, exactly as the original JSON files held them.
+
+- SQLUserDataStore: one row per user in user_form_data, indexed on mobile,
+  expires_at and last_used, so lookups, sweeps and stats never walk every
+  record.
+- JsonUserDataStore: the original file per user under USER_DATA_DIR; kept
+  for development and as the source for scripts/migrate_user_data.py.
+"""
+
+import os
+import json
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select
+
+from app.models import UserFormData
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FIELDS = ("created_at", "expires_at", "last_used")
+
+# user_key -> (last_used, uses to add)
+TouchBatch = Dict[str, Tuple[datetime, int]]
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _format_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class UserDataStore(ABC):
+    """Where UserDataService keeps its records"""
+
+    name = "abstract"
+
+    @abstractmethod
+    def get(self, user_key: str) -> Optional[Dict[str, Any]]:
+        """The record for a key, expired or not"""
+
+    @abstractmethod
+    def put(self, record: Dict[str, Any]):
+        """Insert or replace a record"""
+
+    @abstractmethod
+    def delete(self, user_key: str) -> bool:
+        """Remove a record; False if there was none"""
+
+    @abstractmethod
+    def find_by_mobile(self, mobile: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """Most recently used unexpired record for a mobile number"""
+
+    @abstractmethod
+    def touch(self, batch: TouchBatch) -> int:
+        """Apply last_used/usage_count updates for many keys at once; returns rows updated"""
+
+    @abstractmethod
+    def delete_expired(self, now: datetime) -> int:
+        """Remove every record that expired before now"""
+
+    @abstractmethod
+    def stats(self, now: datetime) -> Dict[str, Any]:
+        """Counts, usage, field popularity and the ten most recent users"""
+
+    @abstractmethod
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Every stored record"""
+
+
+class SQLUserDataStore(UserDataStore):
+    """Indexed user_form_data table"""
+
+    name = "sql"
+
+    def __init__(self, session_factory=None, engine=None):
+        if session_factory is None or engine is None:
+            from app.database import SessionLocal, engine as default_engine
+            session_factory = session_factory or SessionLocal
+            engine = engine or default_engine
+        self.session_factory = session_factory
+        self.table = UserFormData.__table__
+        self.table.create(bind=engine, checkfirst=True)
+
+    @staticmethod
+    def _to_record(row: UserFormData) -> Dict[str, Any]:
+        return {
+            "user_key": row.user_key,
+            "mobile": row.mobile,
+            "email": row.email,
+            "form_data": row.form_data or {},
+            "created_at": _format_time(row.created_at),
+            "expires_at": _format_time(row.expires_at),
+            "last_used": _format_time(row.last_used),
+            "usage_count": row.usage_count or 0,
+        }
+
+    def get(self, user_key: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            row = db.get(UserFormData, user_key)
+            return self._to_record(row) if row else None
+
+    def put(self, record: Dict[str, Any]):
+        values = {key: record.get(key) for key in ("user_key", "mobile", "email", "form_data", "usage_count")}
+        values.update({key: _parse_time(record.get(key)) for key in DATETIME_FIELDS})
+        with self.session_factory() as db:
+            db.merge(UserFormData(**values))
+            db.commit()
+
+    def delete(self, user_key: str) -> bool:
+        with self.session_factory() as db:
+            deleted = db.execute(self.table.delete().where(self.table.c.user_key == user_key)).rowcount
+            db.commit()
+            return bool(deleted)
+
+    def find_by_mobile(self, mobile: str, now: datetime) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            row = db.scalars(
+                select(UserFormData)
+                .where(UserFormData.mobile == mobile, UserFormData.expires_at > now)
+                .order_by(UserFormData.last_used.desc())
+                .limit(1)
+            ).first()
+            return self._to_record(row) if row else None
+
+    def touch(self, batch: TouchBatch) -> int:
+        if not batch:
+            return 0
+        statement = (
+            self.table.update()
+            .where(self.table.c.user_key == bindparam("b_key"))
+            .values(last_used=bindparam("b_last_used"), usage_count=self.table.c.usage_count + bindparam("b_uses"))
+        )
+        params = [{"b_key": key, "b_last_used": last_used, "b_uses": uses} for key, (last_used, uses) in batch.items()]
+        with self.session_factory() as db:
+            updated = db.execute(statement, params).rowcount
+            db.commit()
+            return updated
+
+    def delete_expired(self, now: datetime) -> int:
+        with self.session_factory() as db:
+            deleted = db.execute(self.table.delete().where(self.table.c.expires_at <= now)).rowcount
+            db.commit()
+            return deleted
+
+    def stats(self, now: datetime) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            total, active, usage = db.execute(
+                select(
+                    func.count(),
+                    func.count().filter(UserFormData.expires_at > now),
+                    func.coalesce(func.sum(UserFormData.usage_count), 0),
+                )
+            ).one()
+            fields: Dict[str, int] = {}
+            for form_data in db.scalars(select(UserFormData.form_data).execution_options(yield_per=500)):
+                for field_name in (form_data or {}):
+                    fields[field_name] = fields.get(field_name, 0) + 1
+            recent = db.execute(
+                select(UserFormData.user_key, UserFormData.last_used, UserFormData.usage_count)
+                .order_by(UserFormData.last_used.desc())
+                .limit(10)
+            ).all()
+        return {
+            "total_users": total,
+            "active_users": active,
+            "expired_users": total - active,
+            "total_usage": usage,
+            "most_used_fields": fields,
+            "recent_activity": [
+                {"user_key": key[:8] + "...", "last_used": _format_time(last_used), "usage_count": count or 0}
+                for key, last_used, count in recent
+            ],
+        }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        with self.session_factory() as db:
+            for row in db.scalars(select(UserFormData).execution_options(yield_per=500)):
+                yield self._to_record(row)
+
+
+class JsonUserDataStore(UserDataStore):
+    """One user_<key>.json file per user (the original layout; O(N) scans)"""
+
+    name = "json"
+
+    def __init__(self, data_dir: str = "user_data"):
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def path(self, user_key: str) -> str:
+        return os.path.join(self.data_dir, f"user_{user_key}.json")
+
+    def _write(self, record: Dict[str, Any]):
+        target = self.path(record["user_key"])
+        with open(target + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        os.replace(target + ".tmp", target)
+
+    def _files(self) -> Iterator[str]:
+        for filename in os.listdir(self.data_dir):
+            if filename.startswith("user_") and filename.endswith(".json"):
+                yield os.path.join(self.data_dir, filename)
+
+    def get(self, user_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(user_key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, record: Dict[str, Any]):
+        self._write(record)
+
+    def delete(self, user_key: str) -> bool:
+        try:
+            os.remove(self.path(user_key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def find_by_mobile(self, mobile: str, now: datetime) -> Optional[Dict[str, Any]]:
+        for record in self.records():
+            if record.get("mobile") == mobile and _parse_time(record["expires_at"]) > now:
+                return record
+        return None
+
+    def touch(self, batch: TouchBatch) -> int:
+        updated = 0
+        for user_key, (last_used, uses) in batch.items():
+            record = self.get(user_key)
+            if record is None:
+                continue
+            record["last_used"] = _format_time(last_used)
+            record["usage_count"] = record.get("usage_count", 0) + uses
+            self._write(record)
+            updated += 1
+        return updated
+
+    def delete_expired(self, now: datetime) -> int:
+        removed = 0
+        for path in list(self._files()):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    expired = _parse_time(json.load(f)["expires_at"]) <= now
+            except (OSError, ValueError, KeyError):
+                expired = True  # corrupted
+            if expired:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self, now: datetime) -> Dict[str, Any]:
+        stats = {
+            "total_users": 0,
+            "active_users": 0,
+            "expired_users": 0,
+            "total_usage": 0,
+            "most_used_fields": {},
+            "recent_activity": [],
+        }
+        for data in self.records():
+            stats["total_users"] += 1
+            stats["total_usage"] += data.get("usage_count", 0)
+            if _parse_time(data["expires_at"]) <= now:
+                stats["expired_users"] += 1
+            else:
+                stats["active_users"] += 1
+            for field_name in data.get("form_data", {}).keys():
+                stats["most_used_fields"][field_name] = stats["most_used_fields"].get(field_name, 0) + 1
+            stats["recent_activity"].append({
+                "user_key": data["user_key"][:8] + "...",
+                "last_used": data.get("last_used"),
+                "usage_count": data.get("usage_count", 0),
+            })
+        stats["recent_activity"].sort(key=lambda x: x["last_used"] or "", reverse=True)
+        stats["recent_activity"] = stats["recent_activity"][:10]
+        return stats
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for path in self._files():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                logger.warning(f"Skipping unreadable user data file: {path}")
+
+
+def create_user_data_store(backend: str = "sql", data_dir: str = "user_data") -> UserDataStore:
+    """Store for a USER_DATA_BACKEND value"""
+    if backend == "json":
+        return JsonUserDataStore(data_dir)
+    if backend != "sql":
+        logger.warning(f"Unknown USER_DATA_BACKEND '{backend}', using sql")
+    return SQLUserDataStore()
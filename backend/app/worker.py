@@ -0,0 +1,165 @@
+"""
+RPA Worker
+Claims jobs from the rpa_submissions queue and runs them in a browser.
+Browser workers scale independently of the API:
+
+    python -m app.worker
+
+The API process also runs an inline worker unless RPA_QUEUE_INLINE_WORKER
+is turned off.
+"""
+
+import signal
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.rpa_queue import ClaimedJob, RPAJobQueue, default_worker_id, get_rpa_queue
+
+logger = logging.getLogger(__name__)
+
+ProgressReporter = Callable[[Dict[str, Any]], None]
+
+
+def run_torrent_power_name_change(payload: Dict[str, Any], report: ProgressReporter) -> Dict[str, Any]:
+    """Fill the Torrent Power name change form"""
+    from app.services.torrent_power_automation import TorrentPowerAutomation
+
+    report({"current_field": "browser_init", "message": "🌐 Opening Chrome browser..."})
+    automation = TorrentPowerAutomation(visible=payload.get("visible"))
+    return automation.execute_complete_workflow(payload)
+
+
+# job_type -> handler(payload, report) returning a result dict with "success"
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], ProgressReporter], Dict[str, Any]]] = {
+    "torrent_power_name_change": run_torrent_power_name_change,
+}
+
+
+class RPAWorker:
+    """Polls the queue and runs claimed jobs on a few threads"""
+
+    def __init__(
+        self,
+        queue: Optional[RPAJobQueue] = None,
+        worker_id: Optional[str] = None,
+        concurrency: int = 1,
+        poll_interval: float = 2.0,
+        job_types: Optional[List[str]] = None,
+    ):
+        self.queue = queue or get_rpa_queue()
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.job_types = job_types or list(JOB_HANDLERS)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f"rpa-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"RPA worker {self.worker_id} started ({self.concurrency} thread(s))")
+
+    def request_stop(self):
+        self._stop.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop claiming; running jobs finish (or their lease expires)"""
+        self.request_stop()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(1)
+        finally:
+            self.stop()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.queue.reap_expired()
+                job = self.queue.claim(self.worker_id, self.job_types)
+            except Exception as e:
+                logger.error(f"RPA worker could not poll the queue: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job: ClaimedJob):
+        logger.info(f"RPA job {job.id} ({job.job_type}) attempt {job.attempt} claimed by {self.worker_id}")
+        handler = JOB_HANDLERS.get(job.job_type)
+        if handler is None:
+            self.queue.fail(job.id, job.lease_token, f"No handler for job type '{job.job_type}'", retryable=False)
+            return
+
+        progress: Dict[str, Any] = {"message": "🎬 Chrome opening..."}
+        done = threading.Event()
+
+        def report(update: Dict[str, Any]):
+            progress.update(update)
+            self.queue.heartbeat(job.id, job.lease_token, dict(progress))
+
+        def keep_lease():
+            interval = max(1, self.queue.visibility_timeout // 3)
+            while not done.wait(interval):
+                if not self.queue.heartbeat(job.id, job.lease_token, dict(progress)):
+                    logger.warning(f"RPA job {job.id} lease lost; result will be discarded")
+                    return
+
+        heartbeat = threading.Thread(target=keep_lease, name=f"rpa-lease-{job.id}", daemon=True)
+        heartbeat.start()
+        try:
+            report(progress)
+            result = handler(job.payload, report)
+        except Exception as e:
+            logger.exception(f"RPA job {job.id} raised")
+            self.queue.fail(job.id, job.lease_token, str(e))
+            return
+        finally:
+            done.set()
+            heartbeat.join(5)
+
+        if result.get("success"):
+            self.queue.complete(job.id, job.lease_token, result, result.get("confirmation_number"))
+            logger.info(f"RPA job {job.id} completed")
+        else:
+            error = result.get("error") or result.get("message") or "Automation reported failure"
+            self.queue.fail(job.id, job.lease_token, error, result=result)
+
+
+def main():
+    from app.database import Base, engine, sync_table_columns
+    from app.models import RPASubmission
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    Base.metadata.create_all(bind=engine)
+    sync_table_columns(RPASubmission.__table__)
+
+    settings = get_settings()
+    worker = RPAWorker(
+        concurrency=settings.RPA_WORKER_CONCURRENCY,
+        poll_interval=settings.RPA_QUEUE_POLL_INTERVAL,
+    )
+
+    def handle_signal(signum, frame):
+        logger.info(f"Signal {signum} received, stopping worker")
+        worker.request_stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    worker.run_forever()
+
+    from app.services.driver_pool import get_driver_pool
+    get_driver_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,32 +8,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def prewarm_chrome():
-    """Pre-initialize Chrome to make first automation instant"""
+    """Fill the shared driver pool with warm browsers so the first automation is instant"""
     try:
-        logger.info("🔥 Pre-warming Chrome for faster automation...")
+        logger.info("🔥 Pre-warming Chrome driver pool for faster automation...")
         
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
+        from app.services.driver_pool import get_driver_pool
         
-        # Get driver path (uses cache)
-        driver_path = ChromeDriverManager().install()
-        logger.info(f"✅ ChromeDriver cached at: {driver_path}")
+        pool = get_driver_pool()
+        launched = pool.prewarm()
         
-        # Quick test with headless mode
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        
-        service = Service(driver_path)
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.get("data:text/html,<html><body>Prewarmed</body></html>")
-        driver.quit()
-        
-        logger.info("✅ Chrome pre-warmed! First automation will be instant.")
+        logger.info(f"✅ Chrome pre-warmed! {launched} browser(s) launched, pool: {pool.stats()}")
         return True
         
     except Exception as e:
@@ -41,4 +25,6 @@ def prewarm_chrome():
         return False
 
 if __name__ == "__main__":
-    prewarm_chrome()
+    if prewarm_chrome():
+        from app.services.driver_pool import get_driver_pool
+        get_driver_pool().shutdown()
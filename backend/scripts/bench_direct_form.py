@@ -0,0 +1,103 @@
+"""
+Benchmark the HTTP form engine against the demo-govt portals.
+
+    python scripts/bench_direct_form.py                 # in-process, no server needed
+    python scripts/bench_direct_form.py --base-url http://localhost:8000 --browser
+
+--browser also times the Selenium fallback on the same form (needs Chrome
+and a running server).
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.services.direct_form_service import build_field_specs, submit_direct_form, submit_with_browser
+
+# One supplier per demo template
+SUPPLIERS = ["torrent-power", "gujarat-gas", "amc-water", "anyror"]
+
+SAMPLE_DATA = {
+    "city": "Ahmedabad",
+    "zone": "Central Zone",
+    "consumer_number": "CN12345678",
+    "bp_number": "BP12345678",
+    "connection_id": "CID123456",
+    "survey_number": "123/A",
+    "taluka": "Daskroi",
+    "village": "Bopal",
+    "applicant_name": "Demo User",
+    "mobile": "9876543210",
+    "email": "demo@example.com",
+    "address": "Demo Address, Gujarat",
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def bench_http(base_url, iterations):
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, follow_redirects=True)
+        root = base_url.rstrip("/")
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://demo", follow_redirects=True)
+        root = "http://demo"
+
+    fields = build_field_specs(SAMPLE_DATA)
+    async with client:
+        for supplier_id in SUPPLIERS:
+            url = f"{root}/demo-govt/{supplier_id}"
+            timings, transferred, last = [], [], None
+            for _ in range(iterations):
+                started = time.perf_counter()
+                last = await submit_direct_form(url, fields, browser_fallback=False, client=client)
+                timings.append((time.perf_counter() - started) * 1000)
+                transferred.append(last.get("bytes_transferred", 0))
+            print(
+                f"{supplier_id:15s} http    ok={last.get('success')} filled={last.get('fields_filled')}/{len(fields)} "
+                f"conf={last.get('confirmation_number')} "
+                f"mean={statistics.mean(timings):.1f}ms p50={percentile(timings, 50):.1f}ms p95={percentile(timings, 95):.1f}ms "
+                f"bytes={statistics.mean(transferred):.0f}"
+            )
+
+
+def bench_browser(base_url):
+    fields = build_field_specs(SAMPLE_DATA)
+    for supplier_id in SUPPLIERS:
+        started = time.perf_counter()
+        result = submit_with_browser(f"{base_url.rstrip('/')}/demo-govt/{supplier_id}", fields)
+        print(
+            f"{supplier_id:15s} browser ok={result.get('success')} filled={result.get('fields_filled')}/{len(fields)} "
+            f"conf={result.get('confirmation_number')} time={(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Running backend, e.g. http://localhost:8000 (default: in-process)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--browser", action="store_true", help="Also time the Selenium path (needs --base-url)")
+    args = parser.parse_args()
+
+    asyncio.run(bench_http(args.base_url, args.iterations))
+    if args.browser:
+        if not args.base_url:
+            parser.error("--browser needs --base-url (Chrome must reach the server)")
+        bench_browser(args.base_url)
+        from app.services.driver_pool import get_driver_pool
+        get_driver_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark the field extractors on large multi-page OCR texts.
+
+    python scripts/bench_ocr_extractors.py                 # 20 pages, every type
+    python scripts/bench_ocr_extractors.py --pages 200 --types water_bill,voter_id
+
+For every document type a synthetic OCR dump is generated: pages of noisy
+OCR-like filler with the labelled fields scattered over the pages, the way a
+scanned multi-page bill or a stack of property papers comes out of
+Tesseract. Three ways of running the same EXTRACTORS table are timed and
+must return the same fields:
+
+    legacy    re.search(pattern_string, text, flags) per pattern, per call
+    registry  the precompiled patterns in ocr_extractors (what the app uses)
+    one-pass  all first-choice patterns as zero-width alternatives of one
+              regex, walked once with finditer (fallbacks searched after)
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ocr_extractors import EXTRACTORS, REGISTRY, CompiledExtractor
+
+FILLER_WORDS = ["TOTAL", "Rs", "GST", "units", "kWh", "Slab", "Due", "Date", "Period", "Meter", "Reading",
+                "Previous", "Current", "Charges", "Rebate", "Arrears", "Page", "of", "Govt", "Gujarat",
+                "Ahmedabad", "Surat", "Vadodara", "|", "--", "~", "1,245.00", "0.00", "12.5", "%"]
+
+# Labelled lines per document type; {} placeholders are filled with random values
+FIELD_LINES = {
+    "aadhaar": ["Name: {name}", "DOB: {date}", "{aadhaar}", "Address: {address}"],
+    "pan": ["{pan}", "{name}", "Father's Name: {name}", "{date}"],
+    "electricity_bill": ["Consumer No: {number}", "Name: {name}", "Mobile: {mobile}", "Address: {address}"],
+    "gas_bill": ["BP No: {number}", "Customer Name: {name}", "Contact: {mobile}", "Address: {address}"],
+    "water_bill": ["Connection No: {connection}", "Owner Name: {name}", "Ward: {ward}",
+                   "Mobile: {mobile}", "Address: {address}"],
+    "property_paper": ["Survey No: {survey}", "Khata No: {khata}", "Khatedar Name: {name}",
+                       "Village: Bopal", "Taluka: Daskroi", "District: Ahmedabad"],
+    "voter_id": ["{epic}", "Elector's Name: {name}", "Father's Name: {name}", "Sex: Male", "Date of Birth: {date}"],
+}
+
+
+def values(rng: random.Random) -> dict:
+    return {
+        "name": rng.choice(["Ramesh Patel", "Sunita Shah", "Kiran Desai", "Meena Joshi"]),
+        "date": f"{rng.randint(10, 28)}/0{rng.randint(1, 9)}/19{rng.randint(60, 99)}",
+        "aadhaar": " ".join(str(rng.randint(1000, 9999)) for _ in range(3)),
+        "pan": "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ") for _ in range(5)) + f"{rng.randint(1000, 9999)}K",
+        "epic": "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ") for _ in range(3)) + str(rng.randint(1000000, 9999999)),
+        "number": str(rng.randint(10000000, 99999999)),
+        "connection": f"WC/{rng.randint(100, 999)}/{rng.randint(1000, 9999)}",
+        "mobile": f"9{rng.randint(100000000, 999999999)}",
+        "address": f"{rng.randint(1, 99)} Shanti Nagar, Ahmedabad",
+        "ward": rng.choice(["Navrangpura", "Maninagar", "Bopal"]),
+        "survey": f"{rng.randint(10, 999)}/{rng.randint(1, 9)}",
+        "khata": str(rng.randint(100, 9999)),
+    }
+
+
+def filler_line(rng: random.Random) -> str:
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def make_text(document_type: str, pages: int, rng: random.Random) -> str:
+    """A multi-page OCR dump with the document's fields spread over the pages"""
+    lines_per_page = 60
+    body = [filler_line(rng) if rng.random() > 0.1 else "" for _ in range(pages * lines_per_page)]
+    fill = values(rng)
+    for line in FIELD_LINES[document_type]:
+        body.insert(rng.randrange(len(body)), line.format(**fill))
+        body.insert(rng.randrange(len(body)), "")
+    return "\n".join(body)
+
+
+def legacy(document_type: str):
+    """The extractors as they were written before the registry"""
+    fields = EXTRACTORS[document_type]
+
+    def extract(text: str) -> dict:
+        data = {}
+        for field, specs in fields.items():
+            for spec in specs:
+                match = re.search(spec["regex"], text, spec["flags"])
+                if match:
+                    data[field] = CompiledExtractor._clean(match.group(spec["group"]), spec["clean"])
+                    break
+        return data
+    return extract
+
+
+def one_pass(document_type: str):
+    """Every field's first-choice pattern in a single finditer walk"""
+    fields = EXTRACTORS[document_type]
+    registry = REGISTRY[document_type]
+    parts, alternatives, group = [], {}, 1
+    for field, specs in fields.items():
+        spec = specs[0]
+        inline = "".join(flag for bit, flag in ((re.I, "i"), (re.S, "s"), (re.M, "m")) if spec["flags"] & bit)
+        parts.append(f"(?=((?{inline}:{spec['regex']})))" if inline else f"(?=({spec['regex']}))")
+        alternatives[group] = (field, group + spec["group"] if spec["group"] else group, spec["clean"])
+        group += 1 + re.compile(spec["regex"], spec["flags"]).groups
+    scanner = re.compile("|".join(parts))
+
+    def extract(text: str) -> dict:
+        found = {}
+        for match in scanner.finditer(text):
+            field, value_group, clean = alternatives[match.lastindex]
+            if field not in found:
+                found[field] = CompiledExtractor._clean(match.group(value_group), clean)
+                if len(found) == len(fields):
+                    break
+        data = {}
+        for field in fields:
+            if field in found:
+                data[field] = found[field]
+                continue
+            for compiled, value_group, clean in registry.patterns[field][1:]:
+                match = compiled.search(text)
+                if match:
+                    data[field] = CompiledExtractor._clean(match.group(value_group), clean)
+                    break
+        return data
+    return extract
+
+
+def timed(function, text: str, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(text)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=5, help="Texts per document type")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--types", default=",".join(EXTRACTORS))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'type':<17}{'patterns':>9}{'KB':>6}{'legacy ms':>11}{'registry ms':>13}{'one-pass ms':>13}{'registry MB/s':>15}{'fields':>8}")
+    mismatches = 0
+    for document_type in args.types.split(","):
+        methods = {
+            "legacy": legacy(document_type),
+            "registry": REGISTRY[document_type].extract,
+            "one-pass": one_pass(document_type),
+        }
+        patterns = sum(len(specs) for specs in EXTRACTORS[document_type].values())
+        seconds = {name: 0.0 for name in methods}
+        size = found = 0
+        for _ in range(args.samples):
+            text = make_text(document_type, args.pages, rng)
+            expected = methods["legacy"](text)
+            for name, extract in methods.items():
+                result = extract(text)
+                if result != expected:
+                    mismatches += 1
+                    print(f"  ❌ {document_type}: {name} {result} != legacy {expected}")
+                seconds[name] += timed(extract, text, args.repeat)
+            size += len(text.encode())
+            found += len(expected)
+        per_text = {name: total / args.samples * 1000 for name, total in seconds.items()}
+        print(f"{document_type:<17}{patterns:>9}{size / args.samples / 1024:>6.0f}{per_text['legacy']:>11.2f}"
+              f"{per_text['registry']:>13.2f}{per_text['one-pass']:>13.2f}"
+              f"{size / seconds['registry'] / 1e6:>15.1f}{found / args.samples:>8.1f}")
+    print("\n✅ all methods agree" if not mismatches else f"\n❌ {mismatches} mismatching results")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Copy the legacy user_data/user_<key>.json files into the user_form_data table.
+
+    python scripts/migrate_user_data.py                      # USER_DATA_DIR -> DATABASE_URL
+    python scripts/migrate_user_data.py --dir /app/user_data --dry-run
+    python scripts/migrate_user_data.py --include-expired --delete
+
+Records already in the table are replaced only when the file was used more
+recently. Expired records are skipped unless --include-expired is given.
+--delete removes each file once it has been copied (or skipped as expired).
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import get_settings
+from app.services.user_data_store import JsonUserDataStore, SQLUserDataStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=get_settings().USER_DATA_DIR, help="Directory of user_*.json files")
+    parser.add_argument("--include-expired", action="store_true", help="Copy expired records too")
+    parser.add_argument("--delete", action="store_true", help="Delete each JSON file after migrating it")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would happen without writing")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        sys.exit(f"No such directory: {args.dir}")
+
+    source = JsonUserDataStore(args.dir)
+    target = SQLUserDataStore()
+    now = datetime.now()
+    counts = {"migrated": 0, "expired": 0, "kept_newer": 0, "invalid": 0}
+
+    for record in list(source.records()):
+        user_key = record.get("user_key")
+        try:
+            expired = datetime.fromisoformat(record["expires_at"]) <= now
+            if not user_key or not record.get("mobile"):
+                raise ValueError("missing user_key or mobile")
+        except (KeyError, TypeError, ValueError) as e:
+            counts["invalid"] += 1
+            print(f"  ✗ {user_key or '?'}: {e}")
+            continue
+
+        if expired and not args.include_expired:
+            counts["expired"] += 1
+        else:
+            existing = target.get(user_key)
+            if existing and (existing.get("last_used") or "") >= (record.get("last_used") or ""):
+                counts["kept_newer"] += 1
+            else:
+                record.setdefault("form_data", {})
+                record.setdefault("usage_count", 1)
+                record.setdefault("created_at", record.get("last_used") or now.isoformat())
+                if not args.dry_run:
+                    target.put(record)
+                counts["migrated"] += 1
+
+        if args.delete and not args.dry_run:
+            source.delete(user_key)
+
+    prefix = "[dry run] " if args.dry_run else ""
+    print(f"{prefix}{args.dir} -> {get_settings().DATABASE_URL}")
+    for name, count in counts.items():
+        print(f"{prefix}{name:>11}: {count}")
+
+
+if __name__ == "__main__":
+    main()
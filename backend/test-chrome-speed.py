@@ -33,7 +33,6 @@ def test_chrome_speed():
         options = Options()
         options.add_argument("--window-size=800,600")
         options.add_argument("--disable-extensions")
-        options.add_argument("--disable-images")
         
         start = time.time()
         service = Service(driver_path)
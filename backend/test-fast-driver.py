@@ -32,7 +32,6 @@ def test_fast_driver():
         options = Options()
         options.add_argument("--window-size=800,600")
         options.add_argument("--disable-extensions")
-        options.add_argument("--disable-images")
         
         start = time.time()
         driver = webdriver.Chrome(service=service, options=options)